@@ -1,5 +1,9 @@
+import asyncio
 import logging
 import os
+import aiofiles
+import threading
+from collections import OrderedDict
 from typing import Dict, Any
 from app.agents.base_agent import BaseAgent
 from app.services.artifact_service import artifact_service
@@ -7,6 +11,28 @@ from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Repo analysis cache keyed by (repo_path, README mtime, repo dir mtime)
+_REPO_CACHE: "OrderedDict[tuple, str]" = OrderedDict()
+_REPO_CACHE_MAX_ENTRIES = 128
+_REPO_CACHE_LOCK = threading.Lock()
+
+PLAN_PROMPT_TEMPLATE = """
+You are the ARCHITECT. Create a detailed technical implementation plan.
+REPO ANALYSIS:
+{repo_info}
+
+FEATURE CONTEXT:
+{feature_context}
+
+USER NOTES:
+{user_notes}
+
+Your plan MUST specify:
+1. Files to create or modify
+2. Technical approach (patterns, libraries)
+3. Step-by-step implementation guide for the FORGE agent
+"""
+
 class ArchitectAgent(BaseAgent):
     """Agent responsible for technical planning and codebase analysis."""
     
@@ -18,7 +44,7 @@ class ArchitectAgent(BaseAgent):
             self.logger.warning("ARCHITECT: No repository found or path invalid. Proceeding without repo context.")
             repo_info = "No repository context available."
         else:
-            repo_info = self._analyze_repo(repo_path)
+            repo_info = await asyncio.to_thread(self._analyze_repo, repo_path)
 
         # Build prompt using SCRIBE's output if available
         scribe_artifacts = context.get("scribe_results", {}).get("artifacts", {})
@@ -28,52 +54,78 @@ class ArchitectAgent(BaseAgent):
         if feature_doc_path:
             full_path = Path(context.get("storage_path", "./storage")) / feature_doc_path
             if full_path.exists():
-                with open(full_path, "r", encoding="utf-8") as f:
-                    feature_context = f.read()
+                async with aiofiles.open(full_path, "r", encoding="utf-8") as f:
+                    feature_context = await f.read()
 
-        prompt = f"""
-You are the ARCHITECT. Create a detailed technical implementation plan.
-REPO ANALYSIS:
-{repo_info}
-
-FEATURE CONTEXT:
-{feature_context}
-
-USER NOTES:
-{context.get("architect", {}).get("user_prompt", "")}
-
-Your plan MUST specify:
-1. Files to create or modify
-2. Technical approach (patterns, libraries)
-3. Step-by-step implementation guide for the FORGE agent
-"""
-        # Call LLM
-        plan_content = await self.call_llm(prompt)
+        prompt = PLAN_PROMPT_TEMPLATE.format(
+            repo_info=repo_info,
+            feature_context=feature_context,
+            user_notes=context.get("architect", {}).get("user_prompt", "")
+        )
+        # Call LLM (plan drafts may go through Batch Mode when async_ok is set)
+        plan_content = (await self.call_llm_batch([prompt]))[0]
         
         # Save artifact
-        path = artifact_service.save_artifact(self.task_id, "plan", plan_content)
+        path = await artifact_service.save_artifact_async(self.task_id, "plan", plan_content)
+        
+        # Cache the plan on Gemini's side so FORGE can reference it without resending it
+        plan_cache_name = None
+        forge_config = context.get("forge", {})
+        if forge_config.get("enabled"):
+            plan_cache_name = await self.create_context_cache(plan_content, forge_config)
         
         return {
             "status": "success",
             "message": "Technical plan generated",
             "plan_path": path,
+            "plan_cache_name": plan_cache_name,
             "artifact_paths": [path],
             "summary": "Technical implementation plan generated from codebase analysis",
             "repo_analyzed": bool(repo_path)
         }
 
     def _analyze_repo(self, repo_path: str) -> str:
+        """Returns the repo analysis, reusing the cached one if the repo is unchanged."""
+        readme_path = os.path.join(repo_path, "README.md")
+        try:
+            readme_mtime = os.stat(readme_path).st_mtime_ns
+        except FileNotFoundError:
+            readme_mtime = 0
+        key = (repo_path, readme_mtime, os.stat(repo_path).st_mtime_ns)
+
+        with _REPO_CACHE_LOCK:
+            if key in _REPO_CACHE:
+                _REPO_CACHE.move_to_end(key)
+                return _REPO_CACHE[key]
+
+        analysis = self._build_repo_analysis(repo_path)
+
+        with _REPO_CACHE_LOCK:
+            _REPO_CACHE[key] = analysis
+            _REPO_CACHE.move_to_end(key)
+            while len(_REPO_CACHE) > _REPO_CACHE_MAX_ENTRIES:
+                _REPO_CACHE.popitem(last=False)
+        return analysis
+
+    def _build_repo_analysis(self, repo_path: str) -> str:
         """Reads README and lists core directory structure."""
         path = Path(repo_path)
         readme_content = ""
         readme_path = path / "README.md"
         if readme_path.exists():
-            with open(readme_path, "r", encoding="utf-8") as f:
-                readme_content = f.read()[:2000] # Cap at 2k chars
+            with open(readme_path, "r", encoding="utf-8", errors="replace") as f:
+                readme_content = f.read(2000) # Cap at 2k chars
 
-        # List top-level files
-        files = [f.name for f in path.glob("*") if f.is_file()][:20]
-        dirs = [d.name for d in path.glob("*") if d.is_dir() and not d.name.startswith(".")][:10]
+        # List top-level files and directories in a single pass (DirEntry caches the type)
+        files, dirs = [], []
+        with os.scandir(repo_path) as entries:
+            for entry in entries:
+                if len(files) < 20 and entry.is_file(follow_symlinks=False):
+                    files.append(entry.name)
+                elif len(dirs) < 10 and entry.is_dir(follow_symlinks=False) and not entry.name.startswith("."):
+                    dirs.append(entry.name)
+                if len(files) >= 20 and len(dirs) >= 10:
+                    break
         
         return f"""
 README Content:
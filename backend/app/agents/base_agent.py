@@ -1,14 +1,108 @@
+import asyncio
+import hashlib
 import logging
 import json
 import os
+import tempfile
+import threading
+import time
+import orjson
+from collections import OrderedDict
+from datetime import timedelta
 from abc import ABC, abstractmethod
 from typing import Dict, List, Any, Optional
 import google.generativeai as genai
 from app.config import settings
 from app.services.logging_service import get_task_logger
+from app.services.llm_batcher import llm_batcher
+from app.services.audit_service import audit_service
+from app.services.mcp_service import mcp_service
+from app.db.database import SessionLocal
+from app.models.models import Tool
 
 logger = logging.getLogger(__name__)
 
+# Gemini Batch Mode polling (jobs are billed at 50% of the realtime price);
+# how long to wait for a job is settings.LLM_BATCH_MAX_WAIT
+BATCH_POLL_INTERVAL_SECONDS = 30
+BATCH_TERMINAL_STATES = {
+    "JOB_STATE_SUCCEEDED",
+    "JOB_STATE_FAILED",
+    "JOB_STATE_CANCELLED",
+    "JOB_STATE_EXPIRED",
+}
+
+DEFAULT_MODEL = "gemini-2.0-flash"
+
+# Gemini context caching; the API rejects content below 4096 tokens
+CONTEXT_CACHE_TTL = timedelta(hours=1)
+CONTEXT_CACHE_MIN_TOKENS = 4096
+
+# Responses to identical tool-free prompts, keyed by a sha256 of everything sent
+# to the model. Entries expire after settings.LLM_RESPONSE_CACHE_TTL seconds.
+RESPONSE_CACHE_MAX_ENTRIES = 256
+_RESPONSE_CACHE: "OrderedDict[bytes, tuple]" = OrderedDict()
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+# Models are shared across agents and tasks in the same worker process,
+# keyed by (model_name, generation_config, tools_hash)
+_MODEL_CACHE: Dict[tuple, "genai.GenerativeModel"] = {}
+_genai_configured = False
+
+
+def _configure_genai():
+    """Configures the Gemini SDK once per process."""
+    global _genai_configured
+    if not _genai_configured:
+        genai.configure(api_key=settings.GOOGLE_API_KEY)
+        _genai_configured = True
+
+
+def get_tools_hash(tools_list: Optional[List[Dict[str, Any]]]) -> str:
+    """Stable fingerprint of a tool declaration list, used as part of the model cache key."""
+    if not tools_list:
+        return ""
+    return hashlib.sha1(json.dumps(tools_list, sort_keys=True).encode()).hexdigest()
+
+
+def get_model(
+    model_name: str,
+    generation_config: Dict[str, Any],
+    tools_hash: str = "",
+    tools_list: Optional[List[Dict[str, Any]]] = None
+) -> "genai.GenerativeModel":
+    """Returns a cached GenerativeModel for the given settings, creating it on first use."""
+    key = (model_name, tuple(sorted(generation_config.items())), tools_hash)
+
+    model = _MODEL_CACHE.get(key)
+    if model is None:
+        kwargs = {"model_name": model_name, "generation_config": generation_config}
+        if tools_list:
+            kwargs["tools"] = [{"function_declarations": tools_list}]
+        model = _MODEL_CACHE.setdefault(key, genai.GenerativeModel(**kwargs))
+    return model
+
+
+def _get_cached_response(key: bytes) -> Optional[str]:
+    with _RESPONSE_CACHE_LOCK:
+        entry = _RESPONSE_CACHE.get(key)
+        if entry is None:
+            return None
+        stored_at, text = entry
+        if time.monotonic() - stored_at > settings.LLM_RESPONSE_CACHE_TTL:
+            del _RESPONSE_CACHE[key]
+            return None
+        _RESPONSE_CACHE.move_to_end(key)
+        return text
+
+
+def _store_cached_response(key: bytes, text: str):
+    with _RESPONSE_CACHE_LOCK:
+        _RESPONSE_CACHE[key] = (time.monotonic(), text)
+        _RESPONSE_CACHE.move_to_end(key)
+        while len(_RESPONSE_CACHE) > RESPONSE_CACHE_MAX_ENTRIES:
+            _RESPONSE_CACHE.popitem(last=False)
+
 class BaseAgent(ABC):
     """Base class for all AI agents in the pipeline."""
     
@@ -20,20 +114,29 @@ class BaseAgent(ABC):
         # Initialize Gemini
         if not settings.GOOGLE_API_KEY:
             raise ValueError("GOOGLE_API_KEY not found in settings")
-        genai.configure(api_key=settings.GOOGLE_API_KEY)
+        _configure_genai()
         
-        self.model_name = self.config.get("model", "gemini-2.0-flash")
-        self.model = genai.GenerativeModel(
-            model_name=self.model_name,
-            generation_config={
-                "temperature": self.config.get("temperature", 0.3),
-                "max_output_tokens": self.config.get("max_tokens", 8000),
-            }
-        )
+        self.model_name = self.config.get("model", DEFAULT_MODEL)
+        self.generation_config = {
+            "temperature": self.config.get("temperature", 0.3),
+            "max_output_tokens": self.config.get("max_tokens", 8000),
+        }
+        # Depends only on the agent config, so it is rendered once per instance
+        self._system_prompt = self._render_system_prompt()
+        self._system_part = genai.protos.Part(text=self._system_prompt)
+        
+        # DB session shared by everything this agent does, opened on first use
+        self._db = None
+        
+        # Tool declarations are fixed for the agent's lifetime, load them once
+        self._tools_list: List[Dict[str, Any]] = []
+        self._tools_version = None
+        self._tools_hash = ""
+        if self.config.get("tools"):
+            self._tools_list = self._load_tools()
         
         # Capture agent state for audit trail
-        from app.services.audit_service import audit_service
-        self.state_id = audit_service.capture_agent_state(
+        self.state_id = audit_service.enqueue_state(
             agent_name=self.config.get('name', 'unknown'),
             agent_config=self.config,
             task_id=task_id,
@@ -41,7 +144,59 @@ class BaseAgent(ABC):
         )
         self.logger.info(f"Agent state captured: {self.state_id}")
 
+    @property
+    def db(self):
+        """Lazily opened session reused for the lifetime of the agent."""
+        if self._db is None:
+            self._db = SessionLocal()
+        return self._db
+
+    async def aclose(self):
+        """Releases the agent's DB session. Called when the stage finishes."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    @property
+    def model(self) -> "genai.GenerativeModel":
+        """The shared tool-less model for this agent's settings."""
+        return get_model(self.model_name, self.generation_config)
+
+    def _load_tools(self) -> List[Dict[str, Any]]:
+        """Fetches this agent's tools and converts them to Gemini function declarations."""
+        tools_list = []
+        try:
+            # Get tools assigned to this agent in config
+            agent_tools = self.config.get("tools", [])
+            db_tools = self.db.query(Tool).filter(Tool.name.in_(agent_tools)).all()
+            
+            # Convert to Gemini tool format (simplified)
+            # In a real app, you'd handle complex nested parameters
+            for t in db_tools:
+                tools_list.append({
+                    "name": t.name,
+                    "description": t.description or "",
+                    "parameters": t.parameters or {"type": "object", "properties": {}}
+                })
+        except Exception as e:
+            self.logger.warning(f"Could not load tools: {e}")
+        self._tools_version = mcp_service.tool_version
+        self._tools_hash = get_tools_hash(tools_list)
+        return tools_list
+
+    def _get_tools_list(self) -> List[Dict[str, Any]]:
+        """Returns the cached tool list, reloading it if the tool registry changed."""
+        if not self.config.get("tools"):
+            return []
+        if self._tools_version != mcp_service.tool_version:
+            self._tools_list = self._load_tools()
+        return self._tools_list
+
     def _get_system_prompt(self) -> str:
+        """Returns the system prompt rendered at construction time."""
+        return self._system_prompt
+
+    def _render_system_prompt(self) -> str:
         """Combines enforcement prompt and guardrails into a system prompt."""
         guardrails = "\n".join([f"- {g}" for g in self.config.get("guardrails", [])])
         prompt = f"""
@@ -55,54 +210,79 @@ Always respond in valid JSON format where appropriate, or clear structured markd
 """
         return prompt
 
-    async def call_llm(self, user_prompt: str, context: Optional[Dict] = None) -> str:
-        """Wrapper for calling Gemini with tool support and retry logic."""
+    async def call_llm(
+        self,
+        user_prompt: str,
+        context: Optional[Dict] = None,
+        max_output_tokens: Optional[int] = None,
+        max_chars: Optional[int] = None,
+        cached_content: Optional[str] = None,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None
+    ) -> str:
+        """
+        Wrapper for calling Gemini with tool support and retry logic.
+
+        ``max_output_tokens`` overrides the agent's output budget for this call.
+        ``timeout`` (seconds per request) and ``max_retries`` override the
+        LLM_REQUEST_TIMEOUT / LLM_MAX_RETRIES defaults.
+        ``max_chars`` streams the response and stops once that many characters
+        have arrived (ignored when the agent has tools, which need the full turn).
+        ``cached_content`` is the name of a Gemini context cache (see
+        ``create_context_cache``) to use as the leading context of the request.
+        """
         self.logger.info(f"Calling LLM ({self.model_name}) for task {self.task_id}")
         
-        # 1. Fetch Tools for this agent
-        tools_list = []
-        try:
-            from app.db.database import SessionLocal
-            from app.models.models import Tool
-            db = SessionLocal()
-            try:
-                # Get tools assigned to this agent in config
-                agent_tools = self.config.get("tools", [])
-                db_tools = db.query(Tool).filter(Tool.name.in_(agent_tools)).all()
-                
-                # Convert to Gemini tool format (simplified)
-                # In a real app, you'd handle complex nested parameters
-                for t in db_tools:
-                    tools_list.append({
-                        "name": t.name,
-                        "description": t.description or "",
-                        "parameters": t.parameters or {"type": "object", "properties": {}}
-                    })
-            finally:
-                db.close()
-        except Exception as e:
-            self.logger.warning(f"Could not load tools: {e}")
+        # 1. Tools for this agent (cached at construction)
+        tools_list = self._get_tools_list()
+        
+        generation_config = self.generation_config
+        if max_output_tokens is not None:
+            generation_config = {**generation_config, "max_output_tokens": max_output_tokens}
 
-        full_context = f"CONTEXT:\n{json.dumps(context, indent=2)}\n\n" if context else ""
-        system_prompt = self._get_system_prompt()
+        # System prompt, context and request go as separate parts of one user turn
+        parts = [self._system_part]
+        if context:
+            parts.append(genai.protos.Part(text=f"CONTEXT:\n{self._serialize_context(context)}"))
+        parts.append(genai.protos.Part(text=f"USER REQUEST: {user_prompt}"))
+
+        submit_kwargs: Dict[str, Any] = {"max_retries": max_retries}
+        if timeout is not None:
+            submit_kwargs["request_options"] = {"timeout": timeout}
+
+        # Tool calls have side effects, so only tool-free requests are served from cache
+        cache_key = None
+        if settings.LLM_RESPONSE_CACHE_TTL and not tools_list:
+            cache_key = self._response_cache_key(parts, generation_config, max_chars, cached_content)
+            cached = _get_cached_response(cache_key)
+            if cached is not None:
+                self.logger.info(f"LLM response cache hit for task {self.task_id}")
+                return cached
         
         try:
-            # Re-initialize model with tools if any
-            if tools_list:
-                # In Gemini Pro/Flash, tools are passed to the model
-                # Note: This is an simplified implementation of tool loop
-                model_with_tools = genai.GenerativeModel(
-                    model_name=self.model_name,
-                    tools=[{"function_declarations": tools_list}],
-                    generation_config=self.model._generation_config
+            # In Gemini Pro/Flash, tools are passed to the model
+            # Note: This is an simplified implementation of tool loop
+            if cached_content:
+                if tools_list:
+                    raise ValueError("Cached content can't be combined with per-request tools")
+                # Resolving the cache name is a blocking API call
+                model = await asyncio.to_thread(
+                    genai.GenerativeModel.from_cached_content,
+                    cached_content=cached_content,
+                    generation_config=generation_config
                 )
-                chat = model_with_tools.start_chat(history=[])
             else:
-                chat = self.model.start_chat(history=[])
+                model = get_model(self.model_name, generation_config, self._tools_hash, tools_list)
+            chat = model.start_chat(history=[])
+            message = genai.protos.Content(role="user", parts=parts)
+            
+            if max_chars and not tools_list:
+                text = await self._stream_text(chat, message, max_chars, **submit_kwargs)
+                if cache_key:
+                    _store_cached_response(cache_key, text)
+                return text
                 
-            response = await chat.send_message_async(
-                f"{system_prompt}\n\n{full_context}\nUSER REQUEST: {user_prompt}"
-            )
+            response = await llm_batcher.submit(chat, message, **submit_kwargs)
             
             # Simple Tool Loop (1 level deep for now)
             while response.candidates[0].content.parts[0].function_call:
@@ -113,28 +293,216 @@ Always respond in valid JSON format where appropriate, or clear structured markd
                 self.logger.info(f"Agent {self.config.get('name')} calling tool: {tool_name}")
                 
                 # Execute Tool via MCPService
-                from app.services.mcp_service import mcp_service
-                db = SessionLocal()
-                try:
-                    result = await mcp_service.execute_tool(tool_name, args, db)
-                    response = await chat.send_message_async(
-                        genai.protos.Content(
-                            parts=[genai.protos.Part(
-                                function_response=genai.protos.FunctionResponse(
-                                    name=tool_name,
-                                    response={'result': result}
-                                )
-                            )]
-                        )
-                    )
-                finally:
-                    db.close()
+                result = await mcp_service.execute_tool(tool_name, args, self.db)
+                response = await llm_batcher.submit(
+                    chat,
+                    genai.protos.Content(
+                        parts=[genai.protos.Part(
+                            function_response=genai.protos.FunctionResponse(
+                                name=tool_name,
+                                response={'result': result}
+                            )
+                        )]
+                    ),
+                    **submit_kwargs
+                )
             
+            if cache_key:
+                _store_cached_response(cache_key, response.text)
             return response.text
         except Exception as e:
             self.logger.error(f"LLM call failed: {e}")
             raise
 
+    def _response_cache_key(
+        self,
+        parts: List[Any],
+        generation_config: Dict[str, Any],
+        max_chars: Optional[int],
+        cached_content: Optional[str]
+    ) -> bytes:
+        digest = hashlib.sha256()
+        digest.update(orjson.dumps(
+            [self.model_name, generation_config, max_chars, cached_content],
+            option=orjson.OPT_SORT_KEYS
+        ))
+        for part in parts:
+            digest.update(b"\0")
+            digest.update(part.text.encode())
+        return digest.digest()
+
+    async def create_context_cache(self, text: str, consumer_config: Dict[str, Any]) -> Optional[str]:
+        """
+        Uploads text as Gemini cached content for the agent described by
+        ``consumer_config``, so its later calls can reference it instead of
+        resending it. A cache is bound to one model and can't be combined with
+        tools, so it is created for the consumer's model and skipped when the
+        consumer has tools. Returns the cache name, or None if it can't be cached.
+        """
+        if consumer_config.get("tools"):
+            return None
+        model_name = consumer_config.get("model", DEFAULT_MODEL)
+        try:
+            # Both calls are blocking API requests
+            token_count = await asyncio.to_thread(
+                get_model(model_name, self.generation_config).count_tokens, text
+            )
+            if token_count.total_tokens < CONTEXT_CACHE_MIN_TOKENS:
+                return None
+            cache = await asyncio.to_thread(
+                genai.caching.CachedContent.create,
+                model=model_name,
+                display_name=f"task-{self.task_id}",
+                contents=[text],
+                ttl=CONTEXT_CACHE_TTL
+            )
+            self.logger.info(f"Created context cache {cache.name} for {model_name}")
+            return cache.name
+        except Exception as e:
+            self.logger.warning(f"Could not create context cache: {e}")
+            return None
+
+    def _serialize_context(self, context: Dict[str, Any]) -> str:
+        """Compact JSON for prompt context; pretty-printing only adds billed whitespace tokens."""
+        whitelist = self.config.get("context_whitelist")
+        if whitelist:
+            context = {k: v for k, v in context.items() if k in whitelist}
+        return orjson.dumps(context, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    async def _stream_text(self, chat, message: Any, max_chars: int, **submit_kwargs) -> str:
+        """Streams a response and stops reading once ``max_chars`` have been received."""
+        response = await llm_batcher.submit(chat, message, stream=True, **submit_kwargs)
+        chunks = []
+        received = 0
+        async for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. the final finish_reason chunk)
+                continue
+            chunks.append(text)
+            received += len(text)
+            if received >= max_chars:
+                break
+        return "".join(chunks)[:max_chars]
+
+    async def call_llm_batch(
+        self,
+        prompts: List[str],
+        use_batch: Optional[bool] = None,
+        max_output_tokens: Optional[int] = None
+    ) -> List[str]:
+        """
+        Runs independent prompts through Gemini Batch Mode.
+
+        Only used when ``use_batch`` is set, or it is omitted and the agent config
+        sets ``async_ok``; otherwise, or if the batch job fails, the prompts are
+        sent as regular realtime calls. Results are returned in the same order as ``prompts``.
+        """
+        if not prompts:
+            return []
+
+        if use_batch is None:
+            use_batch = bool(self.config.get("async_ok"))
+
+        if use_batch:
+            try:
+                return await self._run_batch_job(prompts, max_output_tokens)
+            except Exception as e:
+                self.logger.warning(f"Batch job failed, falling back to realtime calls: {e}")
+
+        return list(await asyncio.gather(*(
+            self.call_llm(p, max_output_tokens=max_output_tokens) for p in prompts
+        )))
+
+    async def _run_batch_job(self, prompts: List[str], max_output_tokens: Optional[int] = None) -> List[str]:
+        """Uploads prompts as a JSONL batch job and polls until it completes."""
+        # Batch Mode is only exposed by the newer google-genai SDK
+        from google import genai as genai_sdk
+
+        client = genai_sdk.Client(api_key=settings.GOOGLE_API_KEY)
+        system_prompt = self._get_system_prompt()
+        keys = [f"{self.task_id}-{i}" for i in range(len(prompts))]
+        generation_config = self.generation_config
+        if max_output_tokens is not None:
+            generation_config = {**generation_config, "max_output_tokens": max_output_tokens}
+
+        lines = [
+            json.dumps({
+                "key": key,
+                "request": {
+                    "contents": [{
+                        "role": "user",
+                        "parts": [{"text": system_prompt}, {"text": f"USER REQUEST: {prompt}"}]
+                    }],
+                    "generation_config": generation_config
+                }
+            })
+            for key, prompt in zip(keys, prompts)
+        ]
+
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False, encoding="utf-8") as f:
+            f.write("\n".join(lines))
+            jsonl_path = f.name
+
+        try:
+            uploaded = await asyncio.to_thread(
+                client.files.upload,
+                file=jsonl_path,
+                config={"display_name": f"task-{self.task_id}", "mime_type": "jsonl"}
+            )
+        finally:
+            os.unlink(jsonl_path)
+
+        job = await asyncio.to_thread(
+            client.batches.create,
+            model=self.model_name,
+            src=uploaded.name,
+            config={"display_name": f"task-{self.task_id}"}
+        )
+        self.logger.info(f"Submitted batch job {job.name} with {len(prompts)} prompts")
+
+        deadline = time.monotonic() + settings.LLM_BATCH_MAX_WAIT
+        try:
+            while job.state.name not in BATCH_TERMINAL_STATES:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Batch job {job.name} did not finish in {settings.LLM_BATCH_MAX_WAIT}s")
+                await asyncio.sleep(min(BATCH_POLL_INTERVAL_SECONDS, max(deadline - time.monotonic(), 0)))
+                job = await asyncio.to_thread(client.batches.get, name=job.name)
+        finally:
+            # Timed out, cancelled or hit by a Celery time limit: a job left running is still billed.
+            # Called directly so it also runs while the event loop is being torn down.
+            if job.state.name not in BATCH_TERMINAL_STATES:
+                try:
+                    client.batches.cancel(name=job.name)
+                    self.logger.warning(f"Cancelled batch job {job.name}")
+                except Exception as e:
+                    self.logger.error(f"Could not cancel batch job {job.name}: {e}")
+
+        if job.state.name != "JOB_STATE_SUCCEEDED":
+            raise RuntimeError(f"Batch job {job.name} ended in state {job.state.name}")
+
+        raw = await asyncio.to_thread(client.files.download, file=job.dest.file_name)
+
+        results = {}
+        for line in raw.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            candidates = item.get("response", {}).get("candidates") or [{}]
+            parts = candidates[0].get("content", {}).get("parts", [])
+            results[item.get("key")] = "".join(p.get("text", "") for p in parts)
+
+        # Any prompt the batch could not answer is retried in realtime
+        outputs = []
+        for key, prompt in zip(keys, prompts):
+            if results.get(key):
+                outputs.append(results[key])
+            else:
+                self.logger.warning(f"Batch job {job.name} returned no result for {key}; retrying in realtime")
+                outputs.append(await self.call_llm(prompt, max_output_tokens=max_output_tokens))
+        return outputs
+
     @abstractmethod
     async def run(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Main execution logic for the agent."""
@@ -1,12 +1,23 @@
+import asyncio
 import logging
+import re
 import subprocess
 from typing import Dict, Any, Optional
 from app.agents.base_agent import BaseAgent
 from app.services.artifact_service import artifact_service
+from app.services.connector_service import connector_service
+from app.db.async_database import AsyncSessionLocal
+from app.services.repo_service import repo_service
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# e.g. "CONFLICT (content): Merge conflict in src/app.py"
+MERGE_CONFLICT_RE = re.compile(r"^CONFLICT \([^)]*\): Merge conflict in (.+)$", re.MULTILINE)
+
+# The changelog is posted to Slack, so it only needs a short budget
+CHANGELOG_MAX_OUTPUT_TOKENS = 256
+
 class PhoenixAgent(BaseAgent):
     """Agent responsible for release management and notifications."""
     
@@ -24,15 +35,11 @@ class PhoenixAgent(BaseAgent):
         
         if pr_number and connector_id:
             self.logger.info(f"PHOENIX: Checking status for PR #{pr_number}...")
-            from app.services.connector_service import connector_service
-            from app.db.database import SessionLocal
-            
-            db = SessionLocal()
-            try:
-                # Retrieve repo info from context or config
-                repo_owner = context.get("repo_owner") or "owner"
-                repo_name = context.get("repo_name") or "repo"
-                
+            # Retrieve repo info from context or config
+            repo_owner = context.get("repo_owner") or "owner"
+            repo_name = context.get("repo_name") or "repo"
+
+            async with AsyncSessionLocal() as db:
                 pr_data = await connector_service.get_github_mr(
                     connector_id=connector_id,
                     repo_owner=repo_owner,
@@ -40,49 +47,57 @@ class PhoenixAgent(BaseAgent):
                     pull_number=pr_number,
                     db=db
                 )
-                
-                if not pr_data.get("merged", False):
-                    self.logger.info(f"PHOENIX: PR #{pr_number} is not merged yet. Waiting for webhook or manual approval.")
-                    return {
-                        "status": "waiting",
-                        "message": f"Awaiting merge of Pull Request #{pr_number}.",
-                        "pr_url": pr_data.get("html_url"),
-                        "action_required": "merge_pr"
-                    }
-            finally:
-                db.close()
+
+            if not pr_data.get("merged", False):
+                self.logger.info(f"PHOENIX: PR #{pr_number} is not merged yet. Waiting for webhook or manual approval.")
+                return {
+                    "status": "waiting",
+                    "message": f"Awaiting merge of Pull Request #{pr_number}.",
+                    "pr_url": pr_data.get("html_url"),
+                    "action_required": "merge_pr"
+                }
 
         if not repo_path or not current_branch:
             # If no PR was created, we might be doing a local-only release (fallback)
             self.logger.warning("PHOENIX: No repo path or branch found. Falling back to notification only.")
             # ... existing local merge logic ...
 
-        # 1. Merge to release branch (local git)
-        merge_result = self._merge_to_release(repo_path, current_branch, release_branch)
+        # 1. Start the changelog while the merge runs; it doesn't depend on the merge result
+        prompt = f"""
+Generate a concise release changelog for the following changes:
+TASK ID: {self.task_id}
+CHANGES SUMMARY: {context.get('scribe_results', {}).get('message', 'New feature implementation')}
+
+Format the output for a Slack message.
+"""
+        # Changelog is not latency critical, so it may go through Batch Mode
+        changelog_task = asyncio.create_task(
+            self.call_llm_batch([prompt], max_output_tokens=CHANGELOG_MAX_OUTPUT_TOKENS)
+        )
+        
+        # 2. Merge to release branch (local git)
+        try:
+            merge_result = await self._merge_to_release(repo_path, current_branch, release_branch)
+        except BaseException:
+            changelog_task.cancel()
+            raise
         
         if merge_result.get("conflicts"):
-            # Conflict detected — return conflict status for user resolution
+            # Conflict detected — no release, so the changelog is not needed
+            changelog_task.cancel()
             return {
                 "status": "conflict",
                 "message": f"Merge conflicts detected: {', '.join(merge_result['conflicts'])}",
                 "conflicts": merge_result["conflicts"],
-                "artifact_paths": [changelog_path] if 'changelog_path' in dir() else [],
+                "artifact_paths": [],
                 "summary": "Merge conflicts block release. Manual resolution required.",
                 "action_required": "resolve_conflicts"
             }
         
         merge_success = merge_result.get("success", False)
         
-        # 2. Generate Changelog
-        prompt = f"""
-Generate a concise release changelog for the following changes:
-TASK ID: {self.task_id}
-CHANGES SUMMARY: {context.get('scribe_results', {}).get('message', 'New feature implementation')}
-
-Format the output for a Slack message.
-"""
-        changelog = await self.call_llm(prompt)
-        changelog_path = artifact_service.save_artifact(self.task_id, "changelog", {"changelog": changelog})
+        changelog = (await changelog_task)[0]
+        changelog_path = await artifact_service.save_artifact_async(self.task_id, "changelog", {"changelog": changelog})
         
         # 3. Send Notifications
         notification_sent = False
@@ -90,19 +105,13 @@ Format the output for a Slack message.
         
         if connector_id:
             try:
-                from app.services.connector_service import connector_service
-                from app.db.database import SessionLocal
-                
-                db = SessionLocal()
-                try:
+                async with AsyncSessionLocal() as db:
                     await connector_service.send_slack_notification(
                         connector_id=connector_id,
                         message=f"🚀 *New Release Deployed!*\nTask: {self.task_id}\n\n{changelog}",
                         db=db
                     )
-                    notification_sent = True
-                finally:
-                    db.close()
+                notification_sent = True
             except Exception as e:
                 self.logger.error(f"PHOENIX: Failed to send Slack notification: {e}")
 
@@ -116,45 +125,55 @@ Format the output for a Slack message.
             "notification_sent": notification_sent
         }
 
-    def _merge_to_release(self, repo_path: str, source: str, target: str) -> dict:
+    async def _merge_to_release(self, repo_path: str, source: str, target: str) -> dict:
         """Merges source branch into target release branch. Returns merge result dict."""
         try:
-            # Checkout target
-            subprocess.run(["git", "checkout", target], cwd=repo_path, check=True)
-            # Pull latest
-            subprocess.run(["git", "pull", "origin", target], cwd=repo_path)
+            # Equivalent to checkout + pull; these share the working tree and refs, so they
+            # run in order (the changelog request started by run() is what overlaps the fetch)
+            fetch_result = await repo_service.run_git(repo_path, "fetch", "origin", target, check=False)
+            await repo_service.run_git(repo_path, "checkout", target)
+            if fetch_result.returncode == 0:
+                ff_result = await repo_service.run_git(
+                    repo_path, "merge", "--ff-only", f"origin/{target}", check=False
+                )
+                if ff_result.returncode != 0:
+                    # Local release branch has diverged from origin; don't release on top of it
+                    self.logger.error(f"PHOENIX: Could not fast-forward {target} to origin/{target}: {ff_result.stderr}")
+                    return {"success": False, "conflicts": []}
+            else:
+                self.logger.warning(f"PHOENIX: Could not fetch origin/{target}, merging into the local branch: {fetch_result.stderr}")
             # Merge
-            result = subprocess.run(
-                ["git", "merge", source],
-                cwd=repo_path,
-                capture_output=True,
-                text=True
+            result = await repo_service.run_git(
+                repo_path, "-c", "advice.mergeConflict=false", "merge", "--no-edit", source, check=False
             )
             
             if result.returncode != 0:
-                # Check for merge conflicts
-                conflict_result = subprocess.run(
-                    ["git", "diff", "--name-only", "--diff-filter=U"],
-                    cwd=repo_path,
-                    capture_output=True,
-                    text=True
-                )
-                conflicting_files = [f.strip() for f in conflict_result.stdout.strip().split("\n") if f.strip()]
+                # Check for merge conflicts in the merge output itself
+                merge_output = f"{result.stdout}\n{result.stderr}"
+                conflicting_files = MERGE_CONFLICT_RE.findall(merge_output)
+                
+                if not conflicting_files and "CONFLICT" in merge_output:
+                    # Rename/delete conflicts don't name the file in a fixed format
+                    conflict_result = await repo_service.run_git(
+                        repo_path, "diff", "--name-only", "--diff-filter=U", "-z", check=False
+                    )
+                    # NUL-separated, so paths containing newlines or spaces survive intact
+                    conflicting_files = [f for f in conflict_result.stdout.split("\0") if f]
                 
                 if conflicting_files:
                     self.logger.warning(f"PHOENIX: Merge conflicts in: {conflicting_files}")
                     # Abort the merge to leave a clean state
-                    subprocess.run(["git", "merge", "--abort"], cwd=repo_path)
+                    await repo_service.run_git(repo_path, "merge", "--abort", check=False)
                     return {"success": False, "conflicts": conflicting_files}
                 else:
                     self.logger.error(f"PHOENIX: Merge failed (non-conflict): {result.stderr}")
                     return {"success": False, "conflicts": []}
             
             # Push
-            subprocess.run(["git", "push", "origin", target], cwd=repo_path)
+            await repo_service.run_git(repo_path, "push", "origin", target, check=False)
             return {"success": True, "conflicts": []}
             
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
             self.logger.error(f"PHOENIX: Merge failed: {e}")
             return {"success": False, "conflicts": []}
 
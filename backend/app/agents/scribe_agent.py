@@ -1,5 +1,10 @@
+import asyncio
 import logging
-from typing import Dict, Any, List
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
 from app.agents.base_agent import BaseAgent
 from app.services.artifact_service import artifact_service
 import docx
@@ -7,6 +12,90 @@ import io
 
 logger = logging.getLogger(__name__)
 
+# Default cap on concurrent document generations per run
+SCRIBE_MAX_CONCURRENCY = 4
+
+# Output budget per generated document
+DOC_MAX_OUTPUT_TOKENS = 2048
+
+# Largest output a single Gemini 2.0 Flash/Pro response can carry
+MODEL_MAX_OUTPUT_TOKENS = 8192
+
+DOC_PROMPT_TEMPLATE = """
+Generate a {doc_title} based on the following:
+REQUIREMENT: {requirement_text}
+PROJECT CONTEXT: {project_context}
+USER NOTES: {user_prompt}
+
+The output should be high-quality markdown.
+"""
+
+# DOCX rendering is CPU-bound pure Python, so it runs in worker processes
+DOCX_MAX_WORKERS = min(4, os.cpu_count() or 1)
+_DOCX_POOL: Optional[ProcessPoolExecutor] = None
+
+# Batch mode only pays off (and is only used) for at least this many documents
+BATCH_MODE_MIN_DOCUMENTS = 3
+
+# Combined prompts larger than this fall back to one request per document
+MULTI_DOC_PROMPT_BUDGET_CHARS = 24000
+
+MULTI_DOC_PROMPT_TEMPLATE = """
+Generate each of the following documents based on the same inputs:
+{doc_list}
+
+REQUIREMENT: {requirement_text}
+PROJECT CONTEXT: {project_context}
+USER NOTES: {user_prompt}
+
+Each document should be high-quality markdown. Emit every document between its own
+delimiter lines, exactly as shown, with nothing outside the delimiters:
+=== BEGIN <DOCUMENT> ===
+...
+=== END <DOCUMENT> ===
+"""
+
+SECTION_RE = re.compile(r"^=== BEGIN (\w+) ===[ \t]*\n(.*?)^=== END \1 ===", re.MULTILINE | re.DOTALL)
+
+
+def render_docx(doc_type: str, content: str) -> bytes:
+    """Converts generated markdown into a DOCX document. Module-level so it can run in a worker process."""
+    doc = docx.Document()
+    doc.add_heading(doc_type.replace('_', ' ').upper(), 0)
+
+    # Simple markdown parsing (headings and paragraphs)
+    for line in content.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('# '):
+            doc.add_heading(line[2:], 1)
+        elif line.startswith('## '):
+            doc.add_heading(line[3:], 2)
+        elif line.startswith('### '):
+            doc.add_heading(line[4:], 3)
+        elif line.startswith('- ') or line.startswith('* '):
+            doc.add_paragraph(line[2:], style='List Bullet')
+        else:
+            doc.add_paragraph(line)
+
+    bio = io.BytesIO()
+    doc.save(bio)
+    bio.seek(0)
+    return bio.read()
+
+
+def _get_docx_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Returns the shared DOCX process pool, or None to fall back to the default
+    thread pool. Celery's prefork children are daemonic and can't spawn processes.
+    """
+    global _DOCX_POOL
+    if _DOCX_POOL is None and not multiprocessing.current_process().daemon:
+        _DOCX_POOL = ProcessPoolExecutor(max_workers=DOCX_MAX_WORKERS)
+    return _DOCX_POOL
+
+
 class ScribeAgent(BaseAgent):
     """Agent responsible for requirements analysis and document generation."""
     
@@ -23,54 +112,74 @@ class ScribeAgent(BaseAgent):
         results = {}
         generated_contents = {}
         
-        for doc_type in selected_docs:
-            prompt = f"""
-Generate a {doc_type.replace('_', ' ').upper()} based on the following:
-REQUIREMENT: {requirement_text}
-PROJECT CONTEXT: {project_context}
-USER NOTES: {user_prompt}
-
-The output should be high-quality markdown.
-"""
-            # Call LLM
-            content = await self.call_llm(prompt)
-            generated_contents[doc_type] = content
-            
-            # Save artifact
-            if output_format == "docx":
-                # Convert Markdown to DOCX
-                doc = docx.Document()
-                doc.add_heading(doc_type.replace('_', ' ').upper(), 0)
-
-                # Simple markdown parsing (headings and paragraphs)
-                for line in content.split('\n'):
-                    line = line.strip()
-                    if not line:
-                        continue
-                    if line.startswith('# '):
-                        doc.add_heading(line[2:], 1)
-                    elif line.startswith('## '):
-                        doc.add_heading(line[3:], 2)
-                    elif line.startswith('### '):
-                        doc.add_heading(line[4:], 3)
-                    elif line.startswith('- ') or line.startswith('* '):
-                        doc.add_paragraph(line[2:], style='List Bullet')
-                    else:
-                        doc.add_paragraph(line)
-
-                bio = io.BytesIO()
-                doc.save(bio)
-                bio.seek(0)
-                docx_bytes = bio.read()
-
-                filename = f"{doc_type}.docx"
-                path = artifact_service.save_artifact(self.task_id, doc_type, docx_bytes, filename=filename)
-                results[doc_type] = path
-                self.logger.info(f"SCRIBE: Generated {doc_type} (docx) and saved to {path}")
-            else:
-                path = artifact_service.save_artifact(self.task_id, doc_type, content)
-                results[doc_type] = path
-                self.logger.info(f"SCRIBE: Generated {doc_type} and saved to {path}")
+        prompts = {
+            doc_type: DOC_PROMPT_TEMPLATE.format(
+                doc_title=doc_type.replace('_', ' ').upper(),
+                requirement_text=requirement_text,
+                project_context=project_context,
+                user_prompt=user_prompt
+            )
+            for doc_type in selected_docs
+        }
+        
+        # Background runs can trade latency for Batch Mode's lower price
+        if scribe_config.get("mode") == "batch" and len(prompts) >= BATCH_MODE_MIN_DOCUMENTS:
+            self.logger.info(f"SCRIBE: Generating {len(prompts)} documents via Batch Mode")
+            contents = await self.call_llm_batch(
+                list(prompts.values()), use_batch=True, max_output_tokens=DOC_MAX_OUTPUT_TOKENS
+            )
+            generated_contents = dict(zip(prompts, contents))
+        
+        # Several documents share one preamble, so try a single combined request first
+        elif len(selected_docs) > 1:
+            combined_prompt = MULTI_DOC_PROMPT_TEMPLATE.format(
+                doc_list="\n".join(f"- {doc_type.upper()}" for doc_type in selected_docs),
+                requirement_text=requirement_text,
+                project_context=project_context,
+                user_prompt=user_prompt
+            )
+            if len(combined_prompt) <= MULTI_DOC_PROMPT_BUDGET_CHARS:
+                # Documents truncated by the cap are regenerated individually below
+                try:
+                    response = await self.call_llm(
+                        combined_prompt,
+                        max_output_tokens=min(DOC_MAX_OUTPUT_TOKENS * len(selected_docs), MODEL_MAX_OUTPUT_TOKENS)
+                    )
+                    generated_contents = self._split_sections(response, selected_docs)
+                except Exception as e:
+                    self.logger.warning(f"SCRIBE: Combined request failed ({e}), generating documents separately")
+        
+        # Anything the combined response didn't deliver is generated on its own
+        remaining = {doc_type: prompt for doc_type, prompt in prompts.items() if doc_type not in generated_contents}
+        if remaining:
+            if generated_contents:
+                self.logger.warning(f"SCRIBE: Combined response missing {', '.join(remaining)}, generating separately")
+            generated_contents.update(await self._generate_individually(
+                remaining, scribe_config.get("max_concurrency", SCRIBE_MAX_CONCURRENCY)
+            ))
+        generated_contents = {doc_type: generated_contents[doc_type] for doc_type in selected_docs}
+        
+        # Save artifacts (the writes run concurrently)
+        saves = []
+        if output_format == "docx":
+            # Convert Markdown to DOCX, one document per worker
+            loop = asyncio.get_running_loop()
+            pool = _get_docx_pool()
+            rendered = await asyncio.gather(*(
+                loop.run_in_executor(pool, render_docx, doc_type, content)
+                for doc_type, content in generated_contents.items()
+            ))
+            for doc_type, docx_bytes in zip(generated_contents, rendered):
+                saves.append(artifact_service.save_artifact_async(
+                    self.task_id, doc_type, docx_bytes, filename=f"{doc_type}.docx"
+                ))
+        else:
+            for doc_type, content in generated_contents.items():
+                saves.append(artifact_service.save_artifact_async(self.task_id, doc_type, content))
+        
+        for doc_type, path in zip(generated_contents, await asyncio.gather(*saves)):
+            results[doc_type] = path
+            self.logger.info(f"SCRIBE: Generated {doc_type} ({output_format}) and saved to {path}")
 
         # Validate outputs against guardrails
         for doc_type, content_text in generated_contents.items():
@@ -86,3 +195,32 @@ The output should be high-quality markdown.
             "artifact_paths": artifact_paths,
             "summary": f"Generated {', '.join(selected_docs)} documents"
         }
+
+    async def _generate_individually(self, prompts: Dict[str, str], max_concurrency: int) -> Dict[str, str]:
+        """Generates one document per LLM call, concurrently (bounded to respect provider RPM)."""
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def generate(prompt: str) -> str:
+            async with semaphore:
+                return await self.call_llm(prompt, max_output_tokens=DOC_MAX_OUTPUT_TOKENS)
+        
+        contents = await asyncio.gather(
+            *(generate(prompt) for prompt in prompts.values()),
+            return_exceptions=True
+        )
+        generated = {}
+        for doc_type, content in zip(prompts, contents):
+            if isinstance(content, BaseException):
+                raise content
+            generated[doc_type] = content
+        return generated
+
+    def _split_sections(self, response: str, selected_docs: List[str]) -> Dict[str, str]:
+        """Extracts each document from a combined response using its BEGIN/END delimiters."""
+        wanted = {doc_type.upper(): doc_type for doc_type in selected_docs}
+        sections = {}
+        for match in SECTION_RE.finditer(response):
+            doc_type = wanted.get(match.group(1))
+            if doc_type and match.group(2).strip():
+                sections[doc_type] = match.group(2).strip()
+        return sections
@@ -1,12 +1,26 @@
+import hashlib
 import logging
 import subprocess
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 from app.agents.base_agent import BaseAgent
 from app.services.artifact_service import artifact_service
+from app.services.connector_service import connector_service
+from app.db.async_database import AsyncSessionLocal
+from app.services.git_diff import write_diff
+from app.services.cache_service import cache_service
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Bytes of the diff sent to the LLM; the full diff only goes to the patch artifact
+DIFF_LLM_CAP = 10000
+
+# A verdict plus fix instructions; anything longer is wasted spend
+REVIEW_MAX_OUTPUT_TOKENS = 512
+
+# Reviews are reused for identical diffs (and notes) across tasks and reworks
+REVIEW_CACHE_TTL_SECONDS = 86400
+
 class SentinelAgent(BaseAgent):
     """Agent responsible for code review and MR creation."""
     
@@ -20,24 +34,48 @@ class SentinelAgent(BaseAgent):
             raise ValueError("SENTINEL: Missing repo path or branch name in context")
 
         # 1. Generate local diff patch
-        diff_content = self._get_diff(repo_path, branch_name)
-        patch_path = artifact_service.save_artifact(self.task_id, "patch", diff_content)
+        diff_content, diff_digest, patch_path = await self._write_diff(repo_path, branch_name)
+        
+        if diff_digest and not diff_content.strip():
+            self.logger.info("SENTINEL: Diff is empty, nothing to review.")
+            return {
+                "status": "success",
+                "message": "No changes to review.",
+                "patch_path": patch_path,
+                "mr_url": None,
+                "pull_number": None,
+                "artifact_paths": [patch_path],
+                "summary": "Empty diff. Review skipped.",
+                "action": "merging"
+            }
         
         # 2. Review the diff
+        user_notes = context.get("sentinel", {}).get("user_prompt", "")
         prompt = f"""
 Review the following code changes for security, quality, and adherence to requirements:
 DIFF:
-{diff_content[:10000]} # Cap for LLM context
+{diff_content}
 
-USER NOTES: {context.get("sentinel", {}).get("user_prompt", "")}
+USER NOTES: {user_notes}
 
 Decide if the changes are APPROVED or REJECTED.
 If REJECTED, provide specific fix instructions for the FORGE agent.
 """
-        review_result = await self.call_llm(prompt)
+        cache_key = None
+        if diff_digest:
+            notes_digest = hashlib.sha256(user_notes.encode()).hexdigest()
+            cache_key = f"sentinel:review:{self.model_name}:{diff_digest}:{notes_digest}"
+        
+        review_result = await cache_service.get(cache_key) if cache_key else None
+        if review_result is not None:
+            self.logger.info("SENTINEL: Diff already reviewed, reusing the cached review.")
+        else:
+            review_result = await self.call_llm(prompt, max_output_tokens=REVIEW_MAX_OUTPUT_TOKENS)
+            if cache_key:
+                await cache_service.set(cache_key, review_result, ttl=REVIEW_CACHE_TTL_SECONDS)
         
         # 3. Persist review
-        review_path = artifact_service.save_artifact(self.task_id, "review", {"review": review_result})
+        review_path = await artifact_service.save_artifact_async(self.task_id, "review", {"review": review_result})
         
         is_approved = "APPROVED" in review_result.upper()
         
@@ -49,15 +87,11 @@ If REJECTED, provide specific fix instructions for the FORGE agent.
             
             if connector_id:
                 try:
-                    from app.services.connector_service import connector_service
-                    from app.db.database import SessionLocal
-                    
-                    db = SessionLocal()
-                    try:
-                        # Extract owner/repo from repo_url if possible, or use config
-                        repo_owner = context.get("scribe", {}).get("repo_owner", "owner")
-                        repo_name = context.get("scribe", {}).get("repo_name", "repo")
-                        
+                    # Extract owner/repo from repo_url if possible, or use config
+                    repo_owner = context.get("scribe", {}).get("repo_owner", "owner")
+                    repo_name = context.get("scribe", {}).get("repo_name", "repo")
+
+                    async with AsyncSessionLocal() as db:
                         mr_data = await connector_service.create_github_mr(
                             connector_id=connector_id,
                             repo_owner=repo_owner,
@@ -68,9 +102,7 @@ If REJECTED, provide specific fix instructions for the FORGE agent.
                             body=review_result,
                             db=db
                         )
-                        mr_url = mr_data.get("html_url")
-                    finally:
-                        db.close()
+                    mr_url = mr_data.get("html_url")
                 except Exception as e:
                     self.logger.error(f"SENTINEL: Failed to create GitHub MR: {e}")
             
@@ -98,17 +130,17 @@ If REJECTED, provide specific fix instructions for the FORGE agent.
                 "action": "reworking"
             }
 
-    def _get_diff(self, repo_path: str, branch_name: str, base_branch: str = "main") -> str:
-        """Generates a diff between the current branch and the base branch."""
+    async def _write_diff(self, repo_path: str, branch_name: str, base_branch: str = "main") -> Tuple[str, Optional[str], str]:
+        """
+        Writes the diff between the base branch and the current branch to the
+        patch artifact. Returns the LLM-sized head of the diff, the sha256 of
+        the full diff (None if it couldn't be generated) and the patch path.
+        """
+        patch_file = artifact_service.get_artifact_path(self.task_id, "patch")
         try:
-            result = subprocess.run(
-                ["git", "diff", base_branch, branch_name],
-                cwd=repo_path,
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            return result.stdout
-        except subprocess.CalledProcessError as e:
+            leading, digest = await write_diff(repo_path, base_branch, branch_name, patch_file, DIFF_LLM_CAP)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
             self.logger.error(f"Failed to generate diff: {e}")
-            return f"Error generating diff: {e}"
+            error = f"Error generating diff: {e}"
+            return error, None, await artifact_service.save_artifact_async(self.task_id, "patch", error)
+        return leading.decode("utf-8", errors="replace"), digest, artifact_service.get_relative_path(patch_file)
@@ -6,6 +6,7 @@ Manage assignments of connectors and webhooks to specific agents.
 
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
@@ -17,6 +18,16 @@ from app.schemas.schemas import ConnectorResponse, WebhookResponse, AgentConnect
 
 router = APIRouter()
 
+_STAGES = {s.value: s for s in AgentStage}
+
+
+def get_stage(agent_stage: str) -> AgentStage:
+    """Resolves the ``agent_stage`` path parameter, rejecting unknown stages."""
+    stage = _STAGES.get(agent_stage)
+    if stage is None:
+        raise HTTPException(status_code=400, detail="Invalid agent stage")
+    return stage
+
 
 class AssignConnectorRequest(BaseModel):
     connector_id: int
@@ -26,76 +37,72 @@ class AssignWebhookRequest(BaseModel):
     webhook_id: int
 
 
+def _activate_mapping(db: Session, stage: AgentStage, **target: int) -> AgentConnectorMappingResponse:
+    """
+    Re-activates the stage's mapping to ``target`` (connector_id or webhook_id),
+    creating it if missing. Each path is a single UPDATE/INSERT ... RETURNING.
+    """
+    (column, target_id), = target.items()
+    mapping = db.execute(
+        update(AgentConnectorMapping)
+        .where(
+            AgentConnectorMapping.agent_stage == stage,
+            getattr(AgentConnectorMapping, column) == target_id
+        )
+        .values(is_active=True)
+        .returning(AgentConnectorMapping)
+        .execution_options(synchronize_session=False)
+    ).scalars().first()
+    
+    if mapping is None:
+        mapping = db.execute(
+            insert(AgentConnectorMapping)
+            .values(agent_stage=stage, is_active=True, **target)
+            .returning(AgentConnectorMapping)
+        ).scalar_one()
+    
+    # Serialize before commit, which would expire the row and force a re-SELECT
+    response = AgentConnectorMappingResponse.model_validate(mapping)
+    db.commit()
+    return response
+
+
 # --- Connectors ---
 
 @router.get("/{agent_stage}/connectors", response_model=List[ConnectorResponse])
-async def get_agent_connectors(agent_stage: str, db: Session = Depends(get_db)):
+async def get_agent_connectors(stage: AgentStage = Depends(get_stage), db: Session = Depends(get_db)):
     """Get all connectors assigned to an agent."""
-    try:
-        stage = AgentStage(agent_stage)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid agent stage")
-        
-    mappings = db.query(AgentConnectorMapping).filter(
+    # Join instead of walking m.connector, which lazy-loads one row per mapping
+    return db.query(Connector).join(
+        AgentConnectorMapping, AgentConnectorMapping.connector_id == Connector.id
+    ).filter(
         AgentConnectorMapping.agent_stage == stage,
-        AgentConnectorMapping.connector_id.isnot(None),
         AgentConnectorMapping.is_active == True
-    ).all()
-    
-    return [m.connector for m in mappings if m.connector]
+    ).order_by(AgentConnectorMapping.id).all()
 
 
 @router.post("/{agent_stage}/connectors", response_model=AgentConnectorMappingResponse)
 async def assign_connector(
-    agent_stage: str, 
-    body: AssignConnectorRequest, 
+    body: AssignConnectorRequest,
+    stage: AgentStage = Depends(get_stage),
     db: Session = Depends(get_db)
 ):
     """Assign a connector to an agent."""
-    try:
-        stage = AgentStage(agent_stage)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid agent stage")
-        
     # Check if connector exists
     connector = db.query(Connector).filter(Connector.id == body.connector_id).first()
     if not connector:
         raise HTTPException(status_code=404, detail="Connector not found")
         
-    # Check existing mapping
-    existing = db.query(AgentConnectorMapping).filter(
-        AgentConnectorMapping.agent_stage == stage,
-        AgentConnectorMapping.connector_id == body.connector_id
-    ).first()
-    
-    if existing:
-        existing.is_active = True
-        db.commit()
-        db.refresh(existing)
-        return existing
-        
-    mapping = AgentConnectorMapping(
-        agent_stage=stage,
-        connector_id=body.connector_id
-    )
-    db.add(mapping)
-    db.commit()
-    db.refresh(mapping)
-    return mapping
+    return _activate_mapping(db, stage, connector_id=body.connector_id)
 
 
 @router.delete("/{agent_stage}/connectors/{connector_id}", status_code=204)
 async def remove_connector(
-    agent_stage: str, 
-    connector_id: int, 
+    connector_id: int,
+    stage: AgentStage = Depends(get_stage),
     db: Session = Depends(get_db)
 ):
     """Remove a connector assignment from an agent."""
-    try:
-        stage = AgentStage(agent_stage)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid agent stage")
-        
     mapping = db.query(AgentConnectorMapping).filter(
         AgentConnectorMapping.agent_stage == stage,
         AgentConnectorMapping.connector_id == connector_id
@@ -110,71 +117,37 @@ async def remove_connector(
 # --- Webhooks ---
 
 @router.get("/{agent_stage}/webhooks", response_model=List[WebhookResponse])
-async def get_agent_webhooks(agent_stage: str, db: Session = Depends(get_db)):
+async def get_agent_webhooks(stage: AgentStage = Depends(get_stage), db: Session = Depends(get_db)):
     """Get all webhooks assigned to an agent."""
-    try:
-        stage = AgentStage(agent_stage)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid agent stage")
-        
-    mappings = db.query(AgentConnectorMapping).filter(
+    return db.query(Webhook).join(
+        AgentConnectorMapping, AgentConnectorMapping.webhook_id == Webhook.id
+    ).filter(
         AgentConnectorMapping.agent_stage == stage,
-        AgentConnectorMapping.webhook_id.isnot(None),
         AgentConnectorMapping.is_active == True
-    ).all()
-    
-    return [m.webhook for m in mappings if m.webhook]
+    ).order_by(AgentConnectorMapping.id).all()
 
 
 @router.post("/{agent_stage}/webhooks", response_model=AgentConnectorMappingResponse)
 async def assign_webhook(
-    agent_stage: str, 
-    body: AssignWebhookRequest, 
+    body: AssignWebhookRequest,
+    stage: AgentStage = Depends(get_stage),
     db: Session = Depends(get_db)
 ):
     """Assign a webhook to an agent."""
-    try:
-        stage = AgentStage(agent_stage)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid agent stage")
-        
     webhook = db.query(Webhook).filter(Webhook.id == body.webhook_id).first()
     if not webhook:
         raise HTTPException(status_code=404, detail="Webhook not found")
         
-    existing = db.query(AgentConnectorMapping).filter(
-        AgentConnectorMapping.agent_stage == stage,
-        AgentConnectorMapping.webhook_id == body.webhook_id
-    ).first()
-    
-    if existing:
-        existing.is_active = True
-        db.commit()
-        db.refresh(existing)
-        return existing
-        
-    mapping = AgentConnectorMapping(
-        agent_stage=stage,
-        webhook_id=body.webhook_id
-    )
-    db.add(mapping)
-    db.commit()
-    db.refresh(mapping)
-    return mapping
+    return _activate_mapping(db, stage, webhook_id=body.webhook_id)
 
 
 @router.delete("/{agent_stage}/webhooks/{webhook_id}", status_code=204)
 async def remove_webhook(
-    agent_stage: str, 
-    webhook_id: int, 
+    webhook_id: int,
+    stage: AgentStage = Depends(get_stage),
     db: Session = Depends(get_db)
 ):
     """Remove a webhook assignment from an agent."""
-    try:
-        stage = AgentStage(agent_stage)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid agent stage")
-        
     mapping = db.query(AgentConnectorMapping).filter(
         AgentConnectorMapping.agent_stage == stage,
         AgentConnectorMapping.webhook_id == webhook_id
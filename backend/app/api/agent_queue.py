@@ -4,9 +4,9 @@ Agent Queue API
 Endpoints for viewing and managing per-agent priority queues.
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 from typing import Optional, List, Any, Dict
 from datetime import datetime
 
@@ -17,6 +17,8 @@ from app.services.agent_queue_service import agent_queue_service
 
 router = APIRouter()
 
+_STAGES = {s.value: s for s in AgentStage}
+
 
 # ── Schemas ──────────────────────────────────────────────
 
@@ -37,6 +39,11 @@ class QueueItemResponse(BaseModel):
         from_attributes = True
 
 
+# Validates and serializes a whole queue page in pydantic-core, without
+# going through the generic per-object JSON encoder
+QUEUE_ITEMS_ADAPTER = TypeAdapter(List[QueueItemResponse])
+
+
 class SetPriorityRequest(BaseModel):
     priority: int = Field(ge=1, le=10, description="New priority (1-10)")
     reason: str = Field(default="user_set", description="Reason for change")
@@ -67,9 +74,8 @@ async def get_agent_queue(
     db: Session = Depends(get_db)
 ):
     """Get all items in a specific agent's queue, ordered by priority."""
-    try:
-        stage = AgentStage(agent_stage)
-    except ValueError:
+    stage = _STAGES.get(agent_stage)
+    if stage is None:
         raise HTTPException(
             status_code=400,
             detail=f"Invalid agent stage: {agent_stage}. "
@@ -77,7 +83,8 @@ async def get_agent_queue(
         )
 
     items = agent_queue_service.get_queue(db, stage, include_processing)
-    return items
+    validated = QUEUE_ITEMS_ADAPTER.validate_python(items, from_attributes=True)
+    return Response(content=QUEUE_ITEMS_ADAPTER.dump_json(validated), media_type="application/json")
 
 
 @router.patch("/items/{item_id}/priority", response_model=QueueItemResponse)
@@ -4,11 +4,15 @@ Approval API Routes
 Endpoints for managing human-in-the-loop approval workflows.
 """
 
-from typing import List, Optional
+import asyncio
+from typing import Callable, List, Optional
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, raiseload, selectinload
 
+from app.db.async_database import get_async_sessionmaker
 from app.db.database import get_db
 from app.models.approval import ApprovalRequest, ApprovalAction, ApprovalCheckpoint, ApprovalStatus
 from app.schemas.schemas import (
@@ -20,9 +24,15 @@ from app.schemas.schemas import (
     ApprovalStatusEnum
 )
 from app.services.approval_service import approval_service
+from app.services.cache_service import cache_service, CACHE_TTL_SHORT
 
 router = APIRouter()
 
+CACHE_NAMESPACE = "approvals"
+
+# Actions are serialized with every request; anything else touched lazily should fail loudly
+APPROVAL_LOAD_OPTIONS = (selectinload(ApprovalRequest.actions), raiseload("*"))
+
 
 @router.get("/pending", response_model=List[ApprovalRequestResponse])
 async def list_pending_approvals(
@@ -41,51 +51,62 @@ async def list_pending_approvals(
     return approvals
 
 
+async def _fetch(new_session: Callable[[], AsyncSession], stmt):
+    """Runs one query in its own async session so several can run concurrently."""
+    async with new_session() as session:
+        return (await session.execute(stmt)).all()
+
+
 @router.get("/dashboard", response_model=ApprovalDashboardResponse)
 async def get_approval_dashboard(
     limit: int = Query(default=10, ge=1, le=100),
-    db: Session = Depends(get_db)
+    new_session: Callable[[], AsyncSession] = Depends(get_async_sessionmaker)
 ):
     """
     Get approval dashboard with stats and recent activity.
     
     Returns pending approvals and recent actions.
     """
-    # Get counts by status
-    pending_count = db.query(ApprovalRequest).filter(
-        ApprovalRequest.status == ApprovalStatus.PENDING
-    ).count()
-    
-    approved_count = db.query(ApprovalRequest).filter(
-        ApprovalRequest.status == ApprovalStatus.APPROVED
-    ).count()
-    
-    rejected_count = db.query(ApprovalRequest).filter(
-        ApprovalRequest.status == ApprovalStatus.REJECTED
-    ).count()
-    
-    timeout_count = db.query(ApprovalRequest).filter(
-        ApprovalRequest.status == ApprovalStatus.TIMEOUT
-    ).count()
-    
-    # Get pending requests
-    pending_requests = db.query(ApprovalRequest).filter(
-        ApprovalRequest.status == ApprovalStatus.PENDING
-    ).order_by(ApprovalRequest.created_at.desc()).limit(limit).all()
+    return await cache_service.cached_response(
+        CACHE_NAMESPACE, CACHE_TTL_SHORT, lambda: _build_dashboard(new_session, limit), limit
+    )
+
+
+async def _build_dashboard(new_session: Callable[[], AsyncSession], limit: int) -> bytes:
+    # The three queries are independent, so they overlap instead of waiting on each other
+    count_rows, pending_rows, action_rows = await asyncio.gather(
+        _fetch(
+            new_session,
+            select(ApprovalRequest.status, func.count(ApprovalRequest.id))
+            .group_by(ApprovalRequest.status)
+        ),
+        _fetch(
+            new_session,
+            select(ApprovalRequest)
+            .options(selectinload(ApprovalRequest.actions))
+            .where(ApprovalRequest.status == ApprovalStatus.PENDING)
+            .order_by(ApprovalRequest.created_at.desc())
+            .limit(limit)
+        ),
+        _fetch(
+            new_session,
+            select(ApprovalAction)
+            .order_by(ApprovalAction.created_at.desc())
+            .limit(limit)
+        )
+    )
     
-    # Get recent actions
-    recent_actions = db.query(ApprovalAction).order_by(
-        ApprovalAction.created_at.desc()
-    ).limit(limit).all()
+    counts = {status: 0 for status in ApprovalStatus}
+    counts.update(count_rows)
     
-    return {
-        "pending_count": pending_count,
-        "approved_count": approved_count,
-        "rejected_count": rejected_count,
-        "timeout_count": timeout_count,
-        "pending_requests": pending_requests,
-        "recent_actions": recent_actions
-    }
+    return ApprovalDashboardResponse.model_validate({
+        "pending_count": counts[ApprovalStatus.PENDING],
+        "approved_count": counts[ApprovalStatus.APPROVED],
+        "rejected_count": counts[ApprovalStatus.REJECTED],
+        "timeout_count": counts[ApprovalStatus.TIMEOUT],
+        "pending_requests": [row[0] for row in pending_rows],
+        "recent_actions": [row[0] for row in action_rows]
+    }, from_attributes=True).model_dump_json().encode()
 
 
 @router.get("/{approval_id}", response_model=ApprovalRequestResponse)
@@ -94,7 +115,7 @@ async def get_approval_request(
     db: Session = Depends(get_db)
 ):
     """Get specific approval request with artifacts and actions."""
-    approval = db.query(ApprovalRequest).filter(ApprovalRequest.id == approval_id).first()
+    approval = db.get(ApprovalRequest, approval_id, options=APPROVAL_LOAD_OPTIONS)
     if not approval:
         raise HTTPException(status_code=404, detail="Approval request not found")
     return approval
@@ -119,6 +140,7 @@ async def approve_request(
             comment=action_data.comment,
             feedback=action_data.feedback
         )
+        await cache_service.invalidate(CACHE_NAMESPACE)
         return action
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -149,6 +171,7 @@ async def reject_request(
             comment=action_data.comment,
             feedback=action_data.feedback
         )
+        await cache_service.invalidate(CACHE_NAMESPACE)
         return action
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -160,7 +183,7 @@ async def get_task_approvals(
     db: Session = Depends(get_db)
 ):
     """Get all approval requests for a specific task."""
-    approvals = db.query(ApprovalRequest).filter(
+    approvals = db.query(ApprovalRequest).options(*APPROVAL_LOAD_OPTIONS).filter(
         ApprovalRequest.task_id == task_id
     ).order_by(ApprovalRequest.created_at.desc()).all()
     
@@ -175,6 +198,8 @@ async def check_approval_timeouts(db: Session = Depends(get_db)):
     This endpoint can be called by a scheduled task or manually.
     """
     timed_out = approval_service.check_timeouts(db)
+    if timed_out:
+        await cache_service.invalidate(CACHE_NAMESPACE)
     
     return {
         "checked_at": datetime.utcnow(),
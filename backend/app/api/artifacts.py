@@ -9,6 +9,17 @@ import os
 
 router = APIRouter()
 
+# Resolved once rather than per download
+STORAGE_PATH = Path("./storage").resolve()
+
+# Artifacts at least this large are read in bigger chunks
+LARGE_ARTIFACT_BYTES = 8 * 1024 * 1024
+
+
+class LargeFileResponse(FileResponse):
+    """FileResponse that reads 1 MiB per chunk instead of 64 KiB."""
+    chunk_size = 1024 * 1024
+
 @router.get("/{task_id}")
 async def list_task_artifacts(task_id: str, db: Session = Depends(get_db)):
     """List all artifacts for a task."""
@@ -26,15 +37,17 @@ async def download_artifact(task_id: str, artifact_id: int, db: Session = Depend
     if not artifact:
         raise HTTPException(status_code=404, detail="Artifact not found")
     
-    # Check if file exists on disk
-    storage_path = Path("./storage")
-    file_path = storage_path / artifact.file_path
-    
-    if not file_path.exists():
+    file_path = os.fspath(STORAGE_PATH / artifact.file_path)
+    try:
+        # Stat once here; FileResponse would otherwise stat the file again
+        stat_result = os.stat(file_path)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"File not found on disk: {artifact.file_path}")
     
-    return FileResponse(
+    response_class = LargeFileResponse if stat_result.st_size >= LARGE_ARTIFACT_BYTES else FileResponse
+    return response_class(
         path=file_path,
         filename=os.path.basename(artifact.file_path),
-        media_type='application/octet-stream'
+        media_type='application/octet-stream',
+        stat_result=stat_result
     )
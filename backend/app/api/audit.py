@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 from app.db.database import get_db
 from app.models.models import AgentExecutionLog
 from app.services.audit_service import audit_service
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
 router = APIRouter()
 
@@ -18,15 +19,18 @@ class AgentStateResponse(BaseModel):
     provider: str
     temperature: float
     max_tokens: int
-    started_at: str
-    completed_at: str = None
+    started_at: datetime
+    completed_at: Optional[datetime] = None
     status: str
-    commit_hash: str = None
+    commit_hash: Optional[str] = None
     
     class Config:
         from_attributes = True
 
 
+AGENT_STATES_ADAPTER = TypeAdapter(List[AgentStateResponse])
+
+
 @router.get("/task/{task_id}", response_model=List[AgentStateResponse])
 async def get_task_audit_log(task_id: str, db: Session = Depends(get_db)):
     """
@@ -43,22 +47,7 @@ async def get_task_audit_log(task_id: str, db: Session = Depends(get_db)):
             detail=f"No agent executions found for task {task_id}"
         )
     
-    return [
-        AgentStateResponse(
-            id=exec.id,
-            task_id=exec.task_id,
-            agent_name=exec.agent_name,
-            model=exec.model,
-            provider=exec.provider,
-            temperature=exec.temperature,
-            max_tokens=exec.max_tokens,
-            started_at=exec.started_at.isoformat(),
-            completed_at=exec.completed_at.isoformat() if exec.completed_at else None,
-            status=exec.status,
-            commit_hash=exec.commit_hash
-        )
-        for exec in executions
-    ]
+    return AGENT_STATES_ADAPTER.validate_python(executions, from_attributes=True)
 
 
 @router.get("/state/{state_id}")
@@ -1,13 +1,19 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException
+from pydantic import TypeAdapter
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
 
 from app.db.database import get_db
 from app.models.models import Connector
 from app.schemas.schemas import ConnectorCreate, ConnectorResponse
+from app.services.cache_service import cache_service, CACHE_TTL_NORMAL
 
 router = APIRouter()
 
+CONNECTORS_ADAPTER = TypeAdapter(List[ConnectorResponse])
+CACHE_NAMESPACE = "connectors"
+
 @router.post("/", response_model=ConnectorResponse, status_code=201)
 async def create_connector(
     connector: ConnectorCreate,
@@ -23,17 +29,24 @@ async def create_connector(
     db.add(db_connector)
     db.commit()
     db.refresh(db_connector)
+    await cache_service.invalidate(CACHE_NAMESPACE)
     return db_connector
 
 @router.get("/", response_model=List[ConnectorResponse])
 async def list_connectors(db: Session = Depends(get_db)):
     """List all configured connectors."""
-    return db.query(Connector).all()
+    return await cache_service.cached_response(
+        CACHE_NAMESPACE, CACHE_TTL_NORMAL,
+        lambda: CONNECTORS_ADAPTER.dump_json(
+            CONNECTORS_ADAPTER.validate_python(db.query(Connector).all(), from_attributes=True)
+        ),
+        "all"
+    )
 
 @router.get("/{connector_id}", response_model=ConnectorResponse)
 async def get_connector(connector_id: int, db: Session = Depends(get_db)):
     """Get a specific connector by ID."""
-    connector = db.query(Connector).filter(Connector.id == connector_id).first()
+    connector = db.get(Connector, connector_id)
     if not connector:
         raise HTTPException(status_code=404, detail="Connector not found")
     return connector
@@ -45,7 +58,7 @@ async def update_connector(
     db: Session = Depends(get_db)
 ):
     """Update a connector configuration."""
-    db_connector = db.query(Connector).filter(Connector.id == connector_id).first()
+    db_connector = db.get(Connector, connector_id)
     if not db_connector:
         raise HTTPException(status_code=404, detail="Connector not found")
     
@@ -54,15 +67,16 @@ async def update_connector(
     
     db.commit()
     db.refresh(db_connector)
+    await cache_service.invalidate(CACHE_NAMESPACE)
     return db_connector
 
 @router.delete("/{connector_id}", status_code=204)
 async def delete_connector(connector_id: int, db: Session = Depends(get_db)):
     """Delete a connector."""
-    connector = db.query(Connector).filter(Connector.id == connector_id).first()
-    if not connector:
+    result = db.execute(delete(Connector).where(Connector.id == connector_id))
+    if result.rowcount == 0:
         raise HTTPException(status_code=404, detail="Connector not found")
     
-    db.delete(connector)
     db.commit()
+    await cache_service.invalidate(CACHE_NAMESPACE)
     return None
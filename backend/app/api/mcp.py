@@ -1,14 +1,18 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
 from app.db.database import get_db
 from app.models.models import MCPServer, Tool
 from app.schemas.schemas import MCPServerCreate, MCPServerResponse, ToolResponse
-from app.services.mcp_service import mcp_service
+from app.services.cache_service import cache_service, CACHE_TTL_NORMAL, CACHE_STALE_TTL
+from app.services.mcp_service import mcp_service, TOOLS_CACHE_NAMESPACE
 
 router = APIRouter()
 
+TOOLS_ADAPTER = TypeAdapter(List[ToolResponse])
+
 @router.post("/servers", response_model=MCPServerResponse, status_code=201)
 async def create_mcp_server(
     server: MCPServerCreate,
@@ -44,16 +48,27 @@ async def refresh_server_tools(server_id: int, db: Session = Depends(get_db)):
 @router.get("/tools", response_model=List[ToolResponse])
 async def list_all_tools(db: Session = Depends(get_db)):
     """List all available tools across all servers."""
-    return db.query(Tool).all()
+    return await cache_service.cached_response(
+        TOOLS_CACHE_NAMESPACE, CACHE_TTL_NORMAL,
+        lambda: TOOLS_ADAPTER.dump_json(
+            TOOLS_ADAPTER.validate_python(db.query(Tool).all(), from_attributes=True)
+        ),
+        "all",
+        stale_ttl=CACHE_STALE_TTL
+    )
 
 @router.delete("/servers/{server_id}", status_code=204)
 async def delete_mcp_server(server_id: int, db: Session = Depends(get_db)):
     """Delete an MCP server and its associated tools."""
-    server = db.query(MCPServer).filter(MCPServer.id == server_id).first()
+    server = db.get(MCPServer, server_id)
     if not server:
         raise HTTPException(status_code=404, detail="Server not found")
     
+    # Existing databases may predate the ON DELETE CASCADE on tools.mcp_server_id
+    # (and SQLite may not enforce it), so the tools are always deleted explicitly
     db.query(Tool).filter(Tool.mcp_server_id == server_id).delete()
     db.delete(server)
     db.commit()
+    mcp_service.bump_tool_version()
+    await cache_service.invalidate(TOOLS_CACHE_NAMESPACE)
     return None
@@ -6,17 +6,22 @@ CRUD operations for pipeline configurations.
 
 from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, Depends, HTTPException
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
-import uuid
+import asyncio
+import hashlib
+import json
 from datetime import datetime
 import os
-import httpx
 
 from app.db.database import get_db
 from app.models.models import Pipeline, TaskStatus, Task, Repository
 from app.schemas.schemas import (
     PipelineCreate, 
     PipelineResponse, 
+    PipelineListItem,
     PipelineAgentConfigs,
     TokenEstimate,
     PipelineRunRequest,
@@ -24,22 +29,119 @@ from app.schemas.schemas import (
 )
 from app.services.agent_config import get_agent_configs, calculate_token_estimate
 from app.services.repo_service import repo_service
+from app.services.http_client import http_client_service
+from app.services.cache_service import cache_service, CACHE_TTL_NORMAL
 
 router = APIRouter()
 
+PIPELINES_ADAPTER = TypeAdapter(List[PipelineListItem])
+CACHE_NAMESPACE = "pipelines"
+
+# Columns behind PipelineListItem; list rows are read as plain mappings, not ORM objects
+PIPELINE_LIST_COLUMNS = tuple(getattr(Pipeline, name) for name in PipelineListItem.model_fields)
+
+# Dialects with INSERT ... ON CONFLICT support
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# Pipeline stages in execution order
+AGENT_ORDER = ("scribe", "architect", "forge", "sentinel", "phoenix")
+AGENT_BITS = {agent: 1 << i for i, agent in enumerate(AGENT_ORDER)}
+
+# Default input config per agent, dumped once instead of per run
+AGENT_INPUT_DEFAULTS = {
+    "scribe": ScribeInput().model_dump(),
+    "architect": ArchitectInput().model_dump(),
+    "forge": ForgeInput().model_dump(),
+    "sentinel": SentinelInput().model_dump(),
+    "phoenix": PhoenixInput().model_dump(),
+}
+
+# Seconds a fetched README (and its ETag) is kept for revalidation
+README_CACHE_TTL = 86400
+
+# The README is fetched inside the /run request, so don't wait on a slow host for long
+README_FETCH_TIMEOUT = 10.0
+
 async def fetch_readme_content(url: str) -> str:
-    """Fetches README content from a URL."""
+    """
+    Fetches README content from a URL.
+    
+    The last copy is cached with its ETag and Last-Modified validators, so
+    repeat runs against an unchanged README get a 304 instead of downloading
+    it again.
+    """
+    cache_key = f"readme:{hashlib.sha256(url.encode()).hexdigest()}"
+    cached = await cache_service.get(cache_key)
+    cached = json.loads(cached) if cached else None
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, follow_redirects=True)
-            if response.status_code == 200:
-                return response.text
-            else:
-                print(f"Failed to fetch README from {url}: {response.status_code}")
-                return ""
+        response = await http_client_service.get().get(
+            url, follow_redirects=True, headers=headers, timeout=README_FETCH_TIMEOUT
+        )
+        if response.status_code == 304 and cached:
+            return cached["text"]
+        if response.status_code == 200:
+            await cache_service.set(
+                cache_key,
+                json.dumps({
+                    "etag": response.headers.get("etag"),
+                    "last_modified": response.headers.get("last-modified"),
+                    "text": response.text
+                }),
+                README_CACHE_TTL
+            )
+            return response.text
+        else:
+            print(f"Failed to fetch README from {url}: {response.status_code}")
+            return ""
     except Exception as e:
         print(f"Error fetching README from {url}: {e}")
-        return ""
+        return cached["text"] if cached else ""
+
+def _agent_input(agent: str, **values) -> Dict[str, Any]:
+    """
+    Agent input dict built from the precomputed defaults. The values come from
+    the already validated run request, so no per-agent model is instantiated.
+    """
+    config = {
+        key: list(value) if isinstance(value, list) else value
+        for key, value in AGENT_INPUT_DEFAULTS[agent].items()
+    }
+    config.update(values)
+    return config
+
+
+def _upsert_repository(db: Session, source_url: str) -> int:
+    """
+    Returns the id of the repository row for ``source_url``, creating it if
+    needed in a single race-free INSERT ... ON CONFLICT on the unique URL.
+    """
+    dialect_insert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if dialect_insert is None:
+        repo_id = db.scalar(select(Repository.id).where(Repository.source_url == source_url))
+        if repo_id is not None:
+            return repo_id
+        return db.execute(
+            insert(Repository)
+            .values(source_url=source_url, clone_status="pending")
+            .returning(Repository.id)
+        ).scalar_one()
+
+    stmt = dialect_insert(Repository).values(source_url=source_url, clone_status="pending")
+    # A no-op update (rather than DO NOTHING) so RETURNING also yields existing rows,
+    # without resetting the clone status of a repository that is already cloned
+    return db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[Repository.source_url],
+            set_={"source_url": stmt.excluded.source_url}
+        ).returning(Repository.id)
+    ).scalar_one()
+
 
 @router.post("/run", response_model=Dict[str, Any], status_code=201)
 async def run_pipeline(
@@ -50,99 +152,108 @@ async def run_pipeline(
     Create a pipeline and immediately run it as a task.
     Handles repo cloning and context extraction.
     """
-    # 1. Handle Repo Record (DB Only)
+    # Order matters: scribe -> architect -> forge -> sentinel -> phoenix
+    enabled = {agent: request.agents.get(agent, {}).get("enabled", False) for agent in AGENT_ORDER}
+    enabled_agents = [agent for agent in AGENT_ORDER if enabled[agent]]
+
+    if not enabled_agents:
+        raise HTTPException(status_code=400, detail="At least one agent must be enabled")
+
+    # 1. Fetch Context (README), overlapped with the repository upsert below
+    readme_task = asyncio.create_task(fetch_readme_content(request.readme_url)) if request.readme_url else None
+
+    # 2. Handle Repo Record (DB Only)
     # We do NOT clone here. Repo cloning is handled by Architect/Forge agents later if needed.
     # However, we ensure the Repository record exists so we can link it.
-    repo = db.query(Repository).filter(Repository.source_url == request.repo_url).first()
-    if not repo:
-        repo = Repository(source_url=request.repo_url, clone_status="pending")
-        db.add(repo)
-        db.commit()
-        db.refresh(repo)
-
-    # 2. Fetch Context (README)
-    project_context = ""
-    if request.readme_url:
-        project_context = await fetch_readme_content(request.readme_url)
+    # Everything below is one transaction of Core INSERT ... RETURNING statements
+    # (no unit-of-work bookkeeping), and the single commit at the end means a
+    # failure leaves no orphan rows behind. The sync session runs in a worker
+    # thread so the event loop can drive the README fetch meanwhile.
+    try:
+        repo_id = await asyncio.to_thread(_upsert_repository, db, request.repo_url)
+    except Exception:
+        if readme_task:
+            readme_task.cancel()
+        db.rollback()
+        raise
+    project_context = await readme_task if readme_task else ""
 
     # 3. Construct Pipeline Config
     scribe_cfg = request.scribe_config
 
     agent_configs = {
-        "scribe": ScribeInput(
-            enabled=request.agents.get("scribe", {}).get("enabled", False),
+        "scribe": _agent_input(
+            "scribe",
+            enabled=enabled["scribe"],
             requirement_text=request.requirements,
             project_context=project_context,
             user_prompt=scribe_cfg.user_prompt if scribe_cfg else None,
             output_format=scribe_cfg.output_format if scribe_cfg else "markdown",
-            selected_documents=scribe_cfg.selected_documents if scribe_cfg else ["feature_doc"]
-        ).model_dump(),
+            selected_documents=list(scribe_cfg.selected_documents) if scribe_cfg else ["feature_doc"],
+            mode=scribe_cfg.mode if scribe_cfg else "realtime"
+        ),
 
-        "architect": ArchitectInput(
-            enabled=request.agents.get("architect", {}).get("enabled", False)
-        ).model_dump(),
+        "architect": _agent_input(
+            "architect",
+            enabled=enabled["architect"]
+        ),
 
-        "forge": ForgeInput(
-            enabled=request.agents.get("forge", {}).get("enabled", False),
+        "forge": _agent_input(
+            "forge",
+            enabled=enabled["forge"],
             repo_path="", # Will be handled by Forge agent via repo_id
             target_branch=request.branch
-        ).model_dump(),
+        ),
 
-        "sentinel": SentinelInput(
-            enabled=request.agents.get("sentinel", {}).get("enabled", False),
+        "sentinel": _agent_input(
+            "sentinel",
+            enabled=enabled["sentinel"],
             target_branch=request.branch
-        ).model_dump(),
+        ),
 
-        "phoenix": PhoenixInput(
-            enabled=request.agents.get("phoenix", {}).get("enabled", False),
+        "phoenix": _agent_input(
+            "phoenix",
+            enabled=enabled["phoenix"],
             release_branch="main"
-        ).model_dump(),
+        ),
     }
 
-    enabled_agents = []
-    # Order matters: scribe -> architect -> forge -> sentinel -> phoenix
-    agent_order = ["scribe", "architect", "forge", "sentinel", "phoenix"]
-    for agent in agent_order:
-        # Check if enabled in input request or derived config
-        if agent_configs[agent]["enabled"]:
-             enabled_agents.append(agent)
-
-    if not enabled_agents:
-        raise HTTPException(status_code=400, detail="At least one agent must be enabled")
-
-    # Create Pipeline
-    pipeline = Pipeline(
-        name=f"Run {request.branch} - {datetime.utcnow().isoformat()}",
-        description=request.requirements[:100],
-        agent_configs=agent_configs,
-        enabled_agents=enabled_agents
-    )
-    db.add(pipeline)
-    db.commit()
-    db.refresh(pipeline)
-
-    # 4. Create Task
-    estimates = calculate_token_estimate(pipeline.enabled_agents)
-
-    task_id = str(uuid.uuid4())
-    task = Task(
-        id=task_id,
-        pipeline_id=pipeline.id,
-        status=TaskStatus.PENDING,
-        config=pipeline.agent_configs,
-        # estimated_tokens/cost fields missing in model, skipping
-        repository_id=repo.id if repo else None
-    )
+    try:
+        # Create Pipeline
+        pipeline_id = db.execute(
+            insert(Pipeline)
+            .values(
+                name=f"Run {request.branch} - {datetime.utcnow().isoformat()}",
+                description=request.requirements[:100],
+                agent_configs=agent_configs,
+                enabled_agents=enabled_agents
+            )
+            .returning(Pipeline.id)
+        ).scalar_one()
 
-    db.add(task)
-    db.commit()
-    db.refresh(task)
+        # 4. Create Task
+        task_id = db.execute(
+            insert(Task)
+            .values(
+                pipeline_id=pipeline_id,
+                status=TaskStatus.PENDING,
+                config=agent_configs,
+                # estimated_tokens/cost fields missing in model, skipping
+                repository_id=repo_id
+            )
+            .returning(Task.id)
+        ).scalar_one()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    await cache_service.invalidate(CACHE_NAMESPACE)
 
     # Trigger Celery Task (TODO: Uncomment when Celery is ready)
     # from app.celery_app import run_pipeline
     # run_pipeline.delay(task.id)
 
-    return {"task_id": task.id}
+    return {"task_id": task_id}
 
 
 @router.post("/", response_model=PipelineResponse, status_code=201)
@@ -158,28 +269,28 @@ async def create_pipeline(
     """
     # Validate sequential agent enablement
     agent_configs = pipeline.agent_configs.model_dump()
-    enabled_agents = []
-    
-    agent_order = ["scribe", "architect", "forge", "sentinel", "phoenix"]
-    found_disabled = False
-    
-    for agent in agent_order:
-        if agent in agent_configs and agent_configs[agent]["enabled"]:
-            if found_disabled:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Cannot enable {agent}: agents must be enabled sequentially without gaps"
-                )
-            enabled_agents.append(agent)
-        elif agent in agent_configs:
-            found_disabled = True
+    mask = 0
+    for agent, bit in AGENT_BITS.items():
+        if agent_configs[agent]["enabled"]:
+            mask |= bit
     
-    if not enabled_agents:
+    if not mask:
         raise HTTPException(
             status_code=400,
             detail="At least one agent must be enabled"
         )
     
+    # Enabled agents without gaps form a run of low bits, i.e. mask == 2**k - 1
+    if mask & (mask + 1):
+        gap = (mask + 1) & ~mask
+        agent = next(name for name, bit in AGENT_BITS.items() if bit > gap and mask & bit)
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot enable {agent}: agents must be enabled sequentially without gaps"
+        )
+    
+    enabled_agents = [agent for agent, bit in AGENT_BITS.items() if mask & bit]
+    
     # Create pipeline
     db_pipeline = Pipeline(
         name=pipeline.name,
@@ -191,19 +302,29 @@ async def create_pipeline(
     db.add(db_pipeline)
     db.commit()
     db.refresh(db_pipeline)
+    await cache_service.invalidate(CACHE_NAMESPACE)
     
     return db_pipeline
 
 
-@router.get("/", response_model=List[PipelineResponse])
+@router.get("/", response_model=List[PipelineListItem])
 async def list_pipelines(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db)
 ):
     """List all pipeline configurations."""
-    pipelines = db.query(Pipeline).offset(skip).limit(limit).all()
-    return pipelines
+    return await cache_service.cached_response(
+        CACHE_NAMESPACE, CACHE_TTL_NORMAL,
+        lambda: PIPELINES_ADAPTER.dump_json(
+            PIPELINES_ADAPTER.validate_python(
+                db.execute(
+                    select(*PIPELINE_LIST_COLUMNS).offset(skip).limit(limit)
+                ).mappings().all()
+            )
+        ),
+        skip, limit
+    )
 
 
 @router.get("/{pipeline_id}", response_model=PipelineResponse)
@@ -212,7 +333,7 @@ async def get_pipeline(
     db: Session = Depends(get_db)
 ):
     """Get a specific pipeline by ID."""
-    pipeline = db.query(Pipeline).filter(Pipeline.id == pipeline_id).first()
+    pipeline = db.get(Pipeline, pipeline_id)
     if not pipeline:
         raise HTTPException(status_code=404, detail="Pipeline not found")
     return pipeline
@@ -228,7 +349,7 @@ async def estimate_tokens(
     
     Returns estimated tokens and costs for each enabled agent.
     """
-    pipeline = db.query(Pipeline).filter(Pipeline.id == pipeline_id).first()
+    pipeline = db.get(Pipeline, pipeline_id)
     if not pipeline:
         raise HTTPException(status_code=404, detail="Pipeline not found")
     
@@ -249,10 +370,11 @@ async def delete_pipeline(
     db: Session = Depends(get_db)
 ):
     """Delete a pipeline configuration."""
-    pipeline = db.query(Pipeline).filter(Pipeline.id == pipeline_id).first()
+    pipeline = db.get(Pipeline, pipeline_id)
     if not pipeline:
         raise HTTPException(status_code=404, detail="Pipeline not found")
     
     db.delete(pipeline)
     db.commit()
+    await cache_service.invalidate(CACHE_NAMESPACE)
     return None
@@ -5,31 +5,56 @@ Endpoints for Scribe agent functionality (e.g., file upload).
 """
 
 from fastapi import APIRouter, UploadFile, File, HTTPException
-import docx
-import io
+from typing import IO
+import asyncio
 
 router = APIRouter()
 
+# Largest requirements file accepted by the upload endpoint
+MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+
+# Text uploads are read in chunks of this size
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def _parse_docx(source: IO[bytes]) -> str:
+    """Extracts paragraph text from a .docx file, one paragraph per line."""
+    # python-docx (and lxml behind it) is slow to import and only needed for
+    # uploads, so keep it off the API's startup path
+    import docx
+    return "\n".join(para.text for para in docx.Document(source).paragraphs)
+
+
+async def _read_text(file: UploadFile) -> bytes:
+    """Reads an upload in chunks, refusing anything over MAX_UPLOAD_BYTES."""
+    content = bytearray()
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        content.extend(chunk)
+        if len(content) > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail="File is too large")
+    return bytes(content)
+
+
 @router.post("/upload")
 async def upload_requirements(file: UploadFile = File(...)):
     """
     Upload a requirements file (txt, md, docx) and extract text.
     """
-    content = await file.read()
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="File is too large")
+
     filename = file.filename.lower()
 
     extracted_text = ""
 
     try:
         if filename.endswith(".docx"):
-            doc = docx.Document(io.BytesIO(content))
-            full_text = []
-            for para in doc.paragraphs:
-                full_text.append(para.text)
-            extracted_text = "\n".join(full_text)
+            # The upload is already spooled to a temporary file, so parse it in
+            # place; parsing the XML is CPU-bound, keep it off the event loop
+            extracted_text = await asyncio.to_thread(_parse_docx, file.file)
 
         elif filename.endswith(".txt") or filename.endswith(".md"):
-            extracted_text = content.decode("utf-8")
+            extracted_text = (await _read_text(file)).decode("utf-8")
 
         else:
             raise HTTPException(
@@ -45,5 +70,7 @@ async def upload_requirements(file: UploadFile = File(...)):
 
         return {"filename": file.filename, "text": extracted_text}
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to process file: {str(e)}")
@@ -7,10 +7,11 @@ Task creation, status tracking, and management.
 from typing import List, Optional
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.orm import Session, raiseload, selectinload
 
 from app.db.database import get_db
-from app.models.models import Task, Pipeline, TaskStatus, StageLog
+from app.models.models import ACTIVE_TASK_STATUSES, Task, Pipeline, TaskStatus
 from app.schemas.schemas import (
     TaskCreate,
     TaskResponse,
@@ -80,7 +81,8 @@ async def list_tasks(
     - **status**: Filter by task status
     - **pipeline_id**: Filter by pipeline
     """
-    query = db.query(Task)
+    # TaskResponse has no relationship fields; make sure none get lazy loaded per row
+    query = db.query(Task).options(raiseload("*"))
     
     if status:
         query = query.filter(Task.status == status)
@@ -92,18 +94,15 @@ async def list_tasks(
 
 
 @router.get("/running", response_model=List[TaskResponse])
-async def list_running_tasks(db: Session = Depends(get_db)):
-    """Get all currently running tasks."""
-    running_statuses = [
-        TaskStatus.PENDING,
-        TaskStatus.PROCESSING,
-        TaskStatus.AWAITING_REVIEW,
-        TaskStatus.AWAITING_RELEASE
-    ]
-    
-    tasks = db.query(Task).filter(
-        Task.status.in_(running_statuses)
-    ).order_by(Task.created_at.desc()).all()
+async def list_running_tasks(
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    """Get currently running tasks, newest first."""
+    tasks = db.query(Task).options(raiseload("*")).filter(
+        Task.status.in_(ACTIVE_TASK_STATUSES)
+    ).order_by(Task.created_at.desc()).offset(skip).limit(limit).all()
     
     return tasks
 
@@ -114,7 +113,7 @@ async def get_task(
     db: Session = Depends(get_db)
 ):
     """Get detailed task information including artifacts and token usage."""
-    task = db.query(Task).filter(Task.id == task_id).first()
+    task = db.get(Task, task_id, options=[selectinload(Task.artifacts)])
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     return task
@@ -126,13 +125,12 @@ async def get_task_logs(
     db: Session = Depends(get_db)
 ):
     """Get execution logs for each agent stage."""
-    task = db.query(Task).filter(Task.id == task_id).first()
+    # Logs come back ordered by started_at (see Task.stage_logs)
+    task = db.get(Task, task_id, options=[selectinload(Task.stage_logs)])
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    logs = db.query(StageLog).filter(
-        StageLog.task_id == task_id
-    ).order_by(StageLog.started_at).all()
+    logs = task.stage_logs
     
     return {
         "task_id": task_id,
@@ -193,28 +191,27 @@ async def get_token_dashboard(
     
     cutoff = datetime.utcnow() - timedelta(days=days)
     
-    tasks = db.query(Task).filter(
+    day = func.date(Task.created_at).label("day")
+    rows = db.query(
+        day,
+        func.coalesce(func.sum(Task.total_tokens), 0),
+        func.coalesce(func.sum(Task.total_cost), 0.0),
+        func.count(Task.id)
+    ).filter(
         Task.created_at >= cutoff,
         Task.status == TaskStatus.COMPLETED
-    ).all()
-    
-    total_tokens = sum(t.actual_tokens for t in tasks)
-    total_cost = sum(t.actual_cost for t in tasks)
+    ).group_by(day).all()
     
     # Aggregate by day
-    daily_usage = {}
-    for task in tasks:
-        day = task.created_at.strftime("%Y-%m-%d")
-        if day not in daily_usage:
-            daily_usage[day] = {"tokens": 0, "cost": 0.0, "tasks": 0}
-        daily_usage[day]["tokens"] += task.actual_tokens
-        daily_usage[day]["cost"] += task.actual_cost
-        daily_usage[day]["tasks"] += 1
+    daily_usage = {
+        str(row_day): {"tokens": tokens, "cost": cost, "tasks": count}
+        for row_day, tokens, cost, count in rows
+    }
     
     return {
         "period_days": days,
-        "total_tokens": total_tokens,
-        "total_cost": round(total_cost, 4),
-        "total_tasks": len(tasks),
+        "total_tokens": sum(usage["tokens"] for usage in daily_usage.values()),
+        "total_cost": round(sum(usage["cost"] for usage in daily_usage.values()), 4),
+        "total_tasks": sum(usage["tasks"] for usage in daily_usage.values()),
         "daily_usage": daily_usage
     }
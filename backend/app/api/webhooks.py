@@ -1,11 +1,12 @@
 import hmac
 import hashlib
-import json
 import logging
 from typing import Dict, Any
 from fastapi import APIRouter, Request, Header, HTTPException, Depends
-from sqlalchemy.orm import Session
-from app.db.database import get_db
+from orjson import loads as json_loads
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.async_database import get_async_db
 from app.models.models import Connector, Task, TaskStatus
 from app.utils.task_utils import send_task_update
 
@@ -17,14 +18,16 @@ async def github_webhook(
     request: Request,
     x_github_event: str = Header(None),
     x_hub_signature_256: str = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Handles incoming GitHub webhooks."""
     payload = await request.body()
     
     # Optional: Verify signature if secret is configured in Connector
     # For now, we'll look for a GitHub connector to find the secret
-    connector = db.query(Connector).filter(Connector.type == "github", Connector.is_active == True).first()
+    connector = await db.scalar(
+        select(Connector).where(Connector.type == "github", Connector.is_active == True).limit(1)
+    )
     
     if connector and "webhook_secret" in connector.config:
         secret = connector.config["webhook_secret"]
@@ -32,7 +35,7 @@ async def github_webhook(
             logger.warning("GitHub webhook signature verification failed")
             raise HTTPException(status_code=401, detail="Invalid signature")
 
-    data = json.loads(payload)
+    data = json_loads(payload)
     event_type = x_github_event
     
     logger.info(f"Received GitHub event: {event_type}")
@@ -54,13 +57,15 @@ async def github_webhook(
 async def gitlab_webhook(
     request: Request,
     x_gitlab_token: str = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Handles incoming GitLab webhooks."""
-    data = await request.json()
+    data = json_loads(await request.body())
     event_type = data.get("object_kind")
     
-    connector = db.query(Connector).filter(Connector.type == "gitlab", Connector.is_active == True).first()
+    connector = await db.scalar(
+        select(Connector).where(Connector.type == "gitlab", Connector.is_active == True).limit(1)
+    )
     if connector and "webhook_token" in connector.config:
         if x_gitlab_token != connector.config["webhook_token"]:
             raise HTTPException(status_code=401, detail="Invalid token")
@@ -78,22 +83,24 @@ async def gitlab_webhook(
 
 def verify_github_signature(payload: bytes, signature: str, secret: str) -> bool:
     """Verifies HMAC hex digest of the payload."""
-    if not signature:
-        return False
-    sha_name, signature = signature.split('=')
-    if sha_name != 'sha256':
+    # Reject malformed headers before hashing an attacker-controlled body
+    if not signature or not signature.startswith('sha256='):
         return False
+    _, _, signature = signature.partition('=')
     mac = hmac.new(secret.encode(), msg=payload, digestmod=hashlib.sha256)
     return hmac.compare_digest(mac.hexdigest(), signature)
 
-async def handle_mr_merged(mr_url: str, db: Session):
+async def handle_mr_merged(mr_url: str, db: AsyncSession):
     """Logic to trigger Phoenix or finish task when MR is merged."""
-    # Find task associated with this MR
-    # In a real app, we'd have an AgentExecutionLog or Task metadata for the PR
-    # For now, we'll scan tasks in 'AWAITING_REVIEW' or 'PROCESSING'
-    task = db.query(Task).filter(
-        Task.status.in_([TaskStatus.PROCESSING, TaskStatus.AWAITING_REVIEW])
-    ).first() # Simplified search
+    if not mr_url:
+        return
+
+    task = await db.scalar(
+        select(Task).where(
+            Task.pr_url == mr_url,
+            Task.status.in_([TaskStatus.PROCESSING, TaskStatus.AWAITING_REVIEW])
+        ).limit(1)
+    )
     
     if task:
         logger.info(f"MR {mr_url} merged. Resuming task {task.id} for PHOENIX stage.")
@@ -6,11 +6,12 @@ CRUD operations for managing outbound webhooks.
 
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from datetime import datetime
 
-from app.db.database import get_db
+from app.db.async_database import get_async_db
 from app.models.webhook import Webhook
 from app.schemas.schemas import WebhookCreate, WebhookResponse
 
@@ -18,52 +19,53 @@ router = APIRouter()
 
 
 @router.post("/", response_model=WebhookResponse, status_code=201)
-async def create_webhook(webhook: WebhookCreate, db: Session = Depends(get_db)):
+async def create_webhook(webhook: WebhookCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new webhook."""
     db_webhook = Webhook(**webhook.model_dump())
     db.add(db_webhook)
-    db.commit()
-    db.refresh(db_webhook)
+    await db.commit()
+    await db.refresh(db_webhook)
     return db_webhook
 
 
 @router.get("/", response_model=List[WebhookResponse])
-async def list_webhooks(db: Session = Depends(get_db)):
+async def list_webhooks(db: AsyncSession = Depends(get_async_db)):
     """List all webhooks."""
-    return db.query(Webhook).all()
+    return (await db.scalars(select(Webhook))).all()
 
 
 @router.get("/{webhook_id}", response_model=WebhookResponse)
-async def get_webhook(webhook_id: int, db: Session = Depends(get_db)):
+async def get_webhook(webhook_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a specific webhook."""
-    webhook = db.query(Webhook).filter(Webhook.id == webhook_id).first()
+    webhook = await db.get(Webhook, webhook_id)
     if not webhook:
         raise HTTPException(status_code=404, detail="Webhook not found")
     return webhook
 
 
 @router.put("/{webhook_id}", response_model=WebhookResponse)
-async def update_webhook(webhook_id: int, webhook_in: WebhookCreate, db: Session = Depends(get_db)):
+async def update_webhook(webhook_id: int, webhook_in: WebhookCreate, db: AsyncSession = Depends(get_async_db)):
     """Update a webhook."""
-    db_webhook = db.query(Webhook).filter(Webhook.id == webhook_id).first()
+    # One UPDATE ... RETURNING instead of a SELECT then UPDATE, touching only the fields sent
+    db_webhook = await db.scalar(
+        update(Webhook)
+        .where(Webhook.id == webhook_id)
+        .values(**webhook_in.model_dump(exclude_unset=True))
+        .returning(Webhook)
+    )
     if not db_webhook:
         raise HTTPException(status_code=404, detail="Webhook not found")
     
-    for key, value in webhook_in.model_dump().items():
-        setattr(db_webhook, key, value)
-    
-    db.commit()
-    db.refresh(db_webhook)
+    await db.commit()
     return db_webhook
 
 
 @router.delete("/{webhook_id}", status_code=204)
-async def delete_webhook(webhook_id: int, db: Session = Depends(get_db)):
+async def delete_webhook(webhook_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a webhook."""
-    db_webhook = db.query(Webhook).filter(Webhook.id == webhook_id).first()
-    if not db_webhook:
+    result = await db.execute(delete(Webhook).where(Webhook.id == webhook_id))
+    if result.rowcount == 0:
         raise HTTPException(status_code=404, detail="Webhook not found")
     
-    db.delete(db_webhook)
-    db.commit()
+    await db.commit()
     return None
@@ -4,60 +4,118 @@ WebSocket Routes
 Real-time status updates for task execution.
 """
 
-from typing import Dict
+from typing import Any, Dict, Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 import asyncio
-import json
+import orjson
 
 router = APIRouter()
 
+# Seconds between flushes of coalesced task updates
+UPDATE_FLUSH_INTERVAL = 0.1
+
 # Active WebSocket connections per task
-active_connections: Dict[int, list] = {}
+active_connections: Dict[int, set] = {}
+
+
+def encode_message(message: dict) -> str:
+    """Encodes a message the way ``WebSocket.send_json`` would, so it can be sent to many sockets."""
+    return orjson.dumps(message).decode()
 
 
 class ConnectionManager:
     """Manages WebSocket connections for real-time updates."""
     
-    def __init__(self):
-        self.active_connections: Dict[int, list[WebSocket]] = {}
+    def __init__(self, flush_interval: float = UPDATE_FLUSH_INTERVAL):
+        self.active_connections: Dict[int, set[WebSocket]] = {}
+        self.flush_interval = flush_interval
+        # Latest unsent update per task; newer updates replace older ones
+        self._pending: Dict[Any, dict] = {}
+        self._flusher: Optional[asyncio.Task] = None
     
     async def connect(self, websocket: WebSocket, task_id: int):
         """Accept a new WebSocket connection."""
         await websocket.accept()
-        if task_id not in self.active_connections:
-            self.active_connections[task_id] = []
-        self.active_connections[task_id].append(websocket)
+        self.active_connections.setdefault(task_id, set()).add(websocket)
     
     def disconnect(self, websocket: WebSocket, task_id: int):
         """Remove a WebSocket connection."""
-        if task_id in self.active_connections:
-            if websocket in self.active_connections[task_id]:
-                self.active_connections[task_id].remove(websocket)
-            if not self.active_connections[task_id]:
+        connections = self.active_connections.get(task_id)
+        if connections is not None:
+            connections.discard(websocket)
+            if not connections:
                 del self.active_connections[task_id]
     
     async def broadcast_to_task(self, task_id: int, message: dict):
         """Send a message to all connections for a task."""
-        if task_id in self.active_connections:
-            disconnected = []
-            for connection in self.active_connections[task_id]:
-                try:
-                    await connection.send_json(message)
-                except Exception:
-                    disconnected.append(connection)
-            
-            for conn in disconnected:
-                self.disconnect(conn, task_id)
+        await self.broadcast_raw(task_id, encode_message(message))
+
+    async def broadcast_raw(self, task_id: int, payload: str):
+        """Send an already-encoded JSON payload to all connections for a task."""
+        connections = self.active_connections.get(task_id)
+        if not connections:
+            return
+
+        # Snapshot the set; sockets may connect or disconnect while the sends are in flight
+        targets = list(connections)
+        results = await asyncio.gather(
+            *(connection.send_text(payload) for connection in targets),
+            return_exceptions=True
+        )
+        disconnected = [
+            connection for connection, result in zip(targets, results)
+            if isinstance(result, Exception)
+        ]
+
+        if disconnected:
+            connections.difference_update(disconnected)
+            if not connections:
+                self.active_connections.pop(task_id, None)
     
+    def queue_update(self, task_id: Any, message: dict):
+        """
+        Schedules a task update for its subscribers and the global stream.
+
+        Updates are flushed every ``flush_interval`` seconds and only the newest
+        update per task within a window is sent, so rapid progress ticks don't
+        turn into one broadcast each. Must be called from a running event loop.
+        """
+        self._pending[task_id] = message
+        flusher = self._flusher
+        if flusher is None or flusher.done() or flusher.get_loop() is not asyncio.get_running_loop():
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_pending())
+
+    async def _flush_pending(self):
+        # Exits once a window passes with nothing queued, so no task outlives its event loop
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            for task_id, message in pending.items():
+                payload = encode_message(message)
+                if task_id != 0:
+                    await self.broadcast_raw(task_id, payload)
+                await self.broadcast_raw(0, payload)  # Also send to global subscribers
+
     async def broadcast_all(self, message: dict):
         """Send a message to all connected clients."""
+        payload = encode_message(message)
         for task_id in list(self.active_connections.keys()):
-            await self.broadcast_to_task(task_id, message)
+            await self.broadcast_raw(task_id, payload)
 
 
 manager = ConnectionManager()
 
 
+async def _receive_messages(websocket: WebSocket):
+    """Answers application-level pings until the client disconnects."""
+    while True:
+        data = await websocket.receive_text()
+        if data == "ping":
+            await websocket.send_json({"type": "pong"})
+
+
 @router.websocket("/ws/status/{task_id}")
 async def task_status_websocket(websocket: WebSocket, task_id: int):
     """
@@ -76,26 +134,9 @@ async def task_status_websocket(websocket: WebSocket, task_id: int):
             "message": f"Connected to task {task_id} status stream"
         })
         
-        # Keep connection alive and handle incoming messages
-        while True:
-            try:
-                # Wait for messages (ping/pong or commands)
-                data = await asyncio.wait_for(
-                    websocket.receive_text(),
-                    timeout=30.0  # 30 second timeout
-                )
-                
-                # Handle ping
-                if data == "ping":
-                    await websocket.send_json({"type": "pong"})
-                
-            except asyncio.TimeoutError:
-                # Send keepalive
-                try:
-                    await websocket.send_json({"type": "keepalive"})
-                except Exception:
-                    break
-                    
+        # Liveness is checked with protocol-level PING frames by the server
+        # (ws_ping_interval / ws_ping_timeout), so just handle incoming messages
+        await _receive_messages(websocket)
     except WebSocketDisconnect:
         pass
     finally:
@@ -112,9 +153,7 @@ async def all_tasks_websocket(websocket: WebSocket):
     await websocket.accept()
     
     # Use task_id 0 for global subscriptions
-    if 0 not in manager.active_connections:
-        manager.active_connections[0] = []
-    manager.active_connections[0].append(websocket)
+    manager.active_connections.setdefault(0, set()).add(websocket)
     
     try:
         await websocket.send_json({
@@ -122,22 +161,7 @@ async def all_tasks_websocket(websocket: WebSocket):
             "message": "Connected to global status stream"
         })
         
-        while True:
-            try:
-                data = await asyncio.wait_for(
-                    websocket.receive_text(),
-                    timeout=30.0
-                )
-                
-                if data == "ping":
-                    await websocket.send_json({"type": "pong"})
-                    
-            except asyncio.TimeoutError:
-                try:
-                    await websocket.send_json({"type": "keepalive"})
-                except Exception:
-                    break
-                    
+        await _receive_messages(websocket)
     except WebSocketDisconnect:
         pass
     finally:
@@ -160,5 +184,4 @@ async def send_task_update(task_id: int, status: str, stage: str, progress: int,
         "message": message
     }
     
-    await manager.broadcast_to_task(task_id, update)
-    await manager.broadcast_to_task(0, update)  # Also send to global subscribers
+    manager.queue_update(task_id, update)
@@ -5,6 +5,7 @@ Creates the Celery app instance for background task processing.
 """
 
 from celery import Celery
+from celery.signals import worker_init
 
 # Create Celery app
 celery_app = Celery("sdlc_agents")
@@ -15,6 +16,14 @@ celery_app.config_from_object("celeryconfig")
 # Auto-discover tasks
 celery_app.autodiscover_tasks(["app.tasks"])
 
+@worker_init.connect
+def _prepare_database(**kwargs):
+    """Brings an existing database up to the current models before any task runs."""
+    import app.models  # noqa: F401  (registers every table)
+    from app.db.database import create_schema
+    create_schema()
+
+
 # Initialize worker logging
 from app.services.logging_service import setup_logging
 setup_logging(log_type="worker")
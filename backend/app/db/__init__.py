@@ -1,2 +1,10 @@
 """Database package."""
-from app.db.database import Base, engine, SessionLocal, get_db
+from app.db.database import Base, SessionLocal, get_db
+
+
+def __getattr__(name: str):
+    # Resolved lazily so importing the package doesn't create the engine
+    if name == "engine":
+        from app.db.database import get_engine
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,70 @@
+"""
+Async Database Engine and Session Management
+
+Used from async code (agents, connector calls) so DB round trips don't block
+the event loop. The engine is created on first use.
+"""
+
+from typing import AsyncIterator, Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import get_settings
+
+# Async driver for each sync URL scheme
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+
+
+def get_async_database_url(url: str) -> str:
+    """Maps a sync database URL onto its async driver."""
+    scheme, sep, rest = url.partition("://")
+    dialect = scheme.split("+", 1)[0]
+    if dialect in ASYNC_DRIVERS:
+        return f"{ASYNC_DRIVERS[dialect]}{sep}{rest}"
+    return url
+
+
+def get_async_engine() -> AsyncEngine:
+    """Returns the process-wide async engine, creating it on first use."""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(get_async_database_url(get_settings().database_url))
+    return _async_engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    """Opens a new async session; use as ``async with AsyncSessionLocal() as db``."""
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = async_sessionmaker(get_async_engine(), expire_on_commit=False)
+    return _async_session_factory()
+
+
+def get_async_sessionmaker() -> Callable[[], AsyncSession]:
+    """Dependency for endpoints that open several sessions, e.g. to run queries concurrently."""
+    return AsyncSessionLocal
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Dependency for getting an async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engine():
+    """
+    Closes pooled connections. Celery runs each pipeline in a fresh event loop
+    and async connections can't outlive the loop that opened them.
+    """
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_session_factory = None
@@ -1,28 +1,178 @@
 """
 Database Configuration and Session Management
+
+The engine is created on first use, so importing models doesn't read
+settings or open a connection pool.
 """
 
-from sqlalchemy import create_engine
+import hashlib
+import logging
+from typing import Optional
+
+from sqlalchemy import JSON, DateTime, create_engine, delete, event, insert, inspect, select, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.sql.functions import FunctionElement
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds a SQLite connection waits for a lock before raising "database is locked"
+SQLITE_BUSY_TIMEOUT = 30
 
-from app.config import settings
+# Columns added to existing tables after they were first created. create_all
+# never alters a table, so create_schema adds these (and their single-column
+# indexes) when an older database is missing them
+ADDED_COLUMNS = (
+    ("tasks", "pr_url"),
+)
 
-# Create engine based on environment
-if settings.DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        settings.DATABASE_URL,
-        connect_args={"check_same_thread": False}  # SQLite specific
-    )
-else:
-    engine = create_engine(settings.DATABASE_URL)
+# SystemConfig key holding the signature of the schema create_schema last built
+SCHEMA_VERSION_KEY = "schema_version"
 
-# Session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+_engine: Optional[Engine] = None
+_session_factory: Optional[sessionmaker] = None
 
 # Base class for models
 Base = declarative_base()
 
+# Type for JSON columns: binary JSONB on PostgreSQL (parsed once on write,
+# indexable), plain JSON elsewhere
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+
+class utcnow(FunctionElement):
+    """
+    Current UTC time as a naive timestamp, evaluated by the database. Used as
+    the server default / onupdate of timestamp columns so inserts and updates
+    don't read the clock in Python.
+    """
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _compile_utcnow(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utcnow, "postgresql")
+def _compile_utcnow_postgresql(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+
+@compiles(utcnow, "sqlite")
+def _compile_utcnow_sqlite(element, compiler, **kw):
+    # CURRENT_TIMESTAMP only has second precision on SQLite
+    return "STRFTIME('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers run alongside the writer; NORMAL is durable enough under WAL
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+def get_engine() -> Engine:
+    """Returns the process-wide engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        settings = get_settings()
+        # Create engine based on environment
+        if settings.DATABASE_URL.startswith("sqlite"):
+            in_memory = ":memory:" in settings.DATABASE_URL
+            _engine = create_engine(
+                settings.DATABASE_URL,
+                # SQLite specific; wait on a locked database instead of failing straight away
+                connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT},
+                # An in-memory database exists per connection, so every thread has to share one
+                **({"poolclass": StaticPool} if in_memory else {})
+            )
+            if not in_memory:
+                event.listen(_engine, "connect", _set_sqlite_pragmas)
+        else:
+            _engine = create_engine(
+                settings.DATABASE_URL,
+                pool_size=settings.DB_POOL_SIZE,
+                max_overflow=settings.DB_MAX_OVERFLOW,
+                pool_recycle=settings.DB_POOL_RECYCLE,
+                pool_pre_ping=True
+            )
+    return _engine
+
+
+def SessionLocal() -> Session:
+    """Opens a new session; close it when done."""
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+    return _session_factory()
+
+
+def schema_signature(engine: Engine) -> str:
+    """Hash of the DDL the registered models produce for the engine's dialect."""
+    from sqlalchemy.schema import CreateIndex, CreateTable
+
+    digest = hashlib.sha256()
+    for table in Base.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=engine.dialect)).encode())
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            digest.update(str(CreateIndex(index).compile(dialect=engine.dialect)).encode())
+    return digest.hexdigest()
+
+
+def _add_missing_columns(engine: Engine):
+    """Adds the ADDED_COLUMNS an existing database predates."""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table_name, column_name in ADDED_COLUMNS:
+            existing = {column["name"] for column in inspector.get_columns(table_name)}
+            if column_name in existing:
+                continue
+            table = Base.metadata.tables[table_name]
+            column_type = table.c[column_name].type.compile(dialect=engine.dialect)
+            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
+            for index in table.indexes:
+                if [column.name for column in index.columns] == [column_name]:
+                    index.create(conn, checkfirst=True)
+            logger.info(f"Added column {table_name}.{column_name}")
+
+
+def create_schema(engine: Optional[Engine] = None) -> bool:
+    """
+    Creates missing tables, skipping the per-table introspection of
+    ``create_all`` when the models haven't changed since the last run.
+    Returns whether ``create_all`` ran.
+    """
+    from app.models.system_config import SystemConfig
+
+    engine = engine or get_engine()
+    signature = schema_signature(engine)
+
+    try:
+        with engine.connect() as conn:
+            stored = conn.scalar(select(SystemConfig.value).where(SystemConfig.key == SCHEMA_VERSION_KEY))
+    except DBAPIError:
+        stored = None  # First boot: system_config doesn't exist yet
+    if stored == signature:
+        return False
+
+    Base.metadata.create_all(bind=engine)
+    _add_missing_columns(engine)
+    with engine.begin() as conn:
+        conn.execute(delete(SystemConfig).where(SystemConfig.key == SCHEMA_VERSION_KEY))
+        conn.execute(insert(SystemConfig).values(key=SCHEMA_VERSION_KEY, value=signature))
+    logger.info("Database schema created or updated")
+    return True
+
 
 def get_db():
     """Dependency for getting database session."""
@@ -31,3 +181,10 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def __getattr__(name: str):
+    # ``engine`` stays importable, but is only built when first asked for (PEP 562)
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
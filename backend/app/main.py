@@ -10,7 +10,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
-from app.config import settings
+from app.config import get_settings
 from app.api import (
     pipelines,
     tasks,
@@ -19,7 +19,6 @@ from app.api import (
     artifacts,
     audit,
     connectors,
-    connectors,
     mcp,
     webhooks as incoming_webhooks,
     approvals,
@@ -29,9 +28,11 @@ from app.api import (
     agent_mapping,
     scribe
 )
-from app.db.database import engine, Base, SessionLocal
+from app.db.database import SessionLocal, create_schema
 from app.services.logging_service import setup_logging
 from app.services.config_service import config_service
+from app.db.async_database import dispose_async_engine
+from app.services.http_client import http_client_service
 
 # Initialize logging
 setup_logging(log_type="api")
@@ -41,13 +42,12 @@ setup_logging(log_type="api")
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
     # Startup
+    settings = get_settings()
     print(f"Starting SDLC Agent Pipeline API ({settings.APP_ENV} mode)")
     
-    # Create database tables
-    Base.metadata.create_all(bind=engine)
-    # Create database tables
-    Base.metadata.create_all(bind=engine)
-    print("Database tables created")
+    # Create database tables (skipped when the models haven't changed)
+    if create_schema():
+        print("Database tables created")
     
     # Seed default configuration
     db = SessionLocal()
@@ -61,6 +61,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     print("Shutting down...")
+    await http_client_service.aclose()
+    await dispose_async_engine()
 
 
 # Create FastAPI app with metadata for Swagger
@@ -94,7 +96,7 @@ This API orchestrates 6 AI agents to automate the software development workflow:
 # CORS middleware for frontend
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"] if settings.is_development else ["http://localhost:3000"],
+    allow_origins=["*"] if get_settings().is_development else ["http://localhost:3000"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -130,7 +132,7 @@ async def root():
         "status": "healthy",
         "service": "SDLC Agent Pipeline",
         "version": "1.0.0",
-        "environment": settings.APP_ENV
+        "environment": get_settings().APP_ENV
     }
 
 
@@ -141,15 +143,20 @@ async def health_check():
         "status": "healthy",
         "database": "connected",
         "queue": "connected",
-        "environment": settings.APP_ENV
+        "environment": get_settings().APP_ENV
     }
 
 
 if __name__ == "__main__":
     import uvicorn
+    from app.utils.event_loop import uvloop_available
+    settings = get_settings()
     uvicorn.run(
         "app.main:app",
         host=settings.HOST,
         port=settings.PORT,
-        reload=settings.is_development
+        reload=settings.is_development,
+        ws_ping_interval=settings.WS_PING_INTERVAL,
+        ws_ping_timeout=settings.WS_PING_TIMEOUT,
+        loop="uvloop" if uvloop_available() else "asyncio"
     )
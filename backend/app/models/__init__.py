@@ -1,3 +1,10 @@
 """Models package."""
+from sqlalchemy.orm import configure_mappers
+
 from app.models.models import *
 from app.models.approval import ApprovalCheckpoint, ApprovalStatus, ApprovalRequest, ApprovalAction, NotificationPreference
+from app.models import agent_connector_mapping, agent_queue, system_config, webhook
+
+# Every model is registered now, so resolve all relationships in one pass at
+# import time instead of on the first query
+configure_mappers()
@@ -5,7 +5,7 @@ Many-to-many mapping between Agents and Connectors/Webhooks.
 Allows assigning specific tools to specific agents.
 """
 
-from sqlalchemy import Column, Integer, ForeignKey, Boolean, Enum
+from sqlalchemy import Column, Integer, ForeignKey, Boolean, Enum, Index
 from sqlalchemy.orm import relationship
 
 from app.db.database import Base
@@ -15,6 +15,11 @@ from app.models.models import AgentStage
 class AgentConnectorMapping(Base):
     """Mapping between an Agent Stage and a Connector or Webhook."""
     __tablename__ = "agent_connector_mappings"
+    __table_args__ = (
+        # Cover the per-agent lookups in the agent mapping API
+        Index("ix_agent_connector_mappings_stage_active_connector", "agent_stage", "is_active", "connector_id"),
+        Index("ix_agent_connector_mappings_stage_active_webhook", "agent_stage", "is_active", "webhook_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     agent_stage = Column(Enum(AgentStage), nullable=False, index=True)
@@ -6,11 +6,11 @@ Each agent has its own queue; items carry adjustable priority.
 """
 
 import enum
-from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
-from app.db.database import Base
+from datetime import datetime
+from app.db.database import Base, JSONType, utcnow
 from app.models.models import AgentStage
 
 
@@ -27,27 +27,34 @@ class AgentQueueItem(Base):
     __tablename__ = "agent_queue_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    task_id = Column(String, ForeignKey("tasks.id"), nullable=False, index=True)
-    agent_stage = Column(Enum(AgentStage), nullable=False, index=True)
+    task_id = Column(String, ForeignKey("tasks.id"), nullable=False)
+    agent_stage = Column(Enum(AgentStage), nullable=False)
 
     # Priority: 1 (lowest) to 10 (highest). Higher = picked first.
-    priority = Column(Integer, default=5, nullable=False, index=True)
+    priority = Column(Integer, default=5, nullable=False)
     priority_reason = Column(String(255), default="user_set")  # user_set, review_bump, aging, promote
 
     # Status
-    status = Column(Enum(QueueItemStatus), default=QueueItemStatus.QUEUED, index=True)
+    status = Column(Enum(QueueItemStatus), default=QueueItemStatus.QUEUED)
 
     # Pipeline context snapshot for the agent to consume
-    context = Column(JSON, nullable=False, default=dict)
+    context = Column(JSONType, nullable=False, default=dict)
 
     # Retry tracking
     retry_count = Column(Integer, default=0)
     error_message = Column(Text, nullable=True)
 
     # Timing
-    enqueued_at = Column(DateTime, default=datetime.utcnow, index=True)
+    enqueued_at = Column(DateTime, default=datetime.utcnow, server_default=utcnow())
     started_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
 
     # Relationship
     task = relationship("Task", backref="queue_items")
+
+    __table_args__ = (
+        # Dequeue and queue listing: per stage and status, highest priority then oldest
+        Index("ix_agent_queue_items_dispatch", agent_stage, status, priority.desc(), enqueued_at),
+        # A task's items (and, by prefix, plain task_id lookups)
+        Index("ix_agent_queue_items_task_stage", task_id, agent_stage),
+    )
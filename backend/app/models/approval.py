@@ -5,11 +5,11 @@ Tracks approval requests, actions, and history for pipeline checkpoints.
 """
 
 import enum
-from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, JSON, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
-from app.db.database import Base
+from datetime import datetime
+from app.db.database import Base, JSONType, utcnow
 
 
 class ApprovalCheckpoint(str, enum.Enum):
@@ -44,22 +44,22 @@ class ApprovalRequest(Base):
     __tablename__ = "approval_requests"
     
     id = Column(Integer, primary_key=True, index=True)
-    task_id = Column(String, ForeignKey("tasks.id"), nullable=False, index=True)
+    task_id = Column(String, ForeignKey("tasks.id"), nullable=False)
     
     # Checkpoint information
     checkpoint = Column(Enum(ApprovalCheckpoint), nullable=False)
     agent_name = Column(String(50), nullable=False)  # scribe, architect, forge, etc.
     
     # Status
-    status = Column(Enum(ApprovalStatus), default=ApprovalStatus.PENDING, index=True)
+    status = Column(Enum(ApprovalStatus), default=ApprovalStatus.PENDING)
     
     # Artifacts for review
-    artifact_paths = Column(JSON, nullable=False, default=list)  # List of file paths
+    artifact_paths = Column(JSONType, nullable=False, default=list)  # List of file paths
     summary = Column(Text, nullable=True)  # Brief summary for quick review
-    details = Column(JSON, nullable=True)  # Additional context (diff stats, test results, etc.)
+    details = Column(JSONType, nullable=True)  # Additional context (diff stats, test results, etc.)
     
     # Timing
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=utcnow(), index=True)
     timeout_at = Column(DateTime, nullable=True)  # When to auto-approve/reject
     resolved_at = Column(DateTime, nullable=True)
     
@@ -69,6 +69,14 @@ class ApprovalRequest(Base):
     # Priority (1-10, higher = more urgent, auto-assigned from stage)
     priority = Column(Integer, default=5, index=True)
     
+    __table_args__ = (
+        # Per-task history and the dashboard's pending list, both newest first
+        Index("ix_approval_requests_task_created", task_id, created_at.desc()),
+        Index("ix_approval_requests_status_created", status, created_at.desc()),
+        # Timeout sweeper: pending requests past their deadline
+        Index("ix_approval_requests_status_timeout", status, timeout_at),
+    )
+    
     # Relationships
     task = relationship("Task", backref="approval_requests")
     actions = relationship("ApprovalAction", back_populates="approval_request", cascade="all, delete-orphan")
@@ -88,10 +96,10 @@ class ApprovalAction(Base):
     
     # Feedback
     comment = Column(Text, nullable=True)  # User comments
-    feedback = Column(JSON, nullable=True)  # Structured feedback for agent
+    feedback = Column(JSONType, nullable=True)  # Structured feedback for agent
     
     # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=utcnow())
     ip_address = Column(String(50), nullable=True)
     user_agent = Column(String(500), nullable=True)
     
@@ -122,7 +130,7 @@ class NotificationPreference(Base):
     timeout_warning_minutes = Column(Integer, default=15)  # Warn X minutes before timeout
     
     # Preferences per checkpoint
-    checkpoint_preferences = Column(JSON, nullable=True)  # {"scribe_output": {"notify": true}, ...}
+    checkpoint_preferences = Column(JSONType, nullable=True)  # {"scribe_output": {"notify": true}, ...}
     
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=utcnow())
+    updated_at = Column(DateTime, default=datetime.utcnow, server_default=utcnow(), onupdate=utcnow())
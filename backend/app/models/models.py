@@ -3,12 +3,13 @@ Database Models for Pipeline and Tasks
 """
 
 import enum
-from datetime import datetime
 from typing import Optional
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, JSON, Float, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, Float, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
-from app.db.database import Base
+from datetime import datetime
+from app.db.database import Base, JSONType, utcnow
+from app.utils.ids import uuid7
 
 
 class TaskStatus(str, enum.Enum):
@@ -22,6 +23,15 @@ class TaskStatus(str, enum.Enum):
     CANCELLED = "cancelled"
 
 
+# Statuses of tasks that haven't finished yet
+ACTIVE_TASK_STATUSES = (
+    TaskStatus.PENDING,
+    TaskStatus.PROCESSING,
+    TaskStatus.AWAITING_REVIEW,
+    TaskStatus.AWAITING_RELEASE,
+)
+
+
 class AgentStage(str, enum.Enum):
     """Agent stage identifiers."""
     SCRIBE = "scribe"
@@ -39,14 +49,14 @@ class Pipeline(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=utcnow())
+    updated_at = Column(DateTime, default=datetime.utcnow, server_default=utcnow(), onupdate=utcnow())
     
     # Agent configurations (JSON)
-    agent_configs = Column(JSON, nullable=False, default=dict)
+    agent_configs = Column(JSONType, nullable=False, default=dict)
     
     # Enabled agents (sequential)
-    enabled_agents = Column(JSON, nullable=False, default=list)
+    enabled_agents = Column(JSONType, nullable=False, default=list)
     
     # Tasks relationship
     tasks = relationship("Task", back_populates="pipeline")
@@ -58,14 +68,15 @@ class Repository(Base):
     source_url = Column(String, unique=True, index=True)
     local_path = Column(String)
     clone_status = Column(String, default="pending")  # pending, cloned, error
-    last_synced = Column(DateTime, default=datetime.utcnow)
+    last_synced = Column(DateTime, default=datetime.utcnow, server_default=utcnow())
     
     tasks = relationship("Task", back_populates="repository")
 
 class Task(Base):
     __tablename__ = "tasks"
     
-    id = Column(String, primary_key=True, index=True)
+    # Time-ordered so new tasks append to the primary key index
+    id = Column(String, primary_key=True, index=True, default=lambda: str(uuid7()))
     pipeline_id = Column(Integer, ForeignKey("pipelines.id"), nullable=False)
     
     status = Column(Enum(TaskStatus), default=TaskStatus.PENDING)
@@ -73,13 +84,16 @@ class Task(Base):
     progress = Column(Integer, default=0)
     
     # JSON field for full configuration
-    config = Column(JSON)
+    config = Column(JSONType)
     
     # Consumption metrics
-    token_usage = Column(JSON, nullable=False, default=dict)
+    token_usage = Column(JSONType, nullable=False, default=dict)
     total_tokens = Column(Integer, default=0)
     total_cost = Column(Float, default=0.0)
     
+    # Pull request opened by SENTINEL; merge webhooks look tasks up by it
+    pr_url = Column(String, nullable=True, index=True)
+    
     # Error handling
     error_message = Column(Text, nullable=True)
     retry_count = Column(Integer, default=0)
@@ -89,10 +103,22 @@ class Task(Base):
     repository = relationship("Repository", back_populates="tasks")
     artifacts = relationship("TaskArtifact", back_populates="task")
     pipeline = relationship("Pipeline", back_populates="tasks")
-    stage_logs = relationship("StageLog", back_populates="task")
-    
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    stage_logs = relationship("StageLog", back_populates="task", order_by="StageLog.started_at")
+    
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=utcnow())
+    updated_at = Column(DateTime, default=datetime.utcnow, server_default=utcnow(), onupdate=utcnow())
+    
+    __table_args__ = (
+        # Token dashboard: completed tasks within a date range
+        Index("ix_tasks_status_created", status, created_at),
+        # Running tasks list; partial so it only covers the few unfinished rows
+        Index(
+            "ix_tasks_active_created",
+            created_at.desc(),
+            postgresql_where=status.in_(ACTIVE_TASK_STATUSES),
+            sqlite_where=status.in_(ACTIVE_TASK_STATUSES),
+        ),
+    )
 
 class TaskArtifact(Base):
     __tablename__ = "task_artifacts"
@@ -100,7 +126,7 @@ class TaskArtifact(Base):
     task_id = Column(String, ForeignKey("tasks.id"))
     artifact_type = Column(String)  # feature_doc, dpia, data_flow, plan, patch
     file_path = Column(String)      # Relative to storage/artifacts
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=utcnow())
     
     task = relationship("Task", back_populates="artifacts")
 
@@ -118,14 +144,14 @@ class AgentExecutionLog(Base):
     provider = Column(String)
     temperature = Column(Float)
     max_tokens = Column(Integer)
-    guardrails = Column(JSON)
-    policies = Column(JSON)
+    guardrails = Column(JSONType)
+    policies = Column(JSONType)
     enforcement_prompt = Column(Text)
-    tools = Column(JSON)
+    tools = Column(JSONType)
     user_prompt = Column(Text, nullable=True)
     
     # Execution Metadata
-    started_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, default=datetime.utcnow, server_default=utcnow())
     completed_at = Column(DateTime, nullable=True)
     status = Column(String, default="in_progress")  # in_progress, success, failed
     error_message = Column(Text, nullable=True)
@@ -146,13 +172,13 @@ class StageLog(Base):
     __tablename__ = "stage_logs"
     
     id = Column(Integer, primary_key=True, index=True)
-    task_id = Column(Integer, ForeignKey("tasks.id"), nullable=False)
+    task_id = Column(String, ForeignKey("tasks.id"), nullable=False)
     
     stage = Column(Enum(AgentStage), nullable=False)
     status = Column(String(50), nullable=False)  # started, completed, failed
     
     # Timing
-    started_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, default=datetime.utcnow, server_default=utcnow())
     completed_at = Column(DateTime, nullable=True)
     duration_seconds = Column(Float, nullable=True)
     
@@ -161,8 +187,8 @@ class StageLog(Base):
     output_tokens = Column(Integer, default=0)
     
     # Input/Output
-    input_data = Column(JSON, nullable=True)
-    output_data = Column(JSON, nullable=True)
+    input_data = Column(JSONType, nullable=True)
+    output_data = Column(JSONType, nullable=True)
     error_message = Column(Text, nullable=True)
     
     # Relationship
@@ -176,10 +202,10 @@ class Connector(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     type = Column(String(50), nullable=False)  # github, gitlab, slack, teams
-    config = Column(JSON, nullable=False, default=dict)  # tokens, urls, etc.
+    config = Column(JSONType, nullable=False, default=dict)  # tokens, urls, etc.
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=utcnow())
+    updated_at = Column(DateTime, default=datetime.utcnow, server_default=utcnow(), onupdate=utcnow())
 
 
 class MCPServer(Base):
@@ -191,9 +217,10 @@ class MCPServer(Base):
     url = Column(String(500), nullable=False)
     auth_token = Column(String(500), nullable=True)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=utcnow())
     
-    tools = relationship("Tool", back_populates="mcp_server")
+    # Tools are removed by the database's ON DELETE CASCADE, not loaded and deleted one by one
+    tools = relationship("Tool", back_populates="mcp_server", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class Tool(Base):
@@ -203,9 +230,9 @@ class Tool(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False, unique=True)
     description = Column(Text, nullable=True)
-    mcp_server_id = Column(Integer, ForeignKey("mcp_servers.id"), nullable=True)
+    mcp_server_id = Column(Integer, ForeignKey("mcp_servers.id", ondelete="CASCADE"), nullable=True)
     
     # Tool parameters schema (JSON)
-    parameters = Column(JSON, nullable=True)
+    parameters = Column(JSONType, nullable=True)
     
     mcp_server = relationship("MCPServer", back_populates="tools")
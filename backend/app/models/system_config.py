@@ -4,10 +4,10 @@ System Configuration Model
 Key-value settings stored in DB for dynamic configuration.
 """
 
-from datetime import datetime
 from sqlalchemy import Column, String, DateTime
 
-from app.db.database import Base
+from datetime import datetime
+from app.db.database import Base, utcnow
 
 
 class SystemConfig(Base):
@@ -16,4 +16,4 @@ class SystemConfig(Base):
 
     key = Column(String(100), primary_key=True)
     value = Column(String(500), nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, server_default=utcnow(), onupdate=utcnow())
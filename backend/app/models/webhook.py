@@ -4,10 +4,10 @@ Webhook Model
 Model for storing outbound webhook configurations.
 """
 
-from datetime import datetime
-from sqlalchemy import Column, Integer, String, Boolean, JSON, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime
 
-from app.db.database import Base
+from datetime import datetime
+from app.db.database import Base, JSONType, utcnow
 
 
 class Webhook(Base):
@@ -18,8 +18,8 @@ class Webhook(Base):
     name = Column(String(255), nullable=False)
     url = Column(String(500), nullable=False)
     secret = Column(String(500), nullable=True)  # HMAC secret
-    events = Column(JSON, nullable=False, default=list)  # ["task_completed", "agent_failed"]
+    events = Column(JSONType, nullable=False, default=list)  # ["task_completed", "agent_failed"]
     platform = Column(String(50), default="custom")  # custom, slack, teams
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=utcnow())
+    updated_at = Column(DateTime, default=datetime.utcnow, server_default=utcnow(), onupdate=utcnow())
@@ -36,6 +36,7 @@ class AgentInputBase(BaseModel):
     user_prompt: Optional[str] = None
     approval_required: bool = False
     approval_timeout_minutes: int = 60
+    async_ok: bool = False  # Allow non-interactive LLM calls to use Gemini Batch Mode
 
 
 class ScribeInput(AgentInputBase):
@@ -44,6 +45,7 @@ class ScribeInput(AgentInputBase):
     project_context: str = ""
     output_format: str = "markdown"  # markdown, docx, both
     selected_documents: List[str] = ["feature_doc"]
+    mode: str = "realtime"  # realtime, batch (Gemini Batch Mode for 3+ documents)
 
 
 class ArchitectInput(AgentInputBase):
@@ -106,22 +108,27 @@ class PipelineCreate(BaseModel):
     agent_configs: PipelineAgentConfigs
 
 
-class PipelineResponse(BaseModel):
-    """Schema for pipeline response."""
+class PipelineListItem(BaseModel):
+    """Pipeline summary for list views, without the agent configurations."""
     id: int
     name: str
     description: Optional[str]
     created_at: datetime
     enabled_agents: List[str]
-    agent_configs: Dict[str, Any]
     
     class Config:
         from_attributes = True
 
+
+class PipelineResponse(PipelineListItem):
+    """Schema for pipeline response."""
+    agent_configs: Dict[str, Any]
+
 class PipelineRunScribeConfig(BaseModel):
     user_prompt: Optional[str] = None
     selected_documents: List[str] = ["feature_doc"]
     output_format: str = "markdown"
+    mode: str = "realtime"
 
 class PipelineRunRequest(BaseModel):
     """Schema for running a pipeline directly."""
@@ -4,6 +4,7 @@ Agent Configuration Service
 Loads and provides access to agent configurations from agents.yaml.
 """
 
+import copy
 import os
 from pathlib import Path
 from typing import Dict, List, Optional, Any
@@ -71,6 +72,13 @@ def calculate_token_estimate(enabled_agents: List[str]) -> Dict[str, Any]:
     Returns:
         Dict with agent estimates, total tokens, and total cost
     """
+    # Copy so callers can't mutate the cached result
+    return copy.deepcopy(_calculate_token_estimate(tuple(enabled_agents)))
+
+
+@lru_cache(maxsize=64)
+def _calculate_token_estimate(enabled_agents: tuple) -> Dict[str, Any]:
+    """Cached by agent list; cleared along with the configs in reload_configs."""
     agents = get_agent_configs()
     token_estimates = get_token_estimates()
     model_pricing = get_model_pricing()
@@ -119,6 +127,7 @@ def calculate_token_estimate(enabled_agents: List[str]) -> Dict[str, Any]:
 def reload_configs():
     """Clear config cache and reload from file."""
     load_agent_configs.cache_clear()
+    _calculate_token_estimate.cache_clear()
 
 
 def update_agent_config(agent_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
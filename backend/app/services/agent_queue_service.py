@@ -8,7 +8,7 @@ import logging
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, func, update
 
 from app.models.agent_queue import AgentQueueItem, QueueItemStatus
 from app.models.models import AgentStage
@@ -222,34 +222,9 @@ class AgentQueueService:
         Bulk aging pass: +1 priority for every AGING_INTERVAL that has elapsed
         since enqueue, for all queued items. Returns number of items updated.
         """
-        now = datetime.utcnow()
-        threshold = now - timedelta(minutes=AGING_INTERVAL_MINUTES)
-
-        items = (
-            db.query(AgentQueueItem)
-            .filter(
-                AgentQueueItem.status == QueueItemStatus.QUEUED,
-                AgentQueueItem.enqueued_at <= threshold,
-                AgentQueueItem.priority < MAX_PRIORITY
-            )
-            .all()
-        )
-
-        updated = 0
-        for item in items:
-            elapsed = (now - item.enqueued_at).total_seconds() / 60
-            intervals = int(elapsed // AGING_INTERVAL_MINUTES)
-            # Target priority = base + intervals, but don't exceed MAX
-            target = min(MAX_PRIORITY, MIN_PRIORITY + intervals)
-            if target > item.priority:
-                item.priority = target
-                item.priority_reason = "aging"
-                updated += 1
-
+        updated = self._apply_aging_update(db)
         if updated:
-            db.commit()
             logger.info(f"Aging pass: updated {updated} queue items")
-
         return updated
 
     # --- Internal helpers ---
@@ -267,30 +242,41 @@ class AgentQueueService:
 
     def _apply_aging_for_stage(self, db: Session, agent_stage: AgentStage):
         """Apply aging only for a specific stage (called before dequeue)."""
+        self._apply_aging_update(db, AgentQueueItem.agent_stage == agent_stage)
+
+    def _apply_aging_update(self, db: Session, *criteria) -> int:
+        """
+        Raises queued items to MIN_PRIORITY + elapsed intervals (capped at MAX)
+        in a single UPDATE. The target is a CASE over precomputed enqueue
+        cutoffs, so no dialect-specific date arithmetic is needed.
+        """
         now = datetime.utcnow()
-        threshold = now - timedelta(minutes=AGING_INTERVAL_MINUTES)
+        max_intervals = MAX_PRIORITY - MIN_PRIORITY
+        target = case(
+            *(
+                (
+                    AgentQueueItem.enqueued_at <= now - timedelta(minutes=AGING_INTERVAL_MINUTES * intervals),
+                    MIN_PRIORITY + intervals
+                )
+                for intervals in range(max_intervals, 0, -1)
+            ),
+            else_=MIN_PRIORITY
+        )
 
-        items = (
-            db.query(AgentQueueItem)
-            .filter(
-                AgentQueueItem.agent_stage == agent_stage,
+        result = db.execute(
+            update(AgentQueueItem)
+            .where(
                 AgentQueueItem.status == QueueItemStatus.QUEUED,
-                AgentQueueItem.enqueued_at <= threshold,
-                AgentQueueItem.priority < MAX_PRIORITY
+                AgentQueueItem.enqueued_at <= now - timedelta(minutes=AGING_INTERVAL_MINUTES),
+                AgentQueueItem.priority < target,
+                *criteria
             )
-            .all()
+            .values(priority=target, priority_reason="aging")
+            .execution_options(synchronize_session=False)
         )
-
-        for item in items:
-            elapsed = (now - item.enqueued_at).total_seconds() / 60
-            intervals = int(elapsed // AGING_INTERVAL_MINUTES)
-            target = min(MAX_PRIORITY, MIN_PRIORITY + intervals)
-            if target > item.priority:
-                item.priority = target
-                item.priority_reason = "aging"
-
-        if items:
+        if result.rowcount:
             db.commit()
+        return result.rowcount
 
 
 # Singleton
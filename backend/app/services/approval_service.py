@@ -7,7 +7,7 @@ Manages approval requests, actions, and orchestration.
 import logging
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
 from app.models.approval import ApprovalRequest, ApprovalAction, ApprovalCheckpoint, ApprovalStatus, STAGE_PRIORITY
 from app.models.models import Task, TaskStatus
@@ -110,7 +110,7 @@ class ApprovalService:
         Returns:
             Created ApprovalAction
         """
-        approval_request = db.query(ApprovalRequest).filter(ApprovalRequest.id == approval_id).first()
+        approval_request = db.get(ApprovalRequest, approval_id)
         if not approval_request:
             raise ValueError(f"Approval request {approval_id} not found")
         
@@ -163,7 +163,7 @@ class ApprovalService:
         Returns:
             Created ApprovalAction
         """
-        approval_request = db.query(ApprovalRequest).filter(ApprovalRequest.id == approval_id).first()
+        approval_request = db.get(ApprovalRequest, approval_id)
         if not approval_request:
             raise ValueError(f"Approval request {approval_id} not found")
         
@@ -273,7 +273,10 @@ class ApprovalService:
         Returns:
             List of pending approval requests
         """
-        query = db.query(ApprovalRequest).filter(ApprovalRequest.status == ApprovalStatus.PENDING)
+        # Actions are serialized with each request; load them for all rows in one query
+        query = db.query(ApprovalRequest).options(
+            selectinload(ApprovalRequest.actions)
+        ).filter(ApprovalRequest.status == ApprovalStatus.PENDING)
         
         if task_id:
             query = query.filter(ApprovalRequest.task_id == task_id)
@@ -3,6 +3,8 @@ import json
 from pathlib import Path
 from typing import List, Dict, Optional, Union
 
+import aiofiles
+
 logger = logging.getLogger(__name__)
 
 class ArtifactService:
@@ -17,8 +19,8 @@ class ArtifactService:
         task_dir.mkdir(parents=True, exist_ok=True)
         return task_dir
 
-    def save_artifact(self, task_id: str, artifact_type: str, content: Union[str, bytes, dict, list], filename: Optional[str] = None) -> str:
-        """Saves an artifact (document, JSON, etc.) to the task directory."""
+    def get_artifact_path(self, task_id: str, artifact_type: str, filename: Optional[str] = None) -> Path:
+        """Returns where an artifact of the given type is stored, for callers that write it themselves."""
         task_dir = self.get_task_dir(task_id)
         
         if not filename:
@@ -33,7 +35,15 @@ class ArtifactService:
             }
             filename = extensions.get(artifact_type, f"{artifact_type}.txt")
 
-        file_path = task_dir / filename
+        return task_dir / filename
+
+    def get_relative_path(self, file_path: Path) -> str:
+        """Artifact path relative to storage, as recorded in task results."""
+        return str(file_path.relative_to(self.storage_path))
+
+    def save_artifact(self, task_id: str, artifact_type: str, content: Union[str, bytes, dict, list], filename: Optional[str] = None) -> str:
+        """Saves an artifact (document, JSON, etc.) to the task directory."""
+        file_path = self.get_artifact_path(task_id, artifact_type, filename)
         
         try:
             if isinstance(content, (dict, list)):
@@ -47,7 +57,28 @@ class ArtifactService:
                     f.write(content)
             
             logger.info(f"Saved artifact {artifact_type} for task {task_id} at {file_path}")
-            return str(file_path.relative_to(self.storage_path))
+            return self.get_relative_path(file_path)
+        except Exception as e:
+            logger.error(f"Failed to save artifact {artifact_type} for task {task_id}: {e}")
+            raise
+
+    async def save_artifact_async(self, task_id: str, artifact_type: str, content: Union[str, bytes, dict, list], filename: Optional[str] = None) -> str:
+        """Async variant of save_artifact that keeps the file write off the event loop."""
+        file_path = self.get_artifact_path(task_id, artifact_type, filename)
+        
+        if isinstance(content, (dict, list)):
+            data = json.dumps(content, indent=2).encode("utf-8")
+        elif isinstance(content, bytes):
+            data = content
+        else:
+            data = content.encode("utf-8")
+        
+        try:
+            async with aiofiles.open(file_path, "wb") as f:
+                await f.write(data)
+            
+            logger.info(f"Saved artifact {artifact_type} for task {task_id} at {file_path}")
+            return self.get_relative_path(file_path)
         except Exception as e:
             logger.error(f"Failed to save artifact {artifact_type} for task {task_id}: {e}")
             raise
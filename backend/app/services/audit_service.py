@@ -1,15 +1,24 @@
 import logging
 import json
-import uuid
+import threading
 from datetime import datetime
 from typing import Dict, List, Optional
 from pathlib import Path
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, raiseload
 from app.db.database import SessionLocal
 from app.models.models import AgentExecutionLog
+from app.utils.ids import uuid7
 
 logger = logging.getLogger(__name__)
 
+# Buffered audit writes are flushed after this delay or once this many are pending
+AUDIT_FLUSH_INTERVAL_SECONDS = 0.5
+AUDIT_FLUSH_BATCH_SIZE = 32
+
+# Records that fail to write are retried with backoff this many times, then
+# moved to the dead-letter directory so they can't block later flushes
+AUDIT_FLUSH_MAX_RETRIES = 5
+
 class AuditService:
     """Service for capturing and querying agent execution state for audit trails."""
     
@@ -17,6 +26,206 @@ class AuditService:
         self.storage_path = Path(storage_path)
         self.audit_dir = self.storage_path / "audit"
         self.audit_dir.mkdir(parents=True, exist_ok=True)
+        self.dead_letter_dir = self.audit_dir / "dead_letter"
+        
+        # Pending writes, drained by flush() (agents enqueue from the event loop and worker threads)
+        self._lock = threading.Lock()
+        self._pending_states: List[Dict] = []
+        self._pending_configs: List[tuple] = []
+        # state_id -> (task_id, link row)
+        self._pending_links: Dict[str, tuple] = {}
+        self._flush_timer: Optional[threading.Timer] = None
+        self._failed_flushes = 0
+
+    def enqueue_state(
+        self,
+        agent_name: str,
+        agent_config: Dict,
+        task_id: str,
+        user_prompt: Optional[str] = None
+    ) -> str:
+        """
+        Buffers an agent state snapshot for a batched insert and returns its state ID.
+        
+        Same record as capture_agent_state, but the row and config artifact are
+        written by a background flush instead of on the caller's path.
+        """
+        state_id = str(uuid7())
+        row = {
+            "id": state_id,
+            "task_id": task_id,
+            "agent_name": agent_name,
+            "model": agent_config.get("model"),
+            "provider": agent_config.get("provider"),
+            "temperature": agent_config.get("temperature"),
+            "max_tokens": agent_config.get("max_tokens"),
+            "guardrails": agent_config.get("guardrails", []),
+            "policies": agent_config.get("policies", {}),
+            "enforcement_prompt": agent_config.get("enforcement_prompt"),
+            "tools": agent_config.get("tools", []),
+            "user_prompt": user_prompt,
+            "started_at": datetime.utcnow(),
+            "status": "in_progress",
+            "config_artifact_path": self._config_artifact_path(state_id, task_id)
+        }
+        
+        with self._lock:
+            self._pending_states.append(row)
+            self._pending_configs.append((state_id, dict(agent_config), task_id))
+        self._schedule_flush()
+        return state_id
+
+    def enqueue_commit_link(self, state_id: str, commit_hash: str, commit_message: str, task_id: Optional[str] = None):
+        """Buffers a commit-to-state link for the next flush."""
+        with self._lock:
+            self._pending_links[state_id] = (task_id, {
+                "id": state_id,
+                "commit_hash": commit_hash,
+                "commit_message": commit_message
+            })
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        with self._lock:
+            pending = len(self._pending_states) + len(self._pending_links)
+            if pending < AUDIT_FLUSH_BATCH_SIZE:
+                if self._flush_timer is None:
+                    self._flush_timer = threading.Timer(AUDIT_FLUSH_INTERVAL_SECONDS, self.flush)
+                    self._flush_timer.daemon = True
+                    self._flush_timer.start()
+                return
+        self.flush()
+
+    def flush(self, db: Optional[Session] = None, raise_for_task: Optional[str] = None):
+        """
+        Writes all buffered states and commit links in one transaction.
+
+        If the batch fails, each record is retried on its own so one bad row
+        can't take the rest down with it; the records that still fail go back
+        into the buffers for a retry with backoff. With ``raise_for_task`` the
+        flush raises if any of that task's records couldn't be written, so a
+        task's final flush can't lose its audit trail silently.
+        """
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            states, self._pending_states = self._pending_states, []
+            configs, self._pending_configs = self._pending_configs, []
+            links, self._pending_links = self._pending_links, {}
+        
+        if not states and not links:
+            return
+        
+        for state_id, config, task_id in configs:
+            try:
+                self._save_config_artifact(state_id, config, task_id)
+            except OSError as e:
+                logger.error(f"Failed to save config artifact for agent state {state_id}: {e}")
+        
+        close_db = False
+        if db is None:
+            db = SessionLocal()
+            close_db = True
+        
+        try:
+            try:
+                if states:
+                    db.bulk_insert_mappings(AgentExecutionLog, states)
+                if links:
+                    db.bulk_update_mappings(AgentExecutionLog, [link for _, link in links.values()])
+                db.commit()
+                failed_states, failed_links, error = [], {}, None
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Audit batch flush failed ({e}), writing records one at a time")
+                failed_states, failed_links, error = self._write_individually(db, states, links)
+        finally:
+            if close_db:
+                db.close()
+        
+        written = len(states) - len(failed_states) + len(links) - len(failed_links)
+        if written:
+            logger.info(f"Flushed {written} audit records")
+        if not failed_states and not failed_links:
+            with self._lock:
+                self._failed_flushes = 0
+            return
+        
+        logger.error(f"Failed to flush {len(failed_states)} agent states and {len(failed_links)} commit links: {error}")
+        self._requeue(failed_states, failed_links)
+        if raise_for_task is not None and (
+            any(state["task_id"] == raise_for_task for state in failed_states)
+            or any(task_id == raise_for_task for task_id, _ in failed_links.values())
+        ):
+            raise RuntimeError(f"Audit records for task {raise_for_task} could not be written: {error}")
+
+    def _write_individually(self, db: Session, states: List[Dict], links: Dict[str, tuple]):
+        """Writes each record in its own savepoint. Returns the failed states and links and the last error."""
+        failed_states: List[Dict] = []
+        failed_links: Dict[str, tuple] = {}
+        error = None
+        for state in states:
+            try:
+                with db.begin_nested():
+                    db.bulk_insert_mappings(AgentExecutionLog, [state])
+            except Exception as e:
+                failed_states.append(state)
+                error = e
+        for state_id, (task_id, link) in links.items():
+            try:
+                with db.begin_nested():
+                    db.bulk_update_mappings(AgentExecutionLog, [link])
+            except Exception as e:
+                failed_links[state_id] = (task_id, link)
+                error = e
+        try:
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            return states, links, e
+        return failed_states, failed_links, error
+
+    def _requeue(self, states: List[Dict], links: Dict[str, tuple]):
+        """
+        Puts failed records back ahead of anything buffered since and schedules
+        a retry. Once retries are exhausted they are dead-lettered instead.
+        """
+        with self._lock:
+            self._failed_flushes += 1
+            if self._failed_flushes > AUDIT_FLUSH_MAX_RETRIES:
+                self._failed_flushes = 0
+                exhausted = True
+            else:
+                exhausted = False
+                self._pending_states = states + self._pending_states
+                # Links buffered after the failed flush are newer, so they win
+                self._pending_links = {**links, **self._pending_links}
+                if self._flush_timer is None:
+                    delay = AUDIT_FLUSH_INTERVAL_SECONDS * (2 ** self._failed_flushes)
+                    self._flush_timer = threading.Timer(delay, self.flush)
+                    self._flush_timer.daemon = True
+                    self._flush_timer.start()
+        if exhausted:
+            self._dead_letter(states, links)
+
+    def _dead_letter(self, states: List[Dict], links: Dict[str, tuple]):
+        """Writes records that exhausted their retries to a file for manual recovery, then drops them."""
+        records = {
+            "states": states,
+            "links": [dict(link, task_id=task_id) for task_id, link in links.values()]
+        }
+        try:
+            self.dead_letter_dir.mkdir(parents=True, exist_ok=True)
+            path = self.dead_letter_dir / f"audit_{uuid7()}.json"
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(records, f, indent=2, default=str)
+            logger.error(
+                f"Dropped {len(states)} agent states and {len(links)} commit links after "
+                f"{AUDIT_FLUSH_MAX_RETRIES} retries; written to {path}"
+            )
+        except OSError as e:
+            logger.error(f"Dropped audit records after {AUDIT_FLUSH_MAX_RETRIES} retries: {json.dumps(records, default=str)} ({e})")
 
     def capture_agent_state(
         self,
@@ -39,7 +248,7 @@ class AuditService:
         Returns:
             state_id: Unique identifier for this agent execution state
         """
-        state_id = str(uuid.uuid4())
+        state_id = str(uuid7())
         close_db = False
         
         if db is None:
@@ -84,6 +293,11 @@ class AuditService:
             if close_db:
                 db.close()
 
+    def _config_artifact_path(self, state_id: str, task_id: str) -> str:
+        """Storage-relative path of an agent state's config artifact."""
+        artifact_path = self.audit_dir / f"task_{task_id}" / f"agent_state_{state_id}.json"
+        return str(artifact_path.relative_to(self.storage_path))
+
     def _save_config_artifact(self, state_id: str, config: Dict, task_id: str) -> str:
         """Saves full agent config as JSON file."""
         task_audit_dir = self.audit_dir / f"task_{task_id}"
@@ -104,6 +318,8 @@ class AuditService:
         db: Optional[Session] = None
     ):
         """Updates the status of an agent execution."""
+        # The row may still be buffered
+        self.flush()
         close_db = False
         if db is None:
             db = SessionLocal()
@@ -175,7 +391,8 @@ class AuditService:
             close_db = True
         
         try:
-            return db.query(AgentExecutionLog).filter(
+            # Listings only read columns; fail loudly instead of lazy loading per row
+            return db.query(AgentExecutionLog).options(raiseload("*")).filter(
                 AgentExecutionLog.task_id == task_id
             ).order_by(AgentExecutionLog.started_at).all()
         finally:
@@ -0,0 +1,172 @@
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Union
+
+from fastapi import Response
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis
+except ImportError:  # Redis is optional; fall back to a per-process cache
+    redis = None
+
+# Bound on the in-memory fallback
+MEMORY_CACHE_MAX_ENTRIES = 1024
+
+# Cached API responses live under this prefix, one namespace per resource
+RESPONSE_CACHE_PREFIX = "acp"
+
+# Response TTLs: short for data that changes during a run, normal for configuration
+CACHE_TTL_SHORT = 10
+CACHE_TTL_NORMAL = 60
+CACHE_TTL_LONG = 300
+
+# How long a last-good copy can be served when rebuilding a response fails
+CACHE_STALE_TTL = 3600
+
+
+class CacheService:
+    """
+    Small string key/value cache with per-entry TTL.
+
+    Backed by Redis when REDIS_URL is set, so entries are shared across workers
+    and survive restarts; otherwise entries live in this process only.
+    Fresh API responses are only cached with Redis (see ``cached_response``).
+    """
+
+    def __init__(self, redis_url: Optional[str] = None):
+        # None means settings.REDIS_URL, read on first use so importing this
+        # module doesn't load the settings
+        self._redis_url = redis_url
+        self._redis_resolved = False
+        self._redis_client = None
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    @property
+    def _redis(self):
+        """The Redis client, or None for the in-memory backend; connected on first use."""
+        if not self._redis_resolved:
+            redis_url = self._redis_url if self._redis_url is not None else get_settings().REDIS_URL
+            if redis_url:
+                if redis is None:
+                    logger.warning("REDIS_URL is set but the redis package is not installed; using in-memory cache")
+                else:
+                    self._redis_client = redis.Redis.from_url(redis_url, decode_responses=True)
+            self._redis_resolved = True
+        return self._redis_client
+
+    async def get(self, key: str) -> Optional[str]:
+        if self._redis is not None:
+            try:
+                # The sync client isn't tied to an event loop, which Celery recreates per run
+                return await asyncio.to_thread(self._redis.get, key)
+            except redis.RedisError as e:
+                logger.warning(f"Cache read failed for {key}: {e}")
+                return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.monotonic() > expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, key: str, value: str, ttl: int):
+        if self._redis is not None:
+            try:
+                await asyncio.to_thread(self._redis.set, key, value, ex=ttl)
+            except redis.RedisError as e:
+                logger.warning(f"Cache write failed for {key}: {e}")
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > MEMORY_CACHE_MAX_ENTRIES:
+                self._entries.popitem(last=False)
+
+    async def delete_prefix(self, prefix: str):
+        """Drops every entry whose key starts with ``prefix``."""
+        if self._redis is not None:
+            def delete_matching():
+                keys = list(self._redis.scan_iter(match=f"{prefix}*", count=500))
+                if keys:
+                    self._redis.delete(*keys)
+            try:
+                await asyncio.to_thread(delete_matching)
+            except redis.RedisError as e:
+                logger.warning(f"Cache invalidation failed for {prefix}: {e}")
+            return
+
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+    @staticmethod
+    def response_key(namespace: str, *parts) -> str:
+        return ":".join([RESPONSE_CACHE_PREFIX, namespace, *map(str, parts)])
+
+    async def cached_response(
+        self,
+        namespace: str,
+        ttl: int,
+        build: Callable[[], Union[bytes, Awaitable[bytes]]],
+        *key_parts,
+        stale_ttl: int = 0
+    ) -> Response:
+        """
+        Returns the cached JSON body for this namespace and key, or builds it
+        with ``build`` and caches it for ``ttl`` seconds.
+
+        With ``stale_ttl``, a last-good copy is kept that long and served with
+        ``X-Cache: stale`` if ``build`` fails, e.g. while the database is down.
+
+        Without Redis, fresh responses aren't cached and are built on every
+        request: invalidations would only reach this process, and other API
+        workers would keep serving their copies. The last-good copy is still
+        kept in memory, since it is only served when the rebuild fails.
+        """
+        shared = self._redis is not None
+        key = self.response_key(namespace, *key_parts)
+        if shared:
+            body = await self.get(key)
+            if body is not None:
+                return Response(content=body, media_type="application/json")
+
+        stale_key = self.response_key(namespace, *key_parts, "stale")
+        try:
+            body = build()
+            if inspect.isawaitable(body):
+                body = await body
+        except Exception as e:
+            stale = await self.get(stale_key) if stale_ttl else None
+            if stale is None:
+                raise
+            logger.warning(f"Serving stale {key} after rebuild failed: {e}")
+            return Response(content=stale, media_type="application/json", headers={"X-Cache": "stale"})
+
+        body = body.decode()
+        if shared:
+            await self.set(key, body, ttl)
+        if stale_ttl:
+            await self.set(stale_key, body, stale_ttl)
+        return Response(content=body, media_type="application/json")
+
+    async def invalidate(self, namespace: str):
+        """Drops every cached response in a namespace after its data changes."""
+        await self.delete_prefix(self.response_key(namespace, ""))
+
+
+cache_service = CacheService()
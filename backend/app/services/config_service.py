@@ -8,6 +8,7 @@ import logging
 from typing import Optional, Dict
 from sqlalchemy.orm import Session
 
+from app.db.database import SCHEMA_VERSION_KEY
 from app.models.system_config import SystemConfig
 
 logger = logging.getLogger(__name__)
@@ -18,6 +19,9 @@ DEFAULTS = {
     "cleanup_enabled": "true",
 }
 
+# Bookkeeping rows that aren't user-facing settings
+INTERNAL_KEYS = {SCHEMA_VERSION_KEY}
+
 
 class ConfigService:
     """Manages dynamic system configuration stored in the database."""
@@ -60,7 +64,8 @@ class ConfigService:
         rows = db.query(SystemConfig).all()
         result = dict(DEFAULTS)  # Start with defaults
         for row in rows:
-            result[row.key] = row.value
+            if row.key not in INTERNAL_KEYS:
+                result[row.key] = row.value
         return result
 
     def seed_defaults(self, db: Session):
@@ -1,20 +1,30 @@
 import logging
-import httpx
 from typing import Dict, Any, List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.models import Connector
+from app.services.http_client import http_client_service
 
 logger = logging.getLogger(__name__)
 
+GITHUB_API_URL = "https://api.github.com"
+SLACK_API_URL = "https://slack.com/api"
+
 class ConnectorService:
     """
     Service for managing external platform connectors (GitHub, Slack, etc.).
     Handles API interactions with these platforms.
     """
+
+    async def _get_connector(self, connector_id: int, connector_type: str, db: AsyncSession) -> Optional[Connector]:
+        result = await db.execute(
+            select(Connector).where(Connector.id == connector_id, Connector.type == connector_type)
+        )
+        return result.scalar_one_or_none()
     
-    async def get_github_client(self, connector_id: int, db: Session):
-        """Returns a configured GitHub client for a connector."""
-        connector = db.query(Connector).filter(Connector.id == connector_id, Connector.type == "github").first()
+    async def get_github_headers(self, connector_id: int, db: AsyncSession) -> Dict[str, str]:
+        """Returns the GitHub API headers for a connector."""
+        connector = await self._get_connector(connector_id, "github", db)
         if not connector:
             raise ValueError(f"GitHub connector {connector_id} not found")
         
@@ -22,13 +32,10 @@ class ConnectorService:
         if not token:
             raise ValueError(f"No token found for GitHub connector {connector_id}")
             
-        return httpx.AsyncClient(
-            base_url="https://api.github.com",
-            headers={
-                "Authorization": f"token {token}",
-                "Accept": "application/vnd.github.v3+json"
-            }
-        )
+        return {
+            "Authorization": f"token {token}",
+            "Accept": "application/vnd.github.v3+json"
+        }
 
     async def create_github_mr(
         self, 
@@ -39,25 +46,25 @@ class ConnectorService:
         head: str, 
         base: str, 
         body: str,
-        db: Session
+        db: AsyncSession
     ) -> Dict[str, Any]:
         """Creates a Pull Request on GitHub."""
-        async with await self.get_github_client(connector_id, db) as client:
-            response = await client.post(
-                f"/repos/{repo_owner}/{repo_name}/pulls",
-                json={
-                    "title": title,
-                    "head": head,
-                    "base": base,
-                    "body": body
-                }
-            )
+        response = await http_client_service.get().post(
+            f"{GITHUB_API_URL}/repos/{repo_owner}/{repo_name}/pulls",
+            headers=await self.get_github_headers(connector_id, db),
+            json={
+                "title": title,
+                "head": head,
+                "base": base,
+                "body": body
+            }
+        )
+        
+        if response.status_code != 201:
+            logger.error(f"Failed to create GitHub PR: {response.text}")
+            raise RuntimeError(f"GitHub API error: {response.text}")
             
-            if response.status_code != 201:
-                logger.error(f"Failed to create GitHub PR: {response.text}")
-                raise RuntimeError(f"GitHub API error: {response.text}")
-                
-            return response.json()
+        return response.json()
 
     async def get_github_mr(
         self,
@@ -65,53 +72,51 @@ class ConnectorService:
         repo_owner: str,
         repo_name: str,
         pull_number: int,
-        db: Session
+        db: AsyncSession
     ) -> Dict[str, Any]:
         """Retrieves details of a Pull Request on GitHub."""
-        async with await self.get_github_client(connector_id, db) as client:
-            response = await client.get(f"/repos/{repo_owner}/{repo_name}/pulls/{pull_number}")
-            if response.status_code != 200:
-                logger.error(f"Failed to get GitHub PR: {response.text}")
-                raise RuntimeError(f"GitHub API error: {response.text}")
-            return response.json()
+        response = await http_client_service.get().get(
+            f"{GITHUB_API_URL}/repos/{repo_owner}/{repo_name}/pulls/{pull_number}",
+            headers=await self.get_github_headers(connector_id, db)
+        )
+        if response.status_code != 200:
+            logger.error(f"Failed to get GitHub PR: {response.text}")
+            raise RuntimeError(f"GitHub API error: {response.text}")
+        return response.json()
 
     async def send_slack_notification(
         self, 
         connector_id: int, 
         message: str, 
-        db: Session,
+        db: AsyncSession,
         channel: Optional[str] = None
     ):
         """Sends a notification to Slack via Webhook or App API."""
-        connector = db.query(Connector).filter(Connector.id == connector_id, Connector.type == "slack").first()
+        connector = await self._get_connector(connector_id, "slack", db)
         if not connector:
             raise ValueError(f"Slack connector {connector_id} not found")
             
         webhook_url = connector.config.get("webhook_url")
         if webhook_url:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(webhook_url, json={"text": message})
-                if response.status_code not in [200, 201]:
-                    logger.error(f"Failed to send Slack webhook: {response.text}")
+            response = await http_client_service.get().post(webhook_url, json={"text": message})
+            if response.status_code not in [200, 201]:
+                logger.error(f"Failed to send Slack webhook: {response.text}")
         else:
             # Fallback to API if token is present
             token = connector.config.get("token")
             if not token:
                 raise ValueError(f"No webhook or token found for Slack connector {connector_id}")
                 
-            async with httpx.AsyncClient(
-                base_url="https://slack.com/api",
-                headers={"Authorization": f"Bearer {token}"}
-            ) as client:
-                response = await client.post(
-                    "/chat.postMessage",
-                    json={
-                        "channel": channel or connector.config.get("default_channel"),
-                        "text": message
-                    }
-                )
-                if not response.json().get("ok"):
-                    logger.error(f"Failed to send Slack API message: {response.text}")
+            response = await http_client_service.get().post(
+                f"{SLACK_API_URL}/chat.postMessage",
+                headers={"Authorization": f"Bearer {token}"},
+                json={
+                    "channel": channel or connector.config.get("default_channel"),
+                    "text": message
+                }
+            )
+            if not response.json().get("ok"):
+                logger.error(f"Failed to send Slack API message: {response.text}")
 
     async def create_gitlab_mr(
         self,
@@ -121,41 +126,41 @@ class ConnectorService:
         source_branch: str,
         target_branch: str,
         description: str,
-        db: Session
+        db: AsyncSession
     ) -> Dict[str, Any]:
         """Creates a Merge Request on GitLab."""
-        connector = db.query(Connector).filter(Connector.id == connector_id, Connector.type == "gitlab").first()
+        connector = await self._get_connector(connector_id, "gitlab", db)
         if not connector:
             raise ValueError(f"GitLab connector {connector_id} not found")
             
         token = connector.config.get("token")
         url = connector.config.get("url", "https://gitlab.com")
         
-        async with httpx.AsyncClient(headers={"Private-Token": token}) as client:
-            response = await client.post(
-                f"{url}/api/v4/projects/{project_id}/merge_requests",
-                json={
-                    "source_branch": source_branch,
-                    "target_branch": target_branch,
-                    "title": title,
-                    "description": description
-                }
-            )
+        response = await http_client_service.get().post(
+            f"{url}/api/v4/projects/{project_id}/merge_requests",
+            headers={"Private-Token": token},
+            json={
+                "source_branch": source_branch,
+                "target_branch": target_branch,
+                "title": title,
+                "description": description
+            }
+        )
+        
+        if response.status_code != 201:
+            logger.error(f"Failed to create GitLab MR: {response.text}")
+            raise RuntimeError(f"GitLab API error: {response.text}")
             
-            if response.status_code != 201:
-                logger.error(f"Failed to create GitLab MR: {response.text}")
-                raise RuntimeError(f"GitLab API error: {response.text}")
-                
-            return response.json()
+        return response.json()
 
     async def send_teams_notification(
         self,
         connector_id: int,
         message: str,
-        db: Session
+        db: AsyncSession
     ):
         """Sends a notification to MS Teams via Incoming Webhook."""
-        connector = db.query(Connector).filter(Connector.id == connector_id, Connector.type == "teams").first()
+        connector = await self._get_connector(connector_id, "teams", db)
         if not connector:
             raise ValueError(f"Teams connector {connector_id} not found")
             
@@ -174,19 +179,18 @@ class ConnectorService:
             }]
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(webhook_url, json=payload)
-            if response.status_code != 200:
-                logger.error(f"Failed to send Teams webhook: {response.text}")
+        response = await http_client_service.get().post(webhook_url, json=payload)
+        if response.status_code != 200:
+            logger.error(f"Failed to send Teams webhook: {response.text}")
 
     async def send_cliq_notification(
         self,
         connector_id: int,
         message: str,
-        db: Session
+        db: AsyncSession
     ):
         """Sends a notification to Zoho Cliq via Incoming Webhook."""
-        connector = db.query(Connector).filter(Connector.id == connector_id, Connector.type == "cliq").first()
+        connector = await self._get_connector(connector_id, "cliq", db)
         if not connector:
             raise ValueError(f"Cliq connector {connector_id} not found")
             
@@ -194,10 +198,9 @@ class ConnectorService:
         if not webhook_url:
             raise ValueError("No webhook_url found for Cliq connector")
             
-        async with httpx.AsyncClient() as client:
-            response = await client.post(webhook_url, json={"text": message})
-            if response.status_code != 200:
-                logger.error(f"Failed to send Cliq webhook: {response.text}")
+        response = await http_client_service.get().post(webhook_url, json={"text": message})
+        if response.status_code != 200:
+            logger.error(f"Failed to send Cliq webhook: {response.text}")
 
     async def send_generic_webhook(
         self,
@@ -217,10 +220,9 @@ class ConnectorService:
             signature = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
             headers["X-Hub-Signature-256"] = f"sha256={signature}"
             
-        async with httpx.AsyncClient() as client:
-            try:
-                await client.post(webhook_url, json=payload, headers=headers)
-            except Exception as e:
-                logger.error(f"Failed to send generic webhook: {e}")
+        try:
+            await http_client_service.get().post(webhook_url, json=payload, headers=headers)
+        except Exception as e:
+            logger.error(f"Failed to send generic webhook: {e}")
 
 connector_service = ConnectorService()
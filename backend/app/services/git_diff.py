@@ -0,0 +1,54 @@
+import asyncio
+import hashlib
+import subprocess
+from pathlib import Path
+from typing import Tuple
+
+import aiofiles
+
+from app.services.repo_service import GIT_TIMEOUT_SECONDS
+
+# Diffs are copied to disk in chunks of this size
+DIFF_CHUNK_SIZE = 64 * 1024
+
+
+async def write_diff(repo_path: str, base: str, head: str, dest: Path, head_bytes: int) -> Tuple[bytes, str]:
+    """
+    Streams `git diff base head` into ``dest`` and returns only its first
+    ``head_bytes`` bytes, so large diffs never sit in memory in full,
+    along with the sha256 hex digest of the whole diff.
+    """
+    cmd = ["git", "diff", base, head]
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        cwd=repo_path,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    leading = bytearray()
+    digest = hashlib.sha256()
+
+    async def copy_stdout():
+        async with aiofiles.open(dest, "wb") as f:
+            while chunk := await proc.stdout.read(DIFF_CHUNK_SIZE):
+                if len(leading) < head_bytes:
+                    leading.extend(chunk[:head_bytes - len(leading)])
+                digest.update(chunk)
+                await f.write(chunk)
+
+    try:
+        # Drain stderr alongside stdout so neither pipe can fill up and stall git
+        _, stderr, _ = await asyncio.wait_for(
+            asyncio.gather(copy_stdout(), proc.stderr.read(), proc.wait()),
+            GIT_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise subprocess.TimeoutExpired(cmd, GIT_TIMEOUT_SECONDS)
+
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(
+            proc.returncode, cmd, None, stderr.decode("utf-8", errors="replace")
+        )
+    return bytes(leading), digest.hexdigest()
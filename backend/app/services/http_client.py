@@ -0,0 +1,48 @@
+import asyncio
+import logging
+from typing import Dict, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Default per-request timeout; callers can still pass their own
+HTTP_TIMEOUT_SECONDS = 20.0
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+
+
+class HttpClientService:
+    """
+    Shared outbound HTTP/2 client for connectors, MCP servers and webhooks.
+
+    Reusing one pooled client keeps TCP/TLS connections alive between calls
+    instead of handshaking for every notification. Celery runs each pipeline in
+    its own event loop and a client can't be shared across loops, so there is
+    one client per loop.
+    """
+
+    def __init__(self):
+        self._clients: Dict[int, Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+
+    def get(self) -> httpx.AsyncClient:
+        """Returns the client for the running event loop, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        for key, (client_loop, _) in list(self._clients.items()):
+            if client_loop.is_closed():
+                del self._clients[key]
+
+        entry = self._clients.get(id(loop))
+        if entry is None or entry[0] is not loop or entry[1].is_closed:
+            client = httpx.AsyncClient(http2=True, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT_SECONDS)
+            entry = (loop, client)
+            self._clients[id(loop)] = entry
+        return entry[1]
+
+    async def aclose(self):
+        """Closes the client owned by the running event loop."""
+        entry = self._clients.pop(id(asyncio.get_running_loop()), None)
+        if entry is not None:
+            await entry[1].aclose()
+
+
+http_client_service = HttpClientService()
@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from google.api_core import exceptions as google_exceptions
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rate limits and transient server errors are retried; anything else fails the request
+RETRYABLE_ERRORS = (google_exceptions.ResourceExhausted, google_exceptions.ServerError)
+
+
+class TokenBucket:
+    """
+    Requests-per-minute / tokens-per-minute budget that refills continuously.
+
+    ``acquire`` waits until both budgets can cover the request, so calls are
+    spaced out up front instead of bouncing off provider 429s.
+    """
+
+    def __init__(self, rpm: int = 0, tpm: int = 0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    async def acquire(self, tokens: int = 0):
+        if not self.rpm and not self.tpm:
+            return
+        if self.tpm:
+            # A single oversized request must still be able to go through eventually
+            tokens = min(tokens, self.tpm)
+
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = 0.0
+                if self.rpm and self._requests < 1:
+                    wait = max(wait, (1 - self._requests) * 60 / self.rpm)
+                if self.tpm and self._tokens < tokens:
+                    wait = max(wait, (tokens - self._tokens) * 60 / self.tpm)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+
+            if self.rpm:
+                self._requests -= 1
+            if self.tpm:
+                self._tokens -= tokens
+
+
+def estimate_tokens(message: Any) -> int:
+    """Rough input token count (~4 characters per token) for a prompt string or Content."""
+    if isinstance(message, str):
+        return len(message) // 4
+    parts = getattr(message, "parts", None) or []
+    return sum(len(getattr(part, "text", "") or "") for part in parts) // 4
+
+
+@dataclass
+class _PendingRequest:
+    chat: Any
+    message: Any
+    future: asyncio.Future
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    max_retries: Optional[int] = None
+
+
+@dataclass
+class _LoopState:
+    queue: asyncio.Queue
+    semaphore: asyncio.Semaphore
+    bucket: TokenBucket
+    worker: Optional[asyncio.Task] = None
+    in_flight: set = field(default_factory=set)
+
+
+class LLMBatcher:
+    """
+    Coalesces concurrent Gemini requests and dispatches them with bounded concurrency.
+
+    Requests submitted within ``batch_timeout`` of each other (up to ``batch_size``)
+    are fired together, never more than ``concurrency`` at a time and within the
+    optional RPM/TPM budget. Rate-limit (429) and 5xx responses are retried with
+    exponential backoff.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 8,
+        batch_timeout: float = 0.25,
+        concurrency: int = 4,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        rpm: int = 0,
+        tpm: int = 0,
+        request_timeout: Optional[float] = None
+    ):
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.rpm = rpm
+        self.tpm = tpm
+        self.request_timeout = request_timeout
+        # Celery runs each pipeline in its own event loop, so asyncio primitives
+        # have to be created per loop
+        self._states: Dict[int, tuple] = {}
+
+    def _get_state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        for key, (state_loop, _) in list(self._states.items()):
+            if state_loop.is_closed():
+                del self._states[key]
+
+        entry = self._states.get(id(loop))
+        if entry is None or entry[0] is not loop:
+            state = _LoopState(
+                queue=asyncio.Queue(),
+                semaphore=asyncio.Semaphore(self.concurrency),
+                bucket=TokenBucket(self.rpm, self.tpm)
+            )
+            self._states[id(loop)] = (loop, state)
+        else:
+            state = entry[1]
+
+        if state.worker is None or state.worker.done():
+            state.worker = loop.create_task(self._worker(state))
+        return state
+
+    async def submit(self, chat: Any, message: Any, max_retries: Optional[int] = None, **kwargs) -> Any:
+        """
+        Queues ``chat.send_message_async(message, **kwargs)`` and returns its response.
+
+        ``max_retries`` overrides the batcher's retry budget for this request.
+        """
+        state = self._get_state()
+        if self.request_timeout:
+            # Don't let a hung call pin a concurrency slot
+            kwargs.setdefault("request_options", {"timeout": self.request_timeout})
+        future = asyncio.get_running_loop().create_future()
+        await state.queue.put(_PendingRequest(
+            chat=chat, message=message, future=future, kwargs=kwargs, max_retries=max_retries
+        ))
+        return await future
+
+    async def _worker(self, state: _LoopState):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[_PendingRequest] = [await state.queue.get()]
+            deadline = loop.time() + self.batch_timeout
+
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(state.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            task = loop.create_task(self._dispatch(state, batch))
+            state.in_flight.add(task)
+            task.add_done_callback(state.in_flight.discard)
+
+    async def _dispatch(self, state: _LoopState, batch: List[_PendingRequest]):
+        await asyncio.gather(*(self._send(state, request) for request in batch))
+
+    async def _send(self, state: _LoopState, request: _PendingRequest):
+        attempt = 0
+        max_retries = self.max_retries if request.max_retries is None else request.max_retries
+        tokens = estimate_tokens(request.message)
+        while True:
+            try:
+                async with state.semaphore:
+                    await state.bucket.acquire(tokens)
+                    response = await request.chat.send_message_async(request.message, **request.kwargs)
+                if not request.future.done():
+                    request.future.set_result(response)
+                return
+            except RETRYABLE_ERRORS as e:
+                if attempt >= max_retries:
+                    self._fail(request, e)
+                    return
+                delay = self.base_delay * (2 ** attempt) + random.uniform(0, self.base_delay)
+                attempt += 1
+                logger.warning(f"Gemini request failed ({e}), retrying in {delay:.1f}s (attempt {attempt}/{max_retries})")
+                await asyncio.sleep(delay)
+            except Exception as e:
+                self._fail(request, e)
+                return
+
+    @staticmethod
+    def _fail(request: _PendingRequest, error: Exception):
+        if not request.future.done():
+            request.future.set_exception(error)
+
+
+llm_batcher = LLMBatcher(
+    concurrency=settings.LLM_MAX_CONCURRENCY,
+    max_retries=settings.LLM_MAX_RETRIES,
+    rpm=settings.LLM_RPM_LIMIT,
+    tpm=settings.LLM_TPM_LIMIT,
+    request_timeout=settings.LLM_REQUEST_TIMEOUT
+)
@@ -1,56 +1,70 @@
 import logging
-import httpx
 from typing import Dict, Any, List, Optional
 from sqlalchemy.orm import Session
 from app.models.models import MCPServer, Tool
+from app.services.cache_service import cache_service
+from app.services.http_client import http_client_service
 
 logger = logging.getLogger(__name__)
 
+# Cache namespace of the /mcp/tools listing
+TOOLS_CACHE_NAMESPACE = "mcp_tools"
+
 class MCPService:
     """
     Service for Model Context Protocol (MCP) integrations.
     Managed connections to MCP servers and tool execution.
     """
     
+    def __init__(self):
+        # Bumped whenever the tool registry changes so agents can drop cached tool lists
+        self.tool_version = 0
+
+    def bump_tool_version(self):
+        """Invalidates tool lists cached by running agents."""
+        self.tool_version += 1
+
     async def refresh_tools(self, server_id: int, db: Session) -> List[Dict[str, Any]]:
         """Fetch tools from MCP server and update local registry."""
-        server = db.query(MCPServer).filter(MCPServer.id == server_id).first()
+        server = db.get(MCPServer, server_id)
         if not server:
             raise ValueError(f"MCP Server {server_id} not found")
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            try:
-                # Simplified MCP 'list_tools' call
-                response = await client.post(f"{server.url}/tools/list", headers={
-                    "Authorization": f"Bearer {server.auth_token}" if server.auth_token else ""
-                })
-                
-                if response.status_code != 200:
-                    logger.error(f"Failed to fetch tools from {server.name}: {response.text}")
-                    return []
-                
-                tools_data = response.json().get("tools", [])
-                
-                # Update local DB
-                # First remove old tools for this server
-                db.query(Tool).filter(Tool.mcp_server_id == server_id).delete()
-                
-                registered_tools = []
-                for t in tools_data:
-                    new_tool = Tool(
-                        name=t["name"],
-                        description=t.get("description"),
-                        parameters=t.get("parameters"),
-                        mcp_server_id=server_id
-                    )
-                    db.add(new_tool)
-                    registered_tools.append(t)
-                
-                db.commit()
-                return registered_tools
-            except Exception as e:
-                logger.error(f"MCP refresh failed for {server.name}: {e}")
+        client = http_client_service.get()
+        try:
+            # Simplified MCP 'list_tools' call
+            response = await client.post(f"{server.url}/tools/list", timeout=10.0, headers={
+                "Authorization": f"Bearer {server.auth_token}" if server.auth_token else ""
+            })
+            
+            if response.status_code != 200:
+                logger.error(f"Failed to fetch tools from {server.name}: {response.text}")
                 return []
+            
+            tools_data = response.json().get("tools", [])
+            
+            # Update local DB
+            # First remove old tools for this server
+            db.query(Tool).filter(Tool.mcp_server_id == server_id).delete()
+            
+            registered_tools = []
+            for t in tools_data:
+                new_tool = Tool(
+                    name=t["name"],
+                    description=t.get("description"),
+                    parameters=t.get("parameters"),
+                    mcp_server_id=server_id
+                )
+                db.add(new_tool)
+                registered_tools.append(t)
+            
+            db.commit()
+            self.bump_tool_version()
+            await cache_service.invalidate(TOOLS_CACHE_NAMESPACE)
+            return registered_tools
+        except Exception as e:
+            logger.error(f"MCP refresh failed for {server.name}: {e}")
+            return []
 
     async def execute_tool(self, tool_name: str, arguments: Dict[str, Any], db: Session) -> Any:
         """Execute a tool via its MCP server."""
@@ -62,16 +76,16 @@ class MCPService:
         if not server or not server.is_active:
             raise ValueError(f"MCP Server for tool {tool_name} is inactive or missing")
             
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{server.url}/tools/execute",
-                json={"name": tool_name, "arguments": arguments},
-                headers={"Authorization": f"Bearer {server.auth_token}" if server.auth_token else ""}
-            )
+        response = await http_client_service.get().post(
+            f"{server.url}/tools/execute",
+            json={"name": tool_name, "arguments": arguments},
+            headers={"Authorization": f"Bearer {server.auth_token}" if server.auth_token else ""},
+            timeout=30.0
+        )
+        
+        if response.status_code != 200:
+            raise RuntimeError(f"MCP Execution failed: {response.text}")
             
-            if response.status_code != 200:
-                raise RuntimeError(f"MCP Execution failed: {response.text}")
-                
-            return response.json().get("result")
+        return response.json().get("result")
 
 mcp_service = MCPService()
@@ -1,12 +1,17 @@
+import asyncio
 import os
 import shutil
 import subprocess
 from pathlib import Path
 import logging
 from typing import List
+import pygit2
 
 logger = logging.getLogger(__name__)
 
+# Upper bound for a single git command run from the event loop (pull/push can hang on auth prompts)
+GIT_TIMEOUT_SECONDS = 300
+
 class RepoService:
     def __init__(self, storage_path: str = "./storage"):
         self.storage_path = Path(storage_path)
@@ -17,6 +22,44 @@ class RepoService:
         """Returns the local path for a repository ID."""
         return self.repos_dir / f"repo_{repo_id}"
 
+    async def run_git(
+        self,
+        repo_path: str,
+        *args: str,
+        check: bool = True,
+        timeout: float = GIT_TIMEOUT_SECONDS
+    ) -> subprocess.CompletedProcess:
+        """
+        Runs a git command without blocking the event loop.
+
+        Mirrors subprocess.run(capture_output=True, text=True): returns a
+        CompletedProcess and raises CalledProcessError on failure when ``check`` is set.
+        The process is killed if it runs longer than ``timeout`` seconds.
+        """
+        cmd = ["git", *args]
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            cwd=repo_path,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise subprocess.TimeoutExpired(cmd, timeout)
+
+        result = subprocess.CompletedProcess(
+            cmd,
+            proc.returncode,
+            stdout.decode("utf-8", errors="replace"),
+            stderr.decode("utf-8", errors="replace")
+        )
+        if check and result.returncode != 0:
+            raise subprocess.CalledProcessError(result.returncode, cmd, result.stdout, result.stderr)
+        return result
+
     def clone_repo(self, repo_id: int, source_url: str) -> str:
         """Clones a repository into a task-specific directory."""
         target_path = self.get_repo_path(repo_id)
@@ -52,27 +95,51 @@ class RepoService:
             subprocess.run(["git", "checkout", base_branch], cwd=path, check=True)
             subprocess.run(["git", "pull", "origin", base_branch], cwd=path, check=True)
             
-            # 3. Create and checkout new branch
-            subprocess.run(["git", "checkout", "-b", branch_name], cwd=path, check=True)
+            # 3. Create and checkout new branch (local ops run in-process via libgit2)
+            repo = pygit2.Repository(str(path))
+            branch = repo.branches.local.create(branch_name, repo.head.peel(pygit2.Commit))
+            repo.checkout(branch)
             
             # 4. Prune local branches that aren't base or current
-            result = subprocess.run(["git", "branch"], cwd=path, capture_output=True, text=True)
-            for branch in result.stdout.split('\n'):
-                branch = branch.strip().replace('*', '').strip()
-                if branch and branch not in [base_branch, branch_name, "master", "develop"]:
-                    subprocess.run(["git", "branch", "-D", branch], cwd=path)
+            self._prune_branches(repo, [base_branch, branch_name, "master", "develop"])
                     
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, pygit2.GitError) as e:
             logger.error(f"Branch operation failed in {repo_path}: {e}")
             raise RuntimeError(f"Git branch operation failed: {e}")
 
+    def commit_all(self, repo_path: str, message: str) -> str:
+        """Stages all changes (like `git add .`) and commits them on HEAD. Returns the commit hash."""
+        repo = pygit2.Repository(repo_path)
+        index = repo.index
+        index.add_all()
+        for file_path, flags in repo.status().items():
+            if flags & pygit2.enums.FileStatus.WT_DELETED:
+                index.remove(file_path)
+        index.write()
+        tree_id = index.write_tree()
+
+        parent = repo.head.peel(pygit2.Commit)
+        if parent.tree_id == tree_id:
+            raise RuntimeError("Nothing to commit")
+
+        signature = repo.default_signature
+        commit_id = repo.create_commit("HEAD", signature, signature, message, tree_id, [parent.id])
+        return str(commit_id)
+
     def prune_unrelated_branches(self, repo_path: str, current_branch: str, base_branch: str = "main"):
         """Utility to clean up branches."""
-        path = Path(repo_path)
-        result = subprocess.run(["git", "branch"], cwd=path, capture_output=True, text=True)
-        for branch in result.stdout.split('\n'):
-            branch = branch.strip().replace('*', '').strip()
-            if branch and branch not in [base_branch, current_branch, "master", "develop"]:
-                subprocess.run(["git", "branch", "-D", branch], cwd=path)
+        repo = pygit2.Repository(repo_path)
+        self._prune_branches(repo, [base_branch, current_branch, "master", "develop"])
+
+    def _prune_branches(self, repo: "pygit2.Repository", keep: List[str]):
+        """Force-deletes local branches not in `keep` (the checked-out branch is never deleted)."""
+        for name in list(repo.branches.local):
+            branch = repo.branches.local[name]
+            if name in keep or branch.is_head():
+                continue
+            try:
+                branch.delete()
+            except pygit2.GitError as e:
+                logger.warning(f"Could not delete branch {name}: {e}")
 
 repo_service = RepoService()
@@ -1,2 +1,2 @@
 """Tasks package."""
-from app.tasks.tasks import run_pipeline, release_task
+from app.tasks.tasks import run_pipeline
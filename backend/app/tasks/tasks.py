@@ -1,5 +1,5 @@
-import logging
 import asyncio
+import logging
 from datetime import datetime
 from sqlalchemy.orm import Session
 from app.celery_app import celery_app
@@ -11,10 +11,21 @@ from app.services.repo_service import repo_service
 from app.services.artifact_service import artifact_service
 from app.services.approval_service import approval_service
 from app.services.agent_queue_service import agent_queue_service
+from app.services.audit_service import audit_service
+from app.services.http_client import http_client_service
+from app.db.async_database import dispose_async_engine
 from app.utils.task_utils import send_task_update
+from app.utils.event_loop import run_async
 
 logger = logging.getLogger(__name__)
 
+async def _run_agent(agent, context: dict) -> dict:
+    """Runs an agent stage and releases the agent's resources afterwards."""
+    try:
+        return await agent.run(context)
+    finally:
+        await agent.aclose()
+
 async def execute_pipeline(task_id: str):
     """Internal async function to run the pipeline logic."""
     db: Session = SessionLocal()
@@ -55,8 +66,8 @@ async def execute_pipeline(task_id: str):
             task.repository_id = repo.id
             db.commit()
             
-            # Clone repo
-            repo_path = repo_service.clone_repo(task_id, repo_url)
+            # Clone off the event loop; a large clone can take minutes
+            repo_path = await asyncio.to_thread(repo_service.clone_repo, task_id, repo_url)
             repo.local_path = repo_path
             repo.clone_status = "cloned"
             db.commit()
@@ -68,7 +79,7 @@ async def execute_pipeline(task_id: str):
         from app.agents.scribe_agent import ScribeAgent
         send_task_update(task_id, {"current_stage": "scribe", "progress": 20, "message": "Executing SCRIBE..."})
         scribe = ScribeAgent(context["scribe"], task_id)
-        scribe_results = await scribe.run(context)
+        scribe_results = await _run_agent(scribe, context)
         context["scribe_results"] = scribe_results
         send_task_update(task_id, {"current_stage": "scribe", "status": "completed", "progress": 35, "message": "SCRIBE completed"})
         
@@ -100,7 +111,7 @@ async def execute_pipeline(task_id: str):
             from app.agents.architect_agent import ArchitectAgent
             send_task_update(task_id, {"current_stage": "architect", "progress": 40, "message": "Executing ARCHITECT..."})
             architect = ArchitectAgent(context["architect"], task_id)
-            architect_results = await architect.run(context)
+            architect_results = await _run_agent(architect, context)
             context["architect_results"] = architect_results
             send_task_update(task_id, {"current_stage": "architect", "status": "completed", "progress": 55, "message": "ARCHITECT completed"})
             
@@ -132,7 +143,7 @@ async def execute_pipeline(task_id: str):
             from app.agents.forge_agent import ForgeAgent
             send_task_update(task_id, {"current_stage": "forge", "progress": 60, "message": "Executing FORGE..."})
             forge = ForgeAgent(context["forge"], task_id)
-            forge_results = await forge.run(context)
+            forge_results = await _run_agent(forge, context)
             context["forge_results"] = forge_results
             send_task_update(task_id, {"current_stage": "forge", "status": "completed", "progress": 75, "message": "FORGE completed"})
             
@@ -164,8 +175,11 @@ async def execute_pipeline(task_id: str):
             from app.agents.sentinel_agent import SentinelAgent
             send_task_update(task_id, {"current_stage": "sentinel", "progress": 80, "message": "Executing SENTINEL..."})
             sentinel = SentinelAgent(context["sentinel"], task_id)
-            sentinel_results = await sentinel.run(context)
+            sentinel_results = await _run_agent(sentinel, context)
             context["sentinel_results"] = sentinel_results
+            if sentinel_results.get("pull_number"):
+                task.pr_url = sentinel_results["mr_url"]
+                db.commit()
             send_task_update(task_id, {"current_stage": "sentinel", "status": "completed", "progress": 95, "message": "SENTINEL completed"})
             
             # HITL Checkpoint: SENTINEL Review
@@ -206,7 +220,7 @@ async def execute_pipeline(task_id: str):
             from app.agents.phoenix_agent import PhoenixAgent
             send_task_update(task_id, {"current_stage": "phoenix", "progress": 96, "message": "Executing PHOENIX (Release)..."})
             phoenix = PhoenixAgent(context["phoenix"], task_id)
-            phoenix_results = await phoenix.run(context)
+            phoenix_results = await _run_agent(phoenix, context)
             context["phoenix_results"] = phoenix_results
             
             # HITL Checkpoint: PHOENIX Release
@@ -258,12 +272,19 @@ async def execute_pipeline(task_id: str):
             "message": f"Pipeline failed: {str(e)}"
         })
     finally:
-        db.close()
+        try:
+            # Write out any audit records still buffered by the agents; failing to
+            # write this task's records fails the task instead of dropping them
+            audit_service.flush(raise_for_task=task_id)
+        finally:
+            await dispose_async_engine()
+            await http_client_service.aclose()
+            db.close()
 
 @celery_app.task(name="app.tasks.run_pipeline")
 def run_pipeline(task_id: str):
     """Celery task wrapper for pipeline execution."""
-    asyncio.run(execute_pipeline(task_id))
+    run_async(execute_pipeline(task_id))
 
 @celery_app.task(name="app.tasks.periodic_cleanup")
 def periodic_cleanup(max_age_days: int = 7):
@@ -283,7 +304,7 @@ def resume_pipeline(task_id: str, checkpoint: str):
     """
     logger.info(f"Resuming pipeline for task {task_id} from checkpoint {checkpoint}")
     # Re-run the main pipeline, it will skip to the next stage
-    asyncio.run(execute_pipeline(task_id))
+    run_async(execute_pipeline(task_id))
 
 
 @celery_app.task(name="app.tasks.rerun_agent")
@@ -299,7 +320,7 @@ def rerun_agent(task_id: str, checkpoint: str, feedback: dict = None):
     logger.info(f"Re-running agent for task {task_id} at checkpoint {checkpoint} with feedback")
     # For now, just re-run the entire pipeline
     # In production, this would intelligently restart from the specific agent
-    asyncio.run(execute_pipeline(task_id))
+    run_async(execute_pipeline(task_id))
 
 
 @celery_app.task(name="app.tasks.check_approval_timeouts")
@@ -334,7 +355,7 @@ def process_agent_queue(agent_stage: str):
         
         try:
             # Run the pipeline from the queued context
-            asyncio.run(execute_pipeline(item.task_id))
+            run_async(execute_pipeline(item.task_id))
             agent_queue_service.mark_done(db, item.id)
         except Exception as e:
             logger.error(f"Queue item {item.id} failed: {e}")
@@ -0,0 +1,28 @@
+import asyncio
+import logging
+from typing import Any, Coroutine, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+try:
+    import uvloop
+except ImportError:  # pragma: no cover - uvloop is not available on Windows
+    uvloop = None
+
+
+def uvloop_available() -> bool:
+    return uvloop is not None
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Drop-in replacement for asyncio.run that uses uvloop when it's installed.
+
+    Celery workers start a fresh event loop for every pipeline run, so this is
+    where the faster loop pays off; the API gets uvloop from uvicorn directly.
+    """
+    if uvloop is not None:
+        return uvloop.run(coro)
+    return asyncio.run(coro)
@@ -1,7 +1,7 @@
 import logging
 import asyncio
 from typing import Dict, Any, Optional
-from app.api.websocket import manager
+from app.api.websocket import encode_message, manager
 from app.services.status_service import status_service
 
 logger = logging.getLogger(__name__)
@@ -41,16 +41,15 @@ def send_task_update(task_id: str, data: Dict[str, Any]):
     try:
         loop = asyncio.get_event_loop()
         if loop.is_running():
-            asyncio.ensure_future(manager.broadcast_to_task(0, update_msg))
-            # Also send to specific task if id is not 0
-            if task_id != "0":
-                try:
-                    tid = int(task_id)
-                    asyncio.ensure_future(manager.broadcast_to_task(tid, update_msg))
-                except ValueError:
-                    pass
+            # Task-specific subscriptions are keyed by integer id; other ids
+            # still reach the global stream
+            try:
+                key = int(task_id)
+            except ValueError:
+                key = task_id
+            manager.queue_update(key, update_msg)
         else:
-            asyncio.run(manager.broadcast_to_task(0, update_msg))
+            asyncio.run(manager.broadcast_raw(0, encode_message(update_msg)))
     except Exception as e:
         logger.debug(f"Could not send WS update: {e}")
     
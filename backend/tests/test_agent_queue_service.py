@@ -0,0 +1,115 @@
+"""
+Unit Tests for Agent Queue Aging
+
+Checks the single-UPDATE aging pass against the per-item formula it replaced.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401  (registers every table)
+from app.db.database import Base
+from app.models.agent_queue import AgentQueueItem, QueueItemStatus
+from app.models.models import AgentStage
+from app.services.agent_queue_service import (
+    AGING_INTERVAL_MINUTES,
+    MAX_PRIORITY,
+    MIN_PRIORITY,
+    agent_queue_service,
+)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def expected_priority(priority: int, waited_minutes: float) -> int:
+    """The per-item aging formula the bulk UPDATE replaced."""
+    if waited_minutes < AGING_INTERVAL_MINUTES or priority >= MAX_PRIORITY:
+        return priority
+    intervals = int(waited_minutes // AGING_INTERVAL_MINUTES)
+    return max(priority, min(MAX_PRIORITY, MIN_PRIORITY + intervals))
+
+
+def add_item(db, priority: int, waited_minutes: float, stage=AgentStage.FORGE, status=QueueItemStatus.QUEUED):
+    item = AgentQueueItem(
+        task_id="task-1",
+        agent_stage=stage,
+        priority=priority,
+        priority_reason="user_set",
+        status=status,
+        context={},
+        enqueued_at=datetime.utcnow() - timedelta(minutes=waited_minutes)
+    )
+    db.add(item)
+    db.commit()
+    return item
+
+
+# Waits sit mid-interval so the clock moving during the test can't cross a boundary
+@pytest.mark.parametrize("priority,waited_minutes", [
+    (1, 5),                                   # 0 intervals
+    (1, AGING_INTERVAL_MINUTES * 1.5),        # 1 interval
+    (1, AGING_INTERVAL_MINUTES * 4.5),        # several intervals
+    (3, AGING_INTERVAL_MINUTES * 4.5),        # several intervals from a raised priority
+    (7, AGING_INTERVAL_MINUTES * 2.5),        # already above the aged target
+    (1, AGING_INTERVAL_MINUTES * 20.5),       # aged past MAX_PRIORITY
+    (MAX_PRIORITY, AGING_INTERVAL_MINUTES * 3.5),  # already at MAX_PRIORITY
+])
+def test_apply_aging_matches_per_item_formula(db, priority, waited_minutes):
+    item = add_item(db, priority, waited_minutes)
+    expected = expected_priority(priority, waited_minutes)
+
+    updated = agent_queue_service.apply_aging(db)
+
+    db.refresh(item)
+    assert item.priority == expected
+    assert item.priority_reason == ("aging" if expected != priority else "user_set")
+    assert updated == (1 if expected != priority else 0)
+
+
+def test_apply_aging_counts_only_changed_items(db):
+    cases = [
+        (1, 5),
+        (1, AGING_INTERVAL_MINUTES * 1.5),
+        (2, AGING_INTERVAL_MINUTES * 4.5),
+        (MAX_PRIORITY, AGING_INTERVAL_MINUTES * 6.5),
+        (1, AGING_INTERVAL_MINUTES * 30.5),
+    ]
+    items = [add_item(db, priority, waited) for priority, waited in cases]
+    # Items that aren't queued never age
+    done = add_item(db, 1, AGING_INTERVAL_MINUTES * 5.5, status=QueueItemStatus.DONE)
+
+    updated = agent_queue_service.apply_aging(db)
+
+    expected = [expected_priority(priority, waited) for priority, waited in cases]
+    for item in items + [done]:
+        db.refresh(item)
+    assert [item.priority for item in items] == expected
+    assert done.priority == 1
+    assert updated == sum(1 for (priority, _), target in zip(cases, expected) if target != priority)
+
+
+def test_stage_aging_leaves_other_stages_alone(db):
+    forge = add_item(db, 1, AGING_INTERVAL_MINUTES * 2.5, stage=AgentStage.FORGE)
+    sentinel = add_item(db, 1, AGING_INTERVAL_MINUTES * 2.5, stage=AgentStage.SENTINEL)
+
+    agent_queue_service._apply_aging_for_stage(db, AgentStage.FORGE)
+
+    db.refresh(forge)
+    db.refresh(sentinel)
+    assert forge.priority == expected_priority(1, AGING_INTERVAL_MINUTES * 2.5)
+    assert sentinel.priority == 1
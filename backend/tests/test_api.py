@@ -125,7 +125,58 @@ class TestPipelineAPI:
         response = client.post("/api/v1/pipelines/", json=payload)
         assert response.status_code == 400
         assert "at least one" in response.json()["detail"].lower()
-    
+
+    def test_create_pipeline_gap_names_first_agent_after_it(self, client):
+        """Test that a gap (scribe + forge) is rejected, naming forge."""
+        payload = {
+            "name": "Gap Pipeline",
+            "agent_configs": {
+                "scribe": {"enabled": True},
+                "architect": {"enabled": False},
+                "forge": {"enabled": True},
+                "sentinel": {"enabled": False},
+                "phoenix": {"enabled": False}
+            }
+        }
+
+        response = client.post("/api/v1/pipelines/", json=payload)
+        assert response.status_code == 400
+        assert "cannot enable forge" in response.json()["detail"].lower()
+
+    def test_create_pipeline_leading_agent_disabled(self, client):
+        """Test that skipping the first agent (architect only) is rejected."""
+        payload = {
+            "name": "Leading Gap Pipeline",
+            "agent_configs": {
+                "scribe": {"enabled": False},
+                "architect": {"enabled": True},
+                "forge": {"enabled": False},
+                "sentinel": {"enabled": False},
+                "phoenix": {"enabled": False}
+            }
+        }
+
+        response = client.post("/api/v1/pipelines/", json=payload)
+        assert response.status_code == 400
+        assert "cannot enable architect" in response.json()["detail"].lower()
+
+    def test_create_pipeline_valid_prefix(self, client):
+        """Test that a gap-free prefix of agents is accepted in pipeline order."""
+        payload = {
+            "name": "Prefix Pipeline",
+            "agent_configs": {
+                "scribe": {"enabled": True},
+                "architect": {"enabled": True},
+                "forge": {"enabled": True},
+                "sentinel": {"enabled": False},
+                "phoenix": {"enabled": False}
+            }
+        }
+
+        response = client.post("/api/v1/pipelines/", json=payload)
+        assert response.status_code == 201
+        assert response.json()["enabled_agents"] == ["scribe", "architect", "forge"]
+
     def test_list_pipelines(self, client):
         """Test listing pipelines."""
         # Create a pipeline first
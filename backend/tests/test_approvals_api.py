@@ -0,0 +1,107 @@
+"""
+Unit Tests for Approval API
+
+The dashboard reads through async sessions while the other endpoints use the
+request's sync session, so both are pointed at the same file database.
+"""
+
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+import app.models  # noqa: F401  (registers every table)
+from app.main import app
+from app.db.async_database import get_async_sessionmaker
+from app.db.database import Base, get_db
+from app.models.approval import ApprovalCheckpoint
+from app.services.approval_service import approval_service
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    db_path = tmp_path / "approvals.db"
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine), f"sqlite+aiosqlite:///{db_path}"
+    engine.dispose()
+
+
+@pytest.fixture
+def client(session_factory):
+    TestingSessionLocal, async_url = session_factory
+
+    def override_get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    # NullPool: no connection is kept around to outlive the event loop that opened it
+    async_sessions = async_sessionmaker(create_async_engine(async_url, poolclass=NullPool), expire_on_commit=False)
+
+    def override_get_async_sessionmaker():
+        return async_sessions
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_sessionmaker] = override_get_async_sessionmaker
+    with TestClient(app) as c:
+        yield c
+    app.dependency_overrides.clear()
+
+
+def create_approvals(session_factory, count: int) -> list:
+    TestingSessionLocal, _ = session_factory
+    with TestingSessionLocal() as db:
+        return [
+            approval_service.create_approval_request(
+                db=db,
+                task_id=f"task-{i}",
+                checkpoint=ApprovalCheckpoint.SCRIBE_OUTPUT,
+                agent_name="scribe",
+                artifact_paths=[]
+            ).id
+            for i in range(count)
+        ]
+
+
+class TestApprovalDashboard:
+    """Tests for the approval dashboard counts."""
+
+    def test_dashboard_empty(self, client):
+        """Test the dashboard with no approvals."""
+        response = client.get("/api/approvals/dashboard")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["pending_count"] == 0
+        assert data["pending_requests"] == []
+        assert data["recent_actions"] == []
+
+    def test_dashboard_counts_after_actions(self, client, session_factory):
+        """Test that approvals and rejections made through the API show up in the counts."""
+        approved, rejected, pending = create_approvals(session_factory, 3)
+
+        # Approving and rejecting queue Celery tasks; there is no broker under test
+        with patch("app.tasks.tasks.resume_pipeline.delay"), patch("app.tasks.tasks.rerun_agent.delay"):
+            response = client.post(f"/api/approvals/{approved}/approve", json={"action": "approved"})
+            assert response.status_code == 200
+            response = client.post(
+                f"/api/approvals/{rejected}/reject",
+                json={"action": "rejected", "comment": "Needs more detail"}
+            )
+            assert response.status_code == 200
+
+        response = client.get("/api/approvals/dashboard")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["pending_count"] == 1
+        assert data["approved_count"] == 1
+        assert data["rejected_count"] == 1
+        assert data["timeout_count"] == 0
+        assert [request["id"] for request in data["pending_requests"]] == [pending]
+        assert len(data["recent_actions"]) == 2
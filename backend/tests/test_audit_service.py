@@ -0,0 +1,97 @@
+"""
+Unit Tests for Buffered Audit Writes
+
+Tests that failed audit flushes are retried, attributed to the right task
+and dead-lettered once their retries run out.
+"""
+
+import json
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401  (registers every table)
+from app.db.database import Base
+from app.models.models import AgentExecutionLog
+from app.services.audit_service import AUDIT_FLUSH_MAX_RETRIES, AuditService
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = AuditService(storage_path=str(tmp_path))
+    yield service
+    cancel_retry(service)
+
+
+def cancel_retry(service: AuditService):
+    """Stops the background retry so it doesn't flush against the app database."""
+    if service._flush_timer is not None:
+        service._flush_timer.cancel()
+        service._flush_timer = None
+
+
+def buffer_state(service: AuditService, task_id: str) -> str:
+    state_id = service.enqueue_state("forge", {"model": "m"}, task_id)
+    cancel_retry(service)
+    return state_id
+
+
+def duplicate_state(service: AuditService, db, task_id: str):
+    """Buffers a state whose primary key already exists, so its insert always fails."""
+    db.add(AgentExecutionLog(id="taken", task_id=task_id, agent_name="forge"))
+    db.commit()
+    service._pending_states.append({"id": "taken", "task_id": task_id, "agent_name": "forge"})
+
+
+def test_bad_record_doesnt_block_the_rest_of_the_batch(service, db):
+    duplicate_state(service, db, "old-task")
+    good_id = buffer_state(service, "new-task")
+
+    # Only another task's record failed, so this task's final flush succeeds
+    service.flush(db, raise_for_task="new-task")
+
+    assert db.get(AgentExecutionLog, good_id) is not None
+    assert [state["id"] for state in service._pending_states] == ["taken"]
+
+
+def test_raises_for_the_callers_own_failed_records(service, db):
+    duplicate_state(service, db, "old-task")
+
+    with pytest.raises(RuntimeError, match="old-task"):
+        service.flush(db, raise_for_task="old-task")
+    # The record stays buffered for a retry
+    assert [state["id"] for state in service._pending_states] == ["taken"]
+
+
+def test_exhausted_records_are_dead_lettered(service, db):
+    duplicate_state(service, db, "old-task")
+
+    for _ in range(AUDIT_FLUSH_MAX_RETRIES + 1):
+        service.flush(db)
+        cancel_retry(service)
+
+    assert service._pending_states == []
+    assert service._failed_flushes == 0
+    [dead_letter] = list(service.dead_letter_dir.glob("audit_*.json"))
+    records = json.loads(dead_letter.read_text())
+    assert [state["id"] for state in records["states"]] == ["taken"]
+
+    # Later flushes no longer see the dropped record
+    good_id = buffer_state(service, "new-task")
+    service.flush(db, raise_for_task="new-task")
+    assert db.get(AgentExecutionLog, good_id) is not None
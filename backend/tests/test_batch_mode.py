@@ -0,0 +1,59 @@
+import asyncio
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from app.agents.scribe_agent import ScribeAgent
+
+
+def fake_client(state: str = "JOB_STATE_RUNNING") -> MagicMock:
+    """A google-genai Client whose batch job never leaves ``state``."""
+    client = MagicMock()
+    job = SimpleNamespace(name="batches/123", state=SimpleNamespace(name=state))
+    client.files.upload.return_value = SimpleNamespace(name="files/abc")
+    client.batches.create.return_value = job
+    client.batches.get.return_value = job
+    return client
+
+
+class TestBatchJobCancellation(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        with patch("app.agents.base_agent.settings") as settings, \
+                patch("app.agents.base_agent.audit_service"):
+            settings.GOOGLE_API_KEY = "fake_key"
+            self.agent = ScribeAgent({"name": "SCRIBE", "model": "fake-model"}, "task_123")
+
+    async def run_job(self, client, max_wait):
+        # google-genai may not be installed, so the SDK module itself is faked
+        sdk = SimpleNamespace(Client=MagicMock(return_value=client))
+        with patch.dict(sys.modules, {"google.genai": sdk}), \
+                patch("app.agents.base_agent.settings") as settings, \
+                patch("app.agents.base_agent.BATCH_POLL_INTERVAL_SECONDS", 0.01):
+            settings.LLM_BATCH_MAX_WAIT = max_wait
+            return await self.agent._run_batch_job(["prompt"])
+
+    async def test_timed_out_job_is_cancelled(self):
+        client = fake_client()
+        with self.assertRaises(TimeoutError):
+            await self.run_job(client, max_wait=0.05)
+        client.batches.cancel.assert_called_once_with(name="batches/123")
+
+    async def test_cancelled_task_cancels_the_job(self):
+        client = fake_client()
+        task = asyncio.create_task(self.run_job(client, max_wait=60))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        client.batches.cancel.assert_called_once_with(name="batches/123")
+
+    async def test_finished_job_is_not_cancelled(self):
+        client = fake_client("JOB_STATE_FAILED")
+        with self.assertRaises(RuntimeError):
+            await self.run_job(client, max_wait=60)
+        client.batches.cancel.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+from app.services.cache_service import CacheService
+
+
+class Builder:
+    """Counts builds and can be switched to fail, like a response builder whose DB went down."""
+
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self) -> bytes:
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("database is down")
+        return f'{{"build": {self.calls}}}'.encode()
+
+
+class TestCachedResponseWithoutRedis(unittest.IsolatedAsyncioTestCase):
+    async def test_fresh_responses_are_not_cached(self):
+        cache = CacheService(redis_url="")
+        build = Builder()
+
+        first = await cache.cached_response("items", 60, build)
+        second = await cache.cached_response("items", 60, build)
+
+        self.assertEqual(build.calls, 2)
+        self.assertEqual(first.body, b'{"build": 1}')
+        self.assertEqual(second.body, b'{"build": 2}')
+
+    async def test_stale_copy_served_when_build_fails(self):
+        cache = CacheService(redis_url="")
+        build = Builder()
+        await cache.cached_response("items", 60, build, stale_ttl=3600)
+
+        build.fail = True
+        response = await cache.cached_response("items", 60, build, stale_ttl=3600)
+
+        self.assertEqual(response.body, b'{"build": 1}')
+        self.assertEqual(response.headers["X-Cache"], "stale")
+
+    async def test_build_error_raised_without_stale_copy(self):
+        cache = CacheService(redis_url="")
+        build = Builder()
+        await cache.cached_response("items", 60, build)
+
+        build.fail = True
+        with self.assertRaises(ConnectionError):
+            await cache.cached_response("items", 60, build)
+
+    async def test_invalidate_drops_stale_copy(self):
+        cache = CacheService(redis_url="")
+        build = Builder()
+        await cache.cached_response("items", 60, build, stale_ttl=3600)
+        await cache.invalidate("items")
+
+        build.fail = True
+        with self.assertRaises(ConnectionError):
+            await cache.cached_response("items", 60, build, stale_ttl=3600)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import asyncio
+import time
+import unittest
+
+from google.api_core import exceptions as google_exceptions
+
+from app.services.llm_batcher import LLMBatcher, TokenBucket
+
+
+class FakeChat:
+    """Stands in for a Gemini ChatSession; fails with the queued errors first, then echoes."""
+
+    def __init__(self, delay: float = 0, errors=()):
+        self.delay = delay
+        self.errors = list(errors)
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def send_message_async(self, message, **kwargs):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.errors:
+                raise self.errors.pop(0)
+            return f"reply to {message}"
+        finally:
+            self.active -= 1
+
+
+def record_batches(batcher: LLMBatcher) -> list:
+    """Records the size of every batch the worker dispatches."""
+    sizes = []
+    dispatch = batcher._dispatch
+
+    async def recording_dispatch(state, batch):
+        sizes.append(len(batch))
+        await dispatch(state, batch)
+
+    batcher._dispatch = recording_dispatch
+    return sizes
+
+
+class TestTokenBucket(unittest.IsolatedAsyncioTestCase):
+    async def test_unlimited_bucket_never_waits(self):
+        bucket = TokenBucket()
+        start = time.monotonic()
+        for _ in range(100):
+            await bucket.acquire(10_000)
+        self.assertLess(time.monotonic() - start, 0.1)
+
+    async def test_waits_for_tokens_to_refill(self):
+        # 6000 tokens per minute refills 100 tokens per second
+        bucket = TokenBucket(tpm=6000)
+        await bucket.acquire(6000)
+        start = time.monotonic()
+        await bucket.acquire(20)
+        elapsed = time.monotonic() - start
+        self.assertGreaterEqual(elapsed, 0.15)
+        self.assertLess(elapsed, 1.0)
+
+    async def test_oversized_request_is_capped_at_budget(self):
+        bucket = TokenBucket(tpm=6000)
+        start = time.monotonic()
+        await bucket.acquire(1_000_000)
+        self.assertLess(time.monotonic() - start, 0.1)
+
+
+class TestLLMBatcher(unittest.IsolatedAsyncioTestCase):
+    async def test_requests_within_window_share_a_batch(self):
+        batcher = LLMBatcher(batch_size=8, batch_timeout=0.05)
+        sizes = record_batches(batcher)
+        chat = FakeChat()
+
+        results = await asyncio.gather(*(batcher.submit(chat, f"m{i}") for i in range(3)))
+        self.assertEqual(results, ["reply to m0", "reply to m1", "reply to m2"])
+
+        # Outside the window, a new batch starts
+        await asyncio.sleep(0.1)
+        await batcher.submit(chat, "late")
+        self.assertEqual(sizes, [3, 1])
+
+    async def test_batch_size_caps_a_batch(self):
+        batcher = LLMBatcher(batch_size=2, batch_timeout=0.05)
+        sizes = record_batches(batcher)
+
+        await asyncio.gather(*(batcher.submit(FakeChat(), f"m{i}") for i in range(5)))
+        self.assertEqual(sizes, [2, 2, 1])
+
+    async def test_semaphore_bounds_concurrent_requests(self):
+        batcher = LLMBatcher(batch_size=8, batch_timeout=0.01, concurrency=2)
+        chat = FakeChat(delay=0.02)
+
+        results = await asyncio.gather(*(batcher.submit(chat, f"m{i}") for i in range(6)))
+        self.assertEqual(len(results), 6)
+        self.assertEqual(chat.calls, 6)
+        self.assertEqual(chat.max_active, 2)
+
+    async def test_retries_resource_exhausted(self):
+        batcher = LLMBatcher(batch_timeout=0, max_retries=3, base_delay=0)
+        chat = FakeChat(errors=[
+            google_exceptions.ResourceExhausted("quota"),
+            google_exceptions.ResourceExhausted("quota"),
+        ])
+
+        self.assertEqual(await batcher.submit(chat, "m"), "reply to m")
+        self.assertEqual(chat.calls, 3)
+
+    async def test_gives_up_after_max_retries(self):
+        batcher = LLMBatcher(batch_timeout=0, max_retries=2, base_delay=0)
+        chat = FakeChat(errors=[google_exceptions.ResourceExhausted("quota")] * 5)
+
+        with self.assertRaises(google_exceptions.ResourceExhausted):
+            await batcher.submit(chat, "m")
+        self.assertEqual(chat.calls, 3)
+
+    async def test_per_request_retry_override(self):
+        batcher = LLMBatcher(batch_timeout=0, max_retries=5, base_delay=0)
+        chat = FakeChat(errors=[google_exceptions.ResourceExhausted("quota")] * 5)
+
+        with self.assertRaises(google_exceptions.ResourceExhausted):
+            await batcher.submit(chat, "m", max_retries=0)
+        self.assertEqual(chat.calls, 1)
+
+    async def test_other_errors_are_not_retried(self):
+        batcher = LLMBatcher(batch_timeout=0, max_retries=3, base_delay=0)
+        chat = FakeChat(errors=[ValueError("bad request")])
+
+        with self.assertRaises(ValueError):
+            await batcher.submit(chat, "m")
+        self.assertEqual(chat.calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
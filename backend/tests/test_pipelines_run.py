@@ -8,6 +8,7 @@ def test_run_pipeline():
         with patch('httpx.AsyncClient.get', new_callable=AsyncMock) as mock_get:
             mock_get.return_value.status_code = 200
             mock_get.return_value.text = "# Project README"
+            mock_get.return_value.headers = {}
 
             payload = {
                 "repo_url": "https://github.com/example/repo",
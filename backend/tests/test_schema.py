@@ -0,0 +1,63 @@
+"""
+Unit Tests for Schema Creation
+
+Tests that create_schema brings databases built from older models up to date.
+"""
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401  (registers every table)
+from app.db.database import Base, create_schema
+
+
+def make_engine():
+    return create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+
+
+def test_create_schema_adds_missing_pr_url():
+    """An existing tasks table without pr_url gets the column and its index."""
+    engine = make_engine()
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_tasks_pr_url"))
+        conn.execute(text("ALTER TABLE tasks DROP COLUMN pr_url"))
+
+    assert create_schema(engine) is True
+
+    inspector = inspect(engine)
+    assert "pr_url" in {column["name"] for column in inspector.get_columns("tasks")}
+    assert "ix_tasks_pr_url" in {index["name"] for index in inspector.get_indexes("tasks")}
+
+
+def test_create_schema_skips_unchanged_models():
+    """A second run with the same models doesn't touch the schema."""
+    engine = make_engine()
+    assert create_schema(engine) is True
+    assert create_schema(engine) is False
+
+
+def test_timestamps_filled_on_tables_without_server_defaults():
+    """Tables created before the server defaults existed still get timestamps on insert."""
+    from sqlalchemy import MetaData
+    from sqlalchemy.orm import Session
+    from app.models.models import Pipeline
+
+    engine = make_engine()
+    # The baseline schema declared these columns without a DB default
+    legacy = Pipeline.__table__.to_metadata(MetaData())
+    for column in legacy.columns:
+        column.server_default = None
+    legacy.create(bind=engine)
+
+    with Session(engine) as db:
+        pipeline = Pipeline(name="Legacy", agent_configs={}, enabled_agents=[])
+        db.add(pipeline)
+        db.commit()
+        db.refresh(pipeline)
+        assert pipeline.created_at is not None
+        assert pipeline.updated_at is not None
@@ -2,6 +2,7 @@ import unittest
 from unittest.mock import MagicMock, patch, AsyncMock
 import sys
 import os
+import io
 
 # Add backend to path
 sys.path.append(os.getcwd())
@@ -20,7 +21,7 @@ class TestScribeAgent(unittest.IsolatedAsyncioTestCase):
 
             # Mock artifact_service
             with patch('app.agents.scribe_agent.artifact_service') as mock_artifact_service:
-                mock_artifact_service.save_artifact.return_value = "path/to/artifact.docx"
+                mock_artifact_service.save_artifact_async = AsyncMock(return_value="path/to/artifact.docx")
 
                 # Instantiate Agent
                 config = {
@@ -53,12 +54,35 @@ class TestScribeAgent(unittest.IsolatedAsyncioTestCase):
                      self.assertEqual(result["status"], "success")
                      self.assertIn("feature_doc", result["artifacts"])
 
-                     # Verify save_artifact called with bytes (docx)
-                     args = mock_artifact_service.save_artifact.call_args
+                     # Verify save_artifact_async called with bytes (docx)
+                     args = mock_artifact_service.save_artifact_async.call_args
                      self.assertEqual(args[0][0], "task_123") # task_id
                      self.assertEqual(args[0][1], "feature_doc") # artifact_type
                      self.assertIsInstance(args[0][2], bytes) # content should be bytes
                      self.assertTrue(args[1]['filename'].endswith(".docx"))
 
+class TestRenderDocx(unittest.TestCase):
+    def render(self, content):
+        import docx
+        from app.agents.scribe_agent import render_docx
+        document = docx.Document(io.BytesIO(render_docx("feature_doc", content)))
+        # Skip the title heading render_docx adds
+        return [(p.style.name, p.text) for p in document.paragraphs[1:]]
+
+    def test_crlf_and_tabs(self):
+        content = "# Title\r\n\r\n\rlone carriage return\r\n#\ttab heading\n-\ttab bullet\n- bullet\r\n  ## Sub  \n* star\n#nospace\n#### deep"
+        self.assertEqual(self.render(content), [
+            ("Heading 1", "Title"),
+            ("Normal", "lone carriage return"),
+            ("Normal", "#\ttab heading"),
+            ("Normal", "-\ttab bullet"),
+            ("List Bullet", "bullet"),
+            ("Heading 2", "Sub"),
+            ("List Bullet", "star"),
+            ("Normal", "#nospace"),
+            ("Normal", "#### deep"),
+        ])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,61 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+import orjson
+
+from app.api.websocket import ConnectionManager
+
+
+def fake_socket() -> MagicMock:
+    socket = MagicMock()
+    socket.send_text = AsyncMock()
+    return socket
+
+
+def sent_messages(socket: MagicMock) -> list:
+    return [orjson.loads(call.args[0]) for call in socket.send_text.await_args_list]
+
+
+class TestQueuedUpdates(unittest.IsolatedAsyncioTestCase):
+    async def test_updates_within_a_window_are_coalesced_per_task(self):
+        manager = ConnectionManager(flush_interval=0.02)
+        task_1, task_2, global_stream = fake_socket(), fake_socket(), fake_socket()
+        manager.active_connections = {1: {task_1}, 2: {task_2}, 0: {global_stream}}
+
+        for progress in (10, 20, 30):
+            manager.queue_update(1, {"task_id": 1, "progress": progress})
+        for progress in (5, 15):
+            manager.queue_update(2, {"task_id": 2, "progress": progress})
+        await asyncio.sleep(0.1)
+
+        # One send per task carrying its newest update, plus one per task on the global stream
+        self.assertEqual(sent_messages(task_1), [{"task_id": 1, "progress": 30}])
+        self.assertEqual(sent_messages(task_2), [{"task_id": 2, "progress": 15}])
+        self.assertCountEqual(
+            sent_messages(global_stream),
+            [{"task_id": 1, "progress": 30}, {"task_id": 2, "progress": 15}]
+        )
+
+    async def test_later_windows_are_sent_separately(self):
+        manager = ConnectionManager(flush_interval=0.02)
+        task_1 = fake_socket()
+        manager.active_connections = {1: {task_1}}
+
+        manager.queue_update(1, {"progress": 10})
+        await asyncio.sleep(0.06)
+        manager.queue_update(1, {"progress": 20})
+        await asyncio.sleep(0.06)
+
+        self.assertEqual(sent_messages(task_1), [{"progress": 10}, {"progress": 20}])
+
+    async def test_flusher_stops_when_nothing_is_queued(self):
+        manager = ConnectionManager(flush_interval=0.01)
+        manager.queue_update(1, {"progress": 10})
+        flusher = manager._flusher
+        await asyncio.sleep(0.1)
+        self.assertTrue(flusher.done())
+
+
+if __name__ == "__main__":
+    unittest.main()